@@ -1,19 +1,29 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.db import models
+
+from .utils import normalize_email, normalize_phone_number
 
 User = get_user_model()
 
 class EmailOrPhoneBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            user = User.objects.get(
-                models.Q(email__iexact=username) |
-                models.Q(phone_number__iexact=username)
-            )
-        except User.DoesNotExist:
+        if username is None or password is None:
+            return None
+
+        # One equality lookup on an indexed, normalised column
+        if '@' in username:
+            lookup = {'email_lookup': normalize_email(username)}
+        else:
+            lookup = {'phone_lookup': normalize_phone_number(username)}
+        user = None
+        if all(lookup.values()):
+            user = User.objects.filter(**lookup).order_by('pk').first()
+
+        if user is None:
+            # Hash anyway so a miss takes as long as a wrong password
+            User().set_password(password)
             return None
 
-        if user.check_password(password):
+        if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from .models import CustomUser
+from .utils import normalize_email, normalize_phone_number
 from django.core.exceptions import ValidationError
 import re
 
@@ -22,7 +23,7 @@ class SignupForm(UserCreationForm):
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if CustomUser.objects.filter(email=email).exists():
+        if CustomUser.objects.filter(email_lookup=normalize_email(email)).exists():
             raise ValidationError("An account with this email already exists.")
         return email
 
@@ -67,7 +68,7 @@ class UserProfileEditForm(forms.ModelForm):
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if CustomUser.objects.filter(email=email).exclude(pk=self.instance.pk).exists():
+        if CustomUser.objects.filter(email_lookup=normalize_email(email)).exclude(pk=self.instance.pk).exists():
             raise ValidationError("An account with this email already exists.")
         return email
 
@@ -83,7 +84,7 @@ class UserProfileEditForm(forms.ModelForm):
             if len(phone) < 10:
                 raise forms.ValidationError("Please enter a valid phone number")
             # Check for uniqueness
-            if CustomUser.objects.filter(phone_number=phone).exclude(pk=self.instance.pk).exists():
+            if CustomUser.objects.filter(phone_lookup=normalize_phone_number(phone)).exclude(pk=self.instance.pk).exists():
                 raise ValidationError("An account with this phone number already exists.")
         return phone
 
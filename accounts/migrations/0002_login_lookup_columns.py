@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-19 12:15
+
+from django.db import migrations, models
+
+from accounts.utils import normalize_email, normalize_phone_number
+
+
+def fill_lookup_columns(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    users = list(CustomUser.objects.only('pk', 'email', 'phone_number'))
+    for user in users:
+        user.email_lookup = normalize_email(user.email)
+        user.phone_lookup = normalize_phone_number(user.phone_number)
+    CustomUser.objects.bulk_update(users, ['email_lookup', 'phone_lookup'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='email_lookup',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='phone_lookup',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, null=True),
+        ),
+        migrations.RunPython(fill_lookup_columns, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+from .utils import normalize_email, normalize_phone_number
+
 class CustomUser(AbstractUser):
     USER_TYPE_CHOICES = (
         ('host', 'Host'),
@@ -11,9 +13,23 @@ class CustomUser(AbstractUser):
     phone_number = models.CharField(max_length=20, blank=True, null=True, unique=True)
     email = models.EmailField(unique=True)
     profile_photo = models.ImageField(upload_to='host_photos/', null=True, blank=True)
+    # Normalised copies of email and phone_number used for login lookups
+    email_lookup = models.CharField(max_length=254, blank=True, null=True, db_index=True, editable=False)
+    phone_lookup = models.CharField(max_length=20, blank=True, null=True, db_index=True, editable=False)
+
     def save(self, *args, **kwargs):
         if not self.username:
             self.username = f"{self.first_name} {self.last_name}".strip()
+        self.email_lookup = normalize_email(self.email)
+        self.phone_lookup = normalize_phone_number(self.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'email' in update_fields:
+                update_fields.add('email_lookup')
+            if 'phone_number' in update_fields:
+                update_fields.add('phone_lookup')
+            kwargs['update_fields'] = update_fields
         super().save(*args, **kwargs)
 
     def __str__(self):
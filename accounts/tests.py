@@ -1,3 +1,254 @@
-from django.test import TestCase
+from django.contrib.auth import authenticate, get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.template import engines
+from django.templatetags.static import static
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from unittest.mock import patch
+import tempfile
 
-# Create your tests here.
+from accounts.utils import normalize_phone_number
+from tourwise_website.sessions import SessionStore
+from tourwise_website import db_sessions
+from tourwise_website import metrics
+from tourwise_website import settings_production
+from tourwise_website.template_warmup import warm_templates
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class EmailOrPhoneBackendTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="login",
+            email="Guest@Example.com",
+            password="password",
+            phone_number="+263 77 123 4567",
+        )
+
+    def test_phone_numbers_normalise_to_e164(self):
+        for number in ["0771234567", "+263 77 123 4567", "771234567", "263-77-123-4567"]:
+            self.assertEqual(normalize_phone_number(number), "+263771234567")
+        self.assertIsNone(normalize_phone_number(""))
+
+    def test_login_ignores_email_case_and_phone_format(self):
+        for username in ["guest@example.com", " GUEST@example.COM", "0771234567", "+263771234567"]:
+            self.assertEqual(authenticate(username=username, password="password"), self.user)
+        self.assertIsNone(authenticate(username="guest@example.com", password="wrong"))
+
+    def test_unknown_user_still_hashes_the_password(self):
+        with patch("django.contrib.auth.hashers.PBKDF2PasswordHasher.encode", autospec=True) as mock_encode:
+            mock_encode.return_value = "pbkdf2_sha256$1$salt$hash"
+            self.assertIsNone(authenticate(username="nobody@example.com", password="password"))
+        mock_encode.assert_called()
+
+    def test_lookup_columns_follow_updates(self):
+        self.user.email = "New@Example.com"
+        self.user.save(update_fields=["email"])
+        self.assertEqual(authenticate(username="new@example.com", password="password"), self.user)
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+    RATE_LIMIT_ENABLED=True,
+    LOGIN_THROTTLE={"free_failures": 3, "ip_free_failures": 10, "base_lockout": 30, "max_lockout": 3600, "window": 3600},
+)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_model().objects.create_user(
+            username="throttled",
+            email="throttled@example.com",
+            password="password",
+        )
+
+    def _login(self, identifier="throttled@example.com", password="wrong", ip="10.0.0.1"):
+        return self.client.post(
+            reverse("login"), {"identifier": identifier, "password": password}, REMOTE_ADDR=ip
+        )
+
+    def test_identifier_is_locked_out_after_repeated_failures(self):
+        for _ in range(3):
+            self.assertEqual(self._login().status_code, 200)
+
+        # Locked out without touching the database or the hasher, even from another IP
+        with self.assertNumQueries(0), patch("accounts.views.authenticate") as mock_authenticate:
+            response = self._login(identifier="THROTTLED@example.com", password="password", ip="10.0.0.2")
+        mock_authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(metrics.snapshot()["login.throttled"], 1)
+
+    def test_lockout_doubles_with_further_failures(self):
+        with patch("accounts.throttling.time.time", return_value=1000.0):
+            for _ in range(3):
+                self._login()
+        with patch("accounts.throttling.time.time", return_value=1031.0):
+            self._login()
+            self.assertEqual(self._login().status_code, 429)
+            self.assertEqual(self._login()["Retry-After"], "60")
+
+    def test_success_resets_the_identifier_counter(self):
+        self._login()
+        self._login()
+        self.assertEqual(self._login(password="password").status_code, 302)
+        self.client.logout()
+        self._login()
+        self._login()
+        self.assertEqual(self._login(password="password").status_code, 302)
+
+    def test_many_identifiers_from_one_ip_lock_the_ip(self):
+        for i in range(10):
+            self._login(identifier=f"user{i}@example.com")
+        self.assertEqual(self._login(identifier="throttled@example.com", password="password").status_code, 429)
+        self.assertEqual(self._login(password="password", ip="10.0.0.9").status_code, 302)
+
+    def test_visitors_behind_the_proxy_are_locked_out_separately(self):
+        proxied = {"REMOTE_ADDR": "127.0.0.1"}
+        for i in range(10):
+            self.client.post(
+                reverse("login"),
+                {"identifier": f"user{i}@example.com", "password": "wrong"},
+                HTTP_X_FORWARDED_FOR="203.0.113.7", **proxied,
+            )
+        response = self.client.post(
+            reverse("login"),
+            {"identifier": "throttled@example.com", "password": "password"},
+            HTTP_X_FORWARDED_FOR="203.0.113.8", **proxied,
+        )
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+    SESSION_ENGINE="tourwise_website.sessions",
+    SESSION_DB_WRITE_INTERVAL=0,
+)
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _session_writes(self, session_key, value):
+        session = SessionStore(session_key)
+        with CaptureQueriesContext(connection) as queries:
+            session["search_location"] = value
+            session.save()
+        return [
+            query["sql"] for query in queries
+            if "django_session" in query["sql"] and query["sql"].lstrip().upper().startswith(("INSERT", "UPDATE"))
+        ]
+
+    def _create(self):
+        session = SessionStore()
+        session["search_location"] = "Harare"
+        session.create()
+        return session.session_key
+
+    def test_unchanged_session_is_not_written_back(self):
+        key = self._create()
+        # Re-storing the same value is read from the cache and skipped
+        with self.assertNumQueries(0):
+            self.assertEqual(self._session_writes(key, "Harare"), [])
+        self.assertEqual(len(self._session_writes(key, "Bulawayo")), 1)
+        self.assertEqual(SessionStore(key)["search_location"], "Bulawayo")
+
+    def test_database_engine_skips_unchanged_writes(self):
+        session = db_sessions.SessionStore()
+        session["search_location"] = "Harare"
+        session.create()
+
+        for value, writes in (("Harare", 0), ("Bulawayo", 1)):
+            session = db_sessions.SessionStore(session.session_key)
+            with CaptureQueriesContext(connection) as queries:
+                session["search_location"] = value
+                session.save()
+            self.assertEqual(sum("django_session" in q["sql"] and "UPDATE" in q["sql"] for q in queries), writes)
+        self.assertEqual(db_sessions.SessionStore(session.session_key)["search_location"], "Bulawayo")
+
+    def test_write_interval_defers_database_writes_to_the_cache(self):
+        key = self._create()
+        self.assertEqual(len(self._session_writes(key, "Bulawayo")), 1)
+        with self.settings(SESSION_DB_WRITE_INTERVAL=60):
+            self.assertEqual(len(self._session_writes(key, "Mutare")), 1)
+            self.assertEqual(self._session_writes(key, "Gweru"), [])
+        self.assertEqual(SessionStore(key)["search_location"], "Gweru")
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class StepSearchTests(TestCase):
+    def test_answers_travel_in_signed_state_without_a_session(self):
+        url = reverse("step_search")
+        response = self.client.get(url, {"step": "2", "location": "Mount Pleasant"})
+        self.assertEqual(response.status_code, 200)
+        state = response.context["state"]
+
+        response = self.client.get(url, {"step": "3", "state": state, "property_type": "house"})
+        self.assertEqual(response.context["saved_location"], "Mount Pleasant")
+        response = self.client.get(url, {"step": "done", "state": response.context["state"], "max_price": "500"})
+        self.assertRedirects(
+            response,
+            f"{reverse('search_results')}?location=Mount+Pleasant&property_type=house&max_price=500",
+            fetch_redirect_response=False,
+        )
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+
+    def test_tampered_state_starts_over(self):
+        response = self.client.get(reverse("step_search"), {"step": "3", "state": "bad:signature"})
+        self.assertRedirects(response, f"{reverse('step_search')}?step=1", fetch_redirect_response=False)
+
+
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    "APP_DIRS": False,
+    "OPTIONS": {
+        **settings.TEMPLATES[0]["OPTIONS"],
+        "loaders": [("django.template.loaders.cached.Loader", [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ])],
+    },
+}]
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+    TEMPLATES=CACHED_TEMPLATES,
+)
+class TemplateWarmupTests(TestCase):
+    def test_warmup_fills_the_cached_loader(self):
+        self.assertGreater(warm_templates(), 0)
+        loader = engines["django"].engine.template_loaders[0]
+        for name in ("base.html", "accounts/home.html", "listings/partials/property_card_grid.html"):
+            self.assertIn(name, loader.get_template_cache)
+
+    @override_settings(TEMPLATES=[{
+        **CACHED_TEMPLATES[0],
+        "OPTIONS": {**CACHED_TEMPLATES[0]["OPTIONS"], "loaders": ["django.template.loaders.filesystem.Loader"]},
+    }])
+    def test_engines_without_a_cached_loader_are_skipped(self):
+        self.assertEqual(warm_templates(), 0)
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+    MIDDLEWARE=settings_production.MIDDLEWARE,
+    STORAGES=settings_production.STORAGES,
+)
+class ProductionStaticFilesTests(TestCase):
+    def test_hashed_assets_are_served_after_collectstatic(self):
+        with tempfile.TemporaryDirectory() as static_root, self.settings(STATIC_ROOT=static_root):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            url = static("css/home.css")
+            self.assertRegex(url, r"^/static/css/home\.[0-9a-f]{12}\.css$")
+
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("max-age=315360000", response["Cache-Control"])
+            self.assertIn(b"zim-property-hero.", b"".join(response.streaming_content))
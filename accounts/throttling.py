@@ -0,0 +1,86 @@
+"""
+Failed-login throttling.
+
+Failures are counted in the Django cache per login identifier (normalised
+like the auth backend does, so 'A@x.com' and 'a@x.com' share a counter)
+and per client IP. Past the free allowance each further failure locks the
+identifier or IP out for exponentially longer. A locked-out attempt is
+rejected with a single cache read, before the user lookup and the password
+hash that make a failed login expensive.
+
+Counters and locks use the ``RATE_LIMIT_ENABLED`` switch and the limits in
+``settings.LOGIN_THROTTLE``.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from tourwise_website import metrics
+from .utils import normalize_email, normalize_phone_number
+
+
+def _identifier(identifier):
+    if '@' in identifier:
+        normalized = normalize_email(identifier)
+    else:
+        normalized = normalize_phone_number(identifier)
+    # Hashed so cache keys never hold raw emails or phone numbers
+    return hashlib.sha256((normalized or identifier).encode('utf-8')).hexdigest()
+
+
+def _scopes(identifier, ip):
+    return {
+        'identifier': _identifier(identifier),
+        'ip': ip or 'unknown',
+    }
+
+
+def _free_failures(scope):
+    config = settings.LOGIN_THROTTLE
+    return config['ip_free_failures'] if scope == 'ip' else config['free_failures']
+
+
+def lockout_remaining(identifier, ip):
+    """
+    Seconds until a login for this identifier from this IP may be tried.
+
+    Returns:
+        int: 0 if not locked out
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return 0
+    keys = [f"login:lock:{scope}:{value}" for scope, value in _scopes(identifier, ip).items()]
+    unlocks = cache.get_many(keys).values()
+    remaining = max(unlocks, default=0) - time.time()
+    return math.ceil(remaining) if remaining > 0 else 0
+
+
+def register_failure(identifier, ip):
+    """Count a failed login and lock out the identifier or IP once past its allowance."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    config = settings.LOGIN_THROTTLE
+    for scope, value in _scopes(identifier, ip).items():
+        key = f"login:fail:{scope}:{value}"
+        cache.add(key, 0, timeout=config['window'])
+        try:
+            failures = cache.incr(key)
+        except ValueError:
+            # Expired between add and incr
+            cache.set(key, 1, timeout=config['window'])
+            failures = 1
+
+        excess = failures - _free_failures(scope)
+        if excess >= 0:
+            lockout = min(config['base_lockout'] * 2 ** excess, config['max_lockout'])
+            cache.set(f"login:lock:{scope}:{value}", time.time() + lockout, timeout=lockout)
+            metrics.increment(f"login.lockout.{scope}")
+
+
+def reset_failures(identifier):
+    """Forget an identifier's failures after a successful login; IP counters are kept."""
+    value = _identifier(identifier)
+    cache.delete_many([f"login:fail:identifier:{value}", f"login:lock:identifier:{value}"])
@@ -0,0 +1,35 @@
+"""
+Normalisation of login identifiers.
+
+Emails and phone numbers are stored as typed, plus a normalised copy in an
+indexed lookup column, so logins match regardless of case or formatting
+with a plain equality lookup.
+"""
+
+
+def normalize_email(email):
+    """Lowercase and strip an email address; None for blank input."""
+    email = (email or '').strip().lower()
+    return email or None
+
+
+def normalize_phone_number(phone_number):
+    """
+    Convert a phone number to E.164, assuming Zimbabwe for local numbers.
+
+    '077 123 4567', '+263 77 123 4567' and '771234567' all become
+    '+263771234567'. Numbers in other formats keep their digits.
+
+    Returns:
+        str: E.164 number, or None if there are no digits
+    """
+    phone = ''.join(filter(str.isdigit, phone_number or ''))
+    if not phone:
+        return None
+    if phone.startswith('263'):
+        pass
+    elif phone.startswith('0'):
+        phone = '263' + phone[1:]
+    elif len(phone) == 9:
+        phone = '263' + phone
+    return f"+{phone}"
@@ -1,8 +1,13 @@
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from listings.models import Property, PropertyImage
+from listings.locations import location_filter
 from django.shortcuts import render, redirect
 from .forms import SignupForm, CustomLoginForm, ProfilePhotoForm
+from .throttling import lockout_remaining, register_failure, reset_failures
+from tourwise_website import metrics
+from tourwise_website.pagecache import cache_page_for_anonymous
+from tourwise_website.ratelimit import client_ip
 from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Value, CharField, Q
@@ -10,6 +15,9 @@ from django.db.models.functions import Concat
 from django.urls import reverse
 from django.conf import settings
 from django.contrib import messages
+from django.core import signing
+from urllib.parse import urlencode
+import math
 
 
 def signup_view(request):
@@ -46,9 +54,20 @@ def login_view(request):
     if request.method == 'POST' and form.is_valid():
         identifier = form.cleaned_data['identifier']
         password = form.cleaned_data['password']
+        ip = client_ip(request)
+
+        # Rejected before the user lookup and password hash
+        retry_after = lockout_remaining(identifier, ip)
+        if retry_after:
+            metrics.increment('login.throttled')
+            error = f"Too many failed login attempts. Please try again in {math.ceil(retry_after / 60)} minute(s)."
+            response = render(request, 'accounts/login.html', {'form': form, 'error': error, 'next': next_url}, status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
 
         user = authenticate(request, username=identifier, password=password)
         if user is not None:
+            reset_failures(identifier)
             login(request, user)
             if next_url:
                 return redirect(next_url)
@@ -56,6 +75,8 @@ def login_view(request):
                 return redirect('host_dashboard')
             return redirect('home')
         else:
+            register_failure(identifier, ip)
+            metrics.increment('login.failed')
             error = "Invalid login credentials."
 
     return render(request, 'accounts/login.html', {'form': form, 'error': error, 'next': next_url})
@@ -67,6 +88,7 @@ def logout_view(request):
     return redirect('home')
 
 
+@cache_page_for_anonymous(tags=('listings',))
 def home_view(request):
     two_weeks_ago = timezone.now() - timedelta(days=14)
 
@@ -131,6 +153,7 @@ def host_dashboard(request):
     })
 
 
+@cache_page_for_anonymous(tags=('listings',), params=('location', 'property_type', 'max_price'))
 def search_results_view(request):
     """
     Simplified search with combined filters for location, property type, and max price
@@ -153,11 +176,9 @@ def search_results_view(request):
     # Build base filter (must be paid)
     filters = Q(is_paid=True)
 
-    # Add location filter (suburb AND city, or just city)
-    if suburb and city:
-        filters &= (Q(suburb__iexact=suburb) & Q(city__iexact=city))
-    elif city:
-        filters &= Q(city__iexact=city)
+    # Add location filter (suburb AND city, or just city), resolved to stored values
+    if suburb or city:
+        filters &= location_filter(suburb, city)
     # Add property type filter
     if property_type:
         filters &= Q(property_type=property_type)
@@ -215,50 +236,56 @@ def become_host_view(request):
         return render(request, 'accounts/become_host.html', {'form': form, 'is_editing': False})
 
 
+# Step search answers travel between steps in this signed query parameter
+STEP_SEARCH_SIGNER = signing.Signer(salt='accounts.step_search')
+STEP_SEARCH_FIELDS = ('location', 'property_type')
+
+
+def _load_step_search_state(request):
+    try:
+        state = STEP_SEARCH_SIGNER.unsign_object(request.GET.get('state', ''))
+    except signing.BadSignature:
+        return {}
+    return {field: state[field] for field in STEP_SEARCH_FIELDS if isinstance(state.get(field), str)}
+
+
 def step_search_view(request):
-    """Step-by-step search flow"""
-    step = request.GET.get('step', '1')
+    """
+    Step-by-step search flow.
 
-    if request.method == 'POST':
-        if step == '1':
-            # Step 1: Location
-            location = request.POST.get('location')
-            if location:
-                request.session['search_location'] = location
-                return redirect(f'{reverse("step_search")}?step=2')
-        elif step == '2':
-            # Step 2: Property Type
-            property_type = request.POST.get('property_type')
-            if property_type:
-                request.session['search_property_type'] = property_type
-                return redirect(f'{reverse("step_search")}?step=3')
-        elif step == '3':
-            # Step 3: Max Price (optional)
-            max_price = request.POST.get('max_price')
-            location = request.session.get('search_location', '')
-            property_type = request.session.get('search_property_type', '')
-
-            # Build search URL
-            search_url = reverse('search_results') + f'?location={location}'
-            if property_type:
-                search_url += f'&property_type={property_type}'
-            if max_price:
-                search_url += f'&max_price={max_price}'
-
-            # Clear session
-            request.session.pop('search_location', None)
-            request.session.pop('search_property_type', None)
-
-            return redirect(search_url)
-
-    # Get saved values from session
-    saved_location = request.session.get('search_location', '')
-    saved_property_type = request.session.get('search_property_type', '')
+    Each step's form submits by GET to the next step, carrying the earlier
+    answers in a signed ``state`` parameter rather than the session, so
+    the flow writes nothing server-side and every step is a plain,
+    cacheable URL. The last step redirects to search_results.
+    """
+    step = request.GET.get('step', '1')
+    state = _load_step_search_state(request)
+    # Answer submitted from the previous step
+    for field in STEP_SEARCH_FIELDS:
+        value = request.GET.get(field, '').strip()
+        if value:
+            state[field] = value
+
+    if step == 'done':
+        params = {'location': state.get('location', '')}
+        if state.get('property_type'):
+            params['property_type'] = state['property_type']
+        max_price = request.GET.get('max_price', '').strip()
+        if max_price:
+            params['max_price'] = max_price
+        return redirect(f"{reverse('search_results')}?{urlencode(params)}")
+
+    signed_state = STEP_SEARCH_SIGNER.sign_object(state) if state else ''
+    if step in ('2', '3') and not state.get('location'):
+        return redirect(f'{reverse("step_search")}?step=1')
+    if step == '3' and not state.get('property_type'):
+        return redirect(f'{reverse("step_search")}?{urlencode({"step": 2, "state": signed_state})}')
 
     context = {
         'step': step,
-        'saved_location': saved_location,
-        'saved_property_type': saved_property_type,
+        'state': signed_state,
+        'saved_location': state.get('location', ''),
+        'saved_property_type': state.get('property_type', ''),
     }
 
     return render(request, 'accounts/step_search.html', context)
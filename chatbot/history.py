@@ -0,0 +1,174 @@
+"""
+Server-side conversation store for the chatbot.
+
+The session only carries a conversation id. Messages are appended to the
+ChatMessage table and the recent window is mirrored in the cache, so a chat
+turn costs an indexed MAX(seq) and one small INSERT instead of rewriting
+the whole session row.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+
+from .models import ChatMessage
+
+SESSION_KEY = 'chat_conversation_id'
+
+# Number of messages kept per conversation (5 exchanges)
+RING_SIZE = 10
+
+# Budget for history handed back to the LLM, and the per-message clip length
+HISTORY_TOKEN_BUDGET = 600
+MAX_MESSAGE_CHARS = 600
+
+CONVERSATION_CACHE_TIMEOUT = 60 * 60 * 2
+
+# Attempts at claiming the next seq when another worker appends concurrently
+APPEND_ATTEMPTS = 3
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, len(text) // 4)
+
+
+def get_conversation_id(request):
+    """Return the conversation id stored in the session, or None."""
+    return request.session.get(SESSION_KEY)
+
+
+def start_conversation(request):
+    """Create a new conversation id and store it in the session."""
+    conversation_id = str(uuid.uuid4())
+    request.session[SESSION_KEY] = conversation_id
+    return conversation_id
+
+
+def _cache_key(conversation_id):
+    return f"chatbot:conversation:{conversation_id}"
+
+
+def _clip(content):
+    if len(content) <= MAX_MESSAGE_CHARS:
+        return content
+    return content[:MAX_MESSAGE_CHARS - 3].rstrip() + '...'
+
+
+def _load_window(conversation_id):
+    window = cache.get(_cache_key(conversation_id))
+    if window is not None:
+        return window
+
+    rows = list(
+        ChatMessage.objects.filter(conversation_id=conversation_id)
+        .order_by('-seq')
+        .values('seq', 'role', 'content', 'filters')[:RING_SIZE]
+    )
+    rows.reverse()
+    window = {
+        'seq': rows[-1]['seq'] if rows else 0,
+        'messages': [{'role': row['role'], 'content': row['content']} for row in rows],
+        'filters': next((row['filters'] for row in reversed(rows) if row['filters']), None),
+    }
+    cache.set(_cache_key(conversation_id), window, CONVERSATION_CACHE_TIMEOUT)
+    return window
+
+
+def truncate_to_token_budget(messages, budget=HISTORY_TOKEN_BUDGET):
+    """
+    Keep the most recent messages that fit within a token budget.
+
+    Args:
+        messages: List of {"role": ..., "content": ...} dicts, oldest first
+        budget: Maximum estimated tokens across the returned messages
+
+    Returns:
+        list: The newest messages that fit, oldest first
+    """
+    kept = []
+    used = 0
+    for message in reversed(messages):
+        cost = estimate_tokens(message['content'])
+        if used + cost > budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    return kept
+
+
+def load_history(conversation_id, budget=HISTORY_TOKEN_BUDGET):
+    """
+    Load recent messages for a conversation, trimmed to a token budget.
+
+    Args:
+        conversation_id: Conversation id from the session (may be None)
+        budget: Maximum estimated tokens of history to return
+
+    Returns:
+        list: [{"role": "user/assistant", "content": "..."}], oldest first
+    """
+    if not conversation_id:
+        return []
+    return truncate_to_token_budget(_load_window(conversation_id)['messages'], budget)
+
+
+def load_filters(conversation_id):
+    """Return the filters extracted on the most recent search turn, or None."""
+    if not conversation_id:
+        return None
+    return _load_window(conversation_id)['filters']
+
+
+def append_turn(conversation_id, user_message, assistant_message, filters=None):
+    """
+    Append one user/assistant exchange to a conversation.
+
+    ``filters`` are the search filters extracted for this turn; when given
+    they replace the conversation's carried-forward filter state.
+
+    The next seq comes from the table, not the cached window, which may be
+    stale when another worker served the previous turn. Two concurrent
+    appends claiming the same seq hit the unique constraint and the loser
+    retries on the next free seq. Older messages beyond the ring size are
+    pruned in a single range delete each time the sequence wraps past
+    another ring.
+    """
+    window = _load_window(conversation_id)
+    new_messages = [
+        {'role': 'user', 'content': _clip(user_message)},
+        {'role': 'assistant', 'content': _clip(assistant_message)},
+    ]
+
+    for attempt in range(APPEND_ATTEMPTS):
+        seq = ChatMessage.objects.filter(conversation_id=conversation_id).aggregate(seq=Max('seq'))['seq'] or 0
+        try:
+            with transaction.atomic():
+                ChatMessage.objects.bulk_create([
+                    ChatMessage(conversation_id=conversation_id, seq=seq + 1, **new_messages[0]),
+                    ChatMessage(conversation_id=conversation_id, seq=seq + 2, filters=filters or None, **new_messages[1]),
+                ])
+            break
+        except IntegrityError:
+            if attempt == APPEND_ATTEMPTS - 1:
+                raise
+    new_seq = seq + len(new_messages)
+
+    if new_seq // RING_SIZE != seq // RING_SIZE:
+        ChatMessage.objects.filter(
+            conversation_id=conversation_id, seq__lte=new_seq - RING_SIZE
+        ).delete()
+
+    if seq != window['seq']:
+        # The cached window missed turns stored by another worker; rebuild it on next read
+        cache.delete(_cache_key(conversation_id))
+        return
+
+    window = {
+        'seq': new_seq,
+        'messages': (window['messages'] + new_messages)[-RING_SIZE:],
+        'filters': filters or window['filters'],
+    }
+    cache.set(_cache_key(conversation_id), window, CONVERSATION_CACHE_TIMEOUT)
@@ -0,0 +1,179 @@
+"""
+Django management command to benchmark the chatbot endpoint
+Run with: python manage.py benchmark_chatbot --concurrency 1 4 16 --requests 200
+
+Creates a throwaway test database, seeds it with paid listings, starts a
+stub Groq-compatible server (chatbot/stub_llm.py) and drives
+chatbot_query_view at each concurrency level, reporting latency
+percentiles, DB queries, session writes and LLM calls per request.
+
+Pass several --session-engines to compare session queries and writes, e.g.
+--session-engines django.contrib.sessions.backends.db tourwise_website.sessions
+"""
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.urls import reverse
+
+from chatbot.stub_llm import DEFAULT_RESPONSES, StubLLMServer
+from listings.models import Property
+
+SEED_LOCATIONS = [
+    ('Borrowdale', 'Harare'), ('Avondale', 'Harare'), ('Mount Pleasant', 'Harare'),
+    ('Greendale', 'Harare'), ('Hillside', 'Bulawayo'), ('Suburbs', 'Bulawayo'),
+    ('Mkhosana', 'Victoria Falls'), ('Chitungwiza', 'Chitungwiza'),
+]
+SEED_TYPES = ['house', 'apartment', 'airbnb', 'room', 'guesthouse']
+
+
+class QueryCounter:
+    """Per-thread counter installed with connection.execute_wrapper."""
+
+    def __init__(self):
+        self.queries = 0
+        self.session_writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        statement = sql.lstrip().upper()
+        if 'DJANGO_SESSION' in statement and statement.startswith(('INSERT', 'UPDATE')):
+            self.session_writes += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark chatbot_query_view against a stub LLM server at increasing concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='Concurrency levels to run')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per concurrency level')
+        parser.add_argument('--listings', type=int, default=500, help='Paid listings to seed')
+        parser.add_argument('--llm-latency-ms', type=float, default=300, help='Stub LLM response delay')
+        parser.add_argument('--llm-jitter-ms', type=float, default=50, help='Random extra stub delay')
+        parser.add_argument('--turns', type=int, default=3, help='Messages per simulated conversation')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--session-engines', nargs='+', default=[settings.SESSION_ENGINE],
+                            help='SESSION_ENGINE values to compare')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        stub = StubLLMServer(latency_ms=options['llm_latency_ms'], jitter_ms=options['llm_jitter_ms']).start()
+        original_base_url, original_key = settings.GROQ_BASE_URL, settings.GROQ_API_KEY
+        original_rate_limit = settings.RATE_LIMIT_ENABLED
+        original_session_engine = settings.SESSION_ENGINE
+        settings.GROQ_BASE_URL, settings.GROQ_API_KEY = stub.base_url, 'benchmark'
+        # Every simulated client shares one IP, so throttling would measure the limiter instead
+        settings.RATE_LIMIT_ENABLED = False
+
+        try:
+            self._seed(options['listings'])
+            self.stdout.write(
+                f"Seeded {options['listings']} listings; stub LLM at {stub.base_url} "
+                f"({options['llm_latency_ms']:.0f}ms ± {options['llm_jitter_ms']:.0f}ms)\n"
+            )
+            for engine in options['session_engines']:
+                # Each simulated client builds its own handler, so it picks this up
+                settings.SESSION_ENGINE = engine
+                self.stdout.write(f"SESSION_ENGINE = {engine}")
+                self.stdout.write(
+                    f"{'conc':>5} {'reqs':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                    f"{'db q/req':>9} {'sess w/req':>10} {'llm/req':>8} {'errors':>7}"
+                )
+                for concurrency in options['concurrency']:
+                    cache.clear()
+                    self._report(concurrency, self._run_level(stub, concurrency, options))
+        finally:
+            settings.GROQ_BASE_URL, settings.GROQ_API_KEY = original_base_url, original_key
+            settings.RATE_LIMIT_ENABLED = original_rate_limit
+            settings.SESSION_ENGINE = original_session_engine
+            stub.stop()
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+    def _seed(self, count):
+        owner = get_user_model().objects.create_user(
+            username='benchmark', email='benchmark@example.com', password='benchmark'
+        )
+        properties = []
+        for i in range(count):
+            suburb, city = random.choice(SEED_LOCATIONS)
+            properties.append(Property(
+                owner=owner,
+                title=f"Benchmark listing {i}",
+                property_type=random.choice(SEED_TYPES),
+                suburb=suburb,
+                city=city,
+                bedrooms=random.randint(1, 6),
+                bathrooms=random.randint(1, 4),
+                price=random.randrange(100, 5000, 50),
+                listing_type=random.choice(['normal', 'normal', 'priority']),
+                is_paid=True,
+            ))
+        Property.objects.bulk_create(properties)
+
+    def _run_level(self, stub, concurrency, options):
+        messages = list(DEFAULT_RESPONSES)
+        url = reverse('chatbot:chatbot_query')
+        lock = threading.Lock()
+        results = []
+        calls_before = stub.calls
+
+        def conversation(requests):
+            client = Client()
+            counter = QueryCounter()
+            samples = []
+            with connection.execute_wrapper(counter):
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    response = client.post(url, {'message': random.choice(messages)}, content_type='application/json')
+                    samples.append(((time.perf_counter() - started) * 1000, response.status_code == 200))
+            connections.close_all()
+            with lock:
+                results.append((samples, counter))
+
+        total = options['requests']
+        turns = max(1, options['turns'])
+        chunks = [min(turns, total - start) for start in range(0, total, turns)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(conversation, chunks))
+        elapsed = time.perf_counter() - started
+
+        samples = [sample for batch, _ in results for sample in batch]
+        return {
+            'concurrency': concurrency,
+            'requests': len(samples),
+            'elapsed': elapsed,
+            'latencies': [latency for latency, _ in samples],
+            'errors': sum(1 for _, ok in samples if not ok),
+            'queries': sum(counter.queries for _, counter in results),
+            'session_writes': sum(counter.session_writes for _, counter in results),
+            'llm_calls': stub.calls - calls_before,
+        }
+
+    def _report(self, concurrency, result):
+        requests = result['requests'] or 1
+        latencies = sorted(result['latencies']) or [0.0]
+        if len(latencies) > 1:
+            cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = latencies[0]
+        self.stdout.write(
+            f"{concurrency:>5} {result['requests']:>6} {result['requests'] / result['elapsed']:>8.1f} "
+            f"{p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {result['queries'] / requests:>9.2f} "
+            f"{result['session_writes'] / requests:>10.2f} {result['llm_calls'] / requests:>8.2f} {result['errors']:>7}"
+        )
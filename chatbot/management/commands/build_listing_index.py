@@ -0,0 +1,55 @@
+"""
+Django management command to build the chatbot's semantic listing index
+Run with: python manage.py build_listing_index
+"""
+import time
+
+import numpy as np
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.semantic import embed_documents, get_index, listing_document
+from listings.models import Property
+
+
+class Command(BaseCommand):
+    help = 'Embed all paid listings into the memory-mapped vector index used by the chatbot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=64, help='Listings embedded per model call')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        batch_size = options['batch_size']
+
+        properties = Property.objects.filter(is_paid=True).prefetch_related('amenities').order_by('pk')
+        ids = []
+        batches = []
+        batch = []
+        for prop in properties.iterator(chunk_size=batch_size):
+            ids.append(prop.pk)
+            batch.append(listing_document(prop))
+            if len(batch) == batch_size:
+                batches.append(self._embed(batch))
+                batch = []
+        if batch:
+            batches.append(self._embed(batch))
+
+        if not ids:
+            self.stdout.write(self.style.WARNING("No paid listings to index."))
+            return
+
+        vectors = np.vstack(batches)
+        get_index().build(ids, vectors, settings.CHATBOT_EMBEDDING_MODEL)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(ids)} listings ({vectors.shape[1]} dims) into {settings.CHATBOT_VECTOR_INDEX_DIR} in {elapsed:.1f}s"
+        ))
+
+    def _embed(self, texts):
+        vectors = embed_documents(texts)
+        if vectors is None:
+            raise CommandError("Embedding model unavailable: install llama-index-embeddings-huggingface")
+        return vectors
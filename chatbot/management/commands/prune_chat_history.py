@@ -0,0 +1,22 @@
+"""
+Django management command to delete old chatbot messages
+Run with: python manage.py prune_chat_history --days 30
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chatbot.models import ChatMessage
+
+
+class Command(BaseCommand):
+    help = 'Delete chatbot messages older than the given number of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Age in days after which messages are deleted')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = ChatMessage.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} chat messages older than {options['days']} days."))
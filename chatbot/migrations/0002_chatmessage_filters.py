@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chatbot", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatmessage",
+            name="filters",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
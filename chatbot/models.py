@@ -1,3 +1,35 @@
 from django.db import models
 
-# Create your models here.
+
+class ChatMessage(models.Model):
+    """
+    One message in a chatbot conversation.
+
+    Rows are only ever inserted; each conversation keeps a bounded ring of
+    recent messages and older rows are pruned in ranges, so chat traffic no
+    longer rewrites the session row on every message.
+    """
+    ROLE_CHOICES = [
+        ('user', 'User'),
+        ('assistant', 'Assistant'),
+    ]
+
+    conversation_id = models.UUIDField()
+    seq = models.PositiveIntegerField()
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    content = models.TextField()
+    # Filters extracted for this turn (assistant messages only), carried into the next prompt
+    filters = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['conversation_id', 'seq']
+        constraints = [
+            models.UniqueConstraint(fields=['conversation_id', 'seq'], name='chatbot_message_conversation_seq'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='chatbot_message_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.conversation_id} #{self.seq} ({self.role})"
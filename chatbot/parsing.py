@@ -0,0 +1,213 @@
+"""
+Tolerant parsing and validation of LLM filter output.
+
+The model is asked for a bare JSON object, but replies can still arrive
+fenced, wrapped in prose, cut off by max_tokens, or with values such as
+"1k" or "3 bedrooms". Everything here is local and cheap, so a slightly
+malformed reply still yields usable filters instead of another LLM call.
+"""
+import json
+import re
+
+from listings.models import Property
+
+PROPERTY_TYPES = {choice for choice, _ in Property.PROPERTY_TYPE_CHOICES}
+
+PROPERTY_TYPE_ALIASES = {
+    'houses': 'house',
+    'home': 'house',
+    'homes': 'house',
+    'cottage': 'house',
+    'apartments': 'apartment',
+    'flat': 'apartment',
+    'flats': 'apartment',
+    'air bnb': 'airbnb',
+    'bnb': 'airbnb',
+    'rooms': 'room',
+    'guest house': 'guesthouse',
+    'guesthouses': 'guesthouse',
+    'lodge': 'guesthouse',
+}
+
+# (kind, minimum, maximum) for numeric filters
+NUMERIC_FILTERS = {
+    'bedrooms': ('int', 0, 20),
+    'bathrooms': ('int', 0, 20),
+    'min_price': ('number', 0, 10_000_000),
+    'max_price': ('number', 0, 10_000_000),
+    'min_area': ('number', 0, 1_000_000),
+    'max_area': ('number', 0, 1_000_000),
+}
+
+# Free-text filters and their maximum length
+TEXT_FILTERS = {
+    'city': 100,
+    'suburb': 100,
+    'keywords': 200,
+}
+
+# Filters understood by query_properties, in canonical order
+FILTER_KEYS = (
+    'property_type', 'bedrooms', 'bathrooms', 'city', 'suburb',
+    'min_price', 'max_price', 'min_area', 'max_area', 'keywords',
+)
+
+_MULTIPLIERS = {'k': 1_000, 'm': 1_000_000}
+_NUMBER_RE = re.compile(r'(-?\d+(?:\.\d+)?)\s*([km])?\b', re.IGNORECASE)
+_PAIR_RE = re.compile(r'"(\w+)"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?|true|false|null)')
+_EMPTY_TEXT = {'', 'any', 'none', 'null', 'n/a', 'unknown'}
+
+
+def _find_object(content):
+    """Return the first {...} block in content, or its unterminated tail."""
+    fenced = re.search(r'```(?:json)?\s*(.*?)(?:```|$)', content, re.DOTALL)
+    if fenced and '{' in fenced.group(1):
+        content = fenced.group(1)
+
+    start = content.find('{')
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(content)):
+        char = content[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return content[start:index + 1]
+    return content[start:]
+
+
+def _repair(text):
+    """Fix the usual near-JSON mistakes: trailing commas, Python literals, single quotes."""
+    text = re.sub(r',\s*([}\]])', r'\1', text)
+    text = re.sub(r'\bTrue\b', 'true', text)
+    text = re.sub(r'\bFalse\b', 'false', text)
+    text = re.sub(r'\bNone\b', 'null', text)
+    if '"' not in text:
+        text = text.replace("'", '"')
+    return text
+
+
+def parse_llm_json(content):
+    """
+    Parse a JSON object out of an LLM reply, recovering what it can.
+
+    Tries a strict parse first, then a repaired parse, then falls back to
+    salvaging complete "key": value pairs (e.g. from a truncated reply).
+
+    Args:
+        content: Raw message content from the model
+
+    Returns:
+        dict: Parsed object, or {} if nothing usable was found
+    """
+    if not content:
+        return {}
+
+    text = _find_object(content.strip())
+    if text is None:
+        return {}
+
+    for candidate in (text, _repair(text)):
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        return parsed if isinstance(parsed, dict) else {}
+
+    salvaged = {}
+    for key, raw_value in _PAIR_RE.findall(_repair(text)):
+        try:
+            salvaged[key] = json.loads(raw_value)
+        except json.JSONDecodeError:
+            continue
+    return salvaged
+
+
+def coerce_number(value):
+    """
+    Coerce loose numeric values ("1k", "$1,500", "3 bedrooms", 2.0) to a number.
+
+    Returns:
+        int, float or None
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        number = value
+    else:
+        match = _NUMBER_RE.search(str(value).replace(',', ''))
+        if not match:
+            return None
+        number = float(match.group(1)) * _MULTIPLIERS.get((match.group(2) or '').lower(), 1)
+    if isinstance(number, float) and number.is_integer():
+        number = int(number)
+    return number
+
+
+def _coerce_property_type(value):
+    if not isinstance(value, str):
+        return None
+    value = ' '.join(value.lower().split())
+    value = PROPERTY_TYPE_ALIASES.get(value, value)
+    return value if value in PROPERTY_TYPES else None
+
+
+def validate_filters(raw):
+    """
+    Validate and normalize extracted filters.
+
+    Unknown keys are dropped, values are coerced to the expected types and
+    clamped to sane ranges, and inverted min/max pairs are swapped.
+
+    Args:
+        raw: Parsed JSON object from the model
+
+    Returns:
+        dict: Clean filters, {"query_type": "conversation"}, or {}
+    """
+    if not isinstance(raw, dict):
+        return {}
+    if raw.get('query_type') == 'conversation':
+        return {'query_type': 'conversation'}
+
+    filters = {}
+
+    property_type = _coerce_property_type(raw.get('property_type'))
+    if property_type:
+        filters['property_type'] = property_type
+
+    for key, (kind, minimum, maximum) in NUMERIC_FILTERS.items():
+        number = coerce_number(raw.get(key))
+        if number is None:
+            continue
+        number = min(max(number, minimum), maximum)
+        filters[key] = int(round(number)) if kind == 'int' else number
+
+    for key, max_length in TEXT_FILTERS.items():
+        value = raw.get(key)
+        if not isinstance(value, str):
+            continue
+        value = ' '.join(value.split())[:max_length]
+        if value.lower() not in _EMPTY_TEXT:
+            filters[key] = value
+
+    for low, high in (('min_price', 'max_price'), ('min_area', 'max_area')):
+        if low in filters and high in filters and filters[low] > filters[high]:
+            filters[low], filters[high] = filters[high], filters[low]
+
+    return filters
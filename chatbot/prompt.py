@@ -0,0 +1,100 @@
+"""
+Prompt construction for chatbot filter extraction.
+
+A prompt is the system prompt, the conversation's current search filters
+and the current query; earlier turns are not replayed, since the filter
+state already carries what they asked for. The immediately preceding user
+message is only added when there is no filter state to resolve a
+reference against ("cheaper ones" after a turn that found nothing to
+filter) and it fits the token budget.
+"""
+import json
+import re
+
+from .history import estimate_tokens
+
+SYSTEM_PROMPT = """You are a helpful real estate assistant for properties in Zimbabwe. Your job is to extract search parameters from user queries.
+
+IMPORTANT: Return ONLY a valid JSON object. Do not include any explanatory text before or after the JSON.
+
+Return a JSON object with these fields (all optional):
+{
+  "property_type": "house|apartment|airbnb|room|guesthouse",
+  "bedrooms": number (minimum bedrooms required),
+  "bathrooms": number (minimum bathrooms required),
+  "city": "string",
+  "suburb": "string",
+  "min_price": number,
+  "max_price": number,
+  "min_area": number,
+  "max_area": number,
+  "keywords": "string (other wishes not covered above, e.g. quiet, near good schools, borehole)"
+}
+
+Examples:
+- "3 bedroom house in Harare under $1000" -> {"property_type": "house", "bedrooms": 3, "city": "Harare", "max_price": 1000}
+- "apartment in Borrowdale" -> {"property_type": "apartment", "suburb": "Borrowdale"}
+- "show me cheaper ones" (in context) -> {"max_price": <adjusted value based on context>}
+- "houses with 2 bathrooms" -> {"property_type": "house", "bathrooms": 2}
+- "quiet family home near good schools with borehole" -> {"property_type": "house", "keywords": "quiet family home near good schools, borehole"}
+
+If current search filters are provided and the user refines the search, return the complete updated set of filters.
+If the user asks a general question or makes conversation without search intent, return: {"query_type": "conversation"}
+If no filters can be extracted, return: {}"""
+
+# Largest response the schema allows; used to cap completion tokens
+_LARGEST_RESPONSE = json.dumps({
+    'property_type': 'guesthouse',
+    'bedrooms': 10,
+    'bathrooms': 10,
+    'city': 'x' * 32,
+    'suburb': 'x' * 32,
+    'min_price': 1000000,
+    'max_price': 1000000,
+    'min_area': 100000,
+    'max_area': 100000,
+    'keywords': 'x' * 200,
+}, indent=2)
+
+# Headroom for code fences or stray whitespace around the JSON object
+MAX_COMPLETION_TOKENS = estimate_tokens(_LARGEST_RESPONSE) * 2
+
+# Total input budget, of which the system prompt is always spent first
+PROMPT_TOKEN_BUDGET = 900
+
+# Words that make a query depend on an earlier one ("show me cheaper ones")
+REFERENCE_PATTERN = re.compile(
+    r"\b(it|its|they|them|those|these|that|ones?|same|more|less|other|another|instead|"
+    r"cheaper|bigger|smaller|larger|closer)\b",
+    re.IGNORECASE,
+)
+
+
+def build_messages(user_query, conversation_history, previous_filters=None, budget=PROMPT_TOKEN_BUDGET):
+    """
+    Build the message list for a filter extraction call.
+
+    Args:
+        user_query: The user's current message
+        conversation_history: Previous messages, oldest first
+        previous_filters: Filters extracted on the previous search turn, if any
+        budget: Maximum estimated prompt tokens
+
+    Returns:
+        tuple: (messages, estimated prompt tokens)
+    """
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if previous_filters:
+        messages.append({
+            "role": "system",
+            "content": f"Current search filters: {json.dumps(previous_filters, sort_keys=True)}",
+        })
+    used = sum(estimate_tokens(m["content"]) for m in messages) + estimate_tokens(user_query)
+
+    if not previous_filters and REFERENCE_PATTERN.search(user_query):
+        previous = next((m for m in reversed(conversation_history) if m["role"] == "user"), None)
+        if previous and used + estimate_tokens(previous["content"]) <= budget:
+            messages.append({"role": "user", "content": previous["content"]})
+            used += estimate_tokens(previous["content"])
+
+    return messages + [{"role": "user", "content": user_query}], used
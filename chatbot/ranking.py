@@ -0,0 +1,73 @@
+"""
+Relevance ranking for chatbot search results.
+
+The score is computed in SQL so Postgres can return the top N directly:
+priority listings get a boost, listings closer to the requested price and
+bedroom count score higher, and recent listings are weighted up. Ties fall
+back to newest first so results are deterministic.
+"""
+from datetime import timedelta
+
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Abs, Cast, Coalesce, Greatest
+from django.utils import timezone
+
+PRIORITY_WEIGHT = 1.0
+PRICE_WEIGHT = 1.0
+BEDROOMS_WEIGHT = 1.0
+RECENCY_WEIGHT = 0.5
+
+# (age in days, recency score) buckets; older listings score 0
+RECENCY_BUCKETS = ((7, 1.0), (30, 0.5))
+
+
+def _target_price(filters):
+    min_price, max_price = filters.get('min_price'), filters.get('max_price')
+    if min_price and max_price:
+        return (min_price + max_price) / 2
+    return max_price or min_price
+
+
+def relevance_score(filters):
+    """
+    Build the SQL relevance expression for a set of filters.
+
+    Args:
+        filters: Canonical chatbot filters
+
+    Returns:
+        Expression: Float score, higher is more relevant
+    """
+    score = Case(
+        When(listing_type='priority', then=Value(PRIORITY_WEIGHT)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+    target_price = _target_price(filters)
+    if target_price:
+        target = Value(float(target_price))
+        price = Cast('price', FloatField())
+        closeness = Greatest(Value(0.0), Value(1.0) - Abs(price - target) / target)
+        score = score + Coalesce(closeness, Value(0.0)) * Value(PRICE_WEIGHT)
+
+    if filters.get('bedrooms'):
+        # Filtered to bedrooms >= requested, so the gap is never negative
+        extra_bedrooms = Cast(F('bedrooms') - Value(int(filters['bedrooms'])), FloatField())
+        score = score + Value(BEDROOMS_WEIGHT) / (Value(1.0) + Abs(extra_bedrooms))
+
+    now = timezone.now()
+    recency = Case(
+        *[
+            When(created_at__gte=now - timedelta(days=days), then=Value(bucket_score))
+            for days, bucket_score in RECENCY_BUCKETS
+        ],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return score + recency * Value(RECENCY_WEIGHT)
+
+
+def rank_properties(queryset, filters):
+    """Annotate and order a Property queryset by relevance to the filters."""
+    return queryset.annotate(relevance=relevance_score(filters)).order_by('-relevance', '-created_at', '-pk')
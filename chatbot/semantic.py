@@ -0,0 +1,343 @@
+"""
+Local semantic search over paid listings.
+
+Listing text (title, type, description, amenities, suburb, city) is embedded
+with a local CPU HuggingFace model through llama-index. Normalized vectors
+are stored as a memory-mapped NumPy matrix so every worker shares the same
+pages, and search is a dot product over the rows that survive the
+structured filters.
+
+The index is built offline with ``python manage.py build_listing_index``
+and kept current by the ``dispatch_outbox`` command, which re-embeds
+changed listings in batches, so no request ever waits on the model. Writers
+hold an exclusive file lock, so several dispatchers (or a rebuild) never
+claim the same slot. If the embedding dependencies or the index files are
+missing, or a candidate listing has not been embedded yet, semantic ranking
+is skipped and the chatbot falls back to structured filtering only.
+"""
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = 'vectors.npy'
+IDS_FILE = 'ids.npy'
+META_FILE = 'meta.json'
+LOCK_FILE = 'index.lock'
+
+EMPTY_ID = -1
+MIN_CAPACITY = 256
+
+_embedder = None
+_embedder_lock = threading.Lock()
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_embedder():
+    """Return the shared embedding model, or None if llama-index is unavailable."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                try:
+                    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+                except ImportError:
+                    logger.warning("llama-index-embeddings-huggingface is not installed; semantic search disabled")
+                    _embedder = False
+                else:
+                    _embedder = HuggingFaceEmbedding(model_name=settings.CHATBOT_EMBEDDING_MODEL, device='cpu')
+    return _embedder or None
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def embed_documents(texts):
+    embedder = get_embedder()
+    if embedder is None:
+        return None
+    return _normalize(embedder.get_text_embedding_batch(list(texts)))
+
+
+def embed_query(text):
+    embedder = get_embedder()
+    if embedder is None:
+        return None
+    return _normalize(embedder.get_query_embedding(text))
+
+
+def listing_document(prop):
+    """Text embedded for a listing."""
+    amenities = ', '.join(amenity.name for amenity in prop.amenities.all())
+    parts = [
+        prop.title,
+        prop.get_property_type_display() or '',
+        prop.description or '',
+        f"Amenities: {amenities}" if amenities else '',
+        f"Located in {prop.suburb}, {prop.city}" if prop.suburb else f"Located in {prop.city}",
+    ]
+    return '\n'.join(part for part in parts if part)
+
+
+class ListingVectorIndex:
+    """
+    Memory-mapped matrix of listing embeddings keyed by property id.
+
+    ``vectors.npy`` holds one normalized row per slot, ``ids.npy`` maps slots
+    to property ids (-1 marks a free slot) and ``meta.json`` records the
+    model, dimension and number of used slots. Rows are updated in place;
+    the matrix only gets rewritten when it has to grow.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self.vectors = None
+        self.ids = None
+        self.meta = None
+        self.rows = {}
+
+    def exists(self):
+        return (self.path / META_FILE).exists()
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialise writers across threads and processes."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path / LOCK_FILE, 'a+b') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def covers(self, property_ids):
+        """Whether every one of these listings has an embedding."""
+        with self._lock:
+            if not self._refresh():
+                return False
+            rows = self.rows
+        return all(pid in rows for pid in property_ids)
+
+    def _refresh(self):
+        """(Re)load the index if another process has rewritten it."""
+        try:
+            mtime = os.stat(self.path / META_FILE).st_mtime_ns
+        except FileNotFoundError:
+            self.vectors = None
+            return False
+        if mtime != self._loaded_mtime:
+            self.meta = json.loads((self.path / META_FILE).read_text())
+            self.vectors = np.load(self.path / VECTORS_FILE, mmap_mode='r')
+            self.ids = np.load(self.path / IDS_FILE)
+            self.rows = {int(pid): row for row, pid in enumerate(self.ids[:self.meta['count']]) if pid != EMPTY_ID}
+            self._loaded_mtime = mtime
+        return True
+
+    def _write_meta(self):
+        tmp = self.path / f"{META_FILE}.tmp"
+        tmp.write_text(json.dumps(self.meta))
+        os.replace(tmp, self.path / META_FILE)
+
+    def _write_ids(self):
+        tmp = self.path / f"{IDS_FILE}.tmp.npy"
+        np.save(tmp, self.ids)
+        os.replace(tmp, self.path / IDS_FILE)
+
+    def build(self, ids, vectors, model_name):
+        """Replace the whole index with the given ids and (normalized) vectors."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        count, dim = vectors.shape
+        capacity = max(MIN_CAPACITY, count * 2)
+        with self._write_lock():
+            tmp = self.path / f"{VECTORS_FILE}.tmp.npy"
+            matrix = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=(capacity, dim))
+            matrix[:count] = vectors
+            matrix.flush()
+            del matrix
+            os.replace(tmp, self.path / VECTORS_FILE)
+
+            self.ids = np.full(capacity, EMPTY_ID, dtype=np.int64)
+            self.ids[:count] = ids
+            self._write_ids()
+            self.meta = {'model': model_name, 'dim': dim, 'count': count}
+            self._write_meta()
+            self._loaded_mtime = None
+
+    def update(self, vectors_by_id=None, removed_ids=()):
+        """
+        Insert or overwrite embeddings and free the slots of removed listings.
+
+        The whole batch is applied under one lock and the ids and meta files
+        are written once, however many listings changed.
+
+        Args:
+            vectors_by_id: {property_id: normalized vector}
+            removed_ids: Property ids that are no longer searchable
+        """
+        vectors_by_id = vectors_by_id or {}
+        with self._write_lock():
+            if not self._refresh():
+                return False
+            rows = dict(self.rows)
+            writes = {}
+            for property_id, vector in vectors_by_id.items():
+                row = rows.get(property_id)
+                if row is None:
+                    row = self.meta['count']
+                    if row >= len(self.ids):
+                        self._grow()
+                    self.ids[row] = property_id
+                    self.meta['count'] = row + 1
+                    rows[property_id] = row
+                writes[row] = np.asarray(vector, dtype=np.float32)
+            for property_id in removed_ids:
+                row = rows.pop(property_id, None)
+                if row is not None:
+                    writes[row] = 0
+                    self.ids[row] = EMPTY_ID
+            if not writes:
+                return False
+
+            matrix = np.load(self.path / VECTORS_FILE, mmap_mode='r+')
+            for row, vector in writes.items():
+                matrix[row] = vector
+            matrix.flush()
+            del matrix
+            self._write_ids()
+            self._write_meta()
+            self._loaded_mtime = None
+            return True
+
+    def upsert(self, property_id, vector):
+        """Insert or overwrite the embedding for one listing."""
+        return self.update({property_id: vector})
+
+    def remove(self, property_id):
+        """Free the slot of a listing that is no longer searchable."""
+        return self.update(removed_ids=[property_id])
+
+    def _grow(self):
+        capacity = len(self.ids) * 2
+        old = np.load(self.path / VECTORS_FILE, mmap_mode='r')
+        tmp = self.path / f"{VECTORS_FILE}.tmp.npy"
+        matrix = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=(capacity, self.meta['dim']))
+        matrix[:len(old)] = old
+        matrix.flush()
+        del matrix, old
+        os.replace(tmp, self.path / VECTORS_FILE)
+        ids = np.full(capacity, EMPTY_ID, dtype=np.int64)
+        ids[:len(self.ids)] = self.ids
+        self.ids = ids
+
+    def search(self, query_vector, candidate_ids=None, limit=10):
+        """
+        Rank listings by cosine similarity to the query.
+
+        Args:
+            query_vector: Normalized query embedding
+            candidate_ids: Restrict ranking to these property ids (structured filter matches)
+            limit: Number of results to return
+
+        Returns:
+            list: [(property_id, score)] best first
+        """
+        with self._lock:
+            if not self._refresh():
+                return []
+            vectors, ids, rows = self.vectors, self.ids, self.rows
+
+        if candidate_ids is None:
+            slots = np.fromiter(rows.values(), dtype=np.int64)
+        else:
+            slots = np.fromiter((rows[pid] for pid in candidate_ids if pid in rows), dtype=np.int64)
+        if not len(slots):
+            return []
+
+        scores = vectors[slots] @ np.asarray(query_vector, dtype=np.float32)
+        top = min(limit, len(slots))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        return [(int(ids[slots[i]]), float(scores[i])) for i in best]
+
+
+def get_index():
+    """Return the process-wide listing index."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ListingVectorIndex(settings.CHATBOT_VECTOR_INDEX_DIR)
+    return _index
+
+
+def semantic_search(text, candidate_ids=None, limit=10):
+    """
+    Rank listings semantically, or return None when semantic search is unavailable.
+
+    Args:
+        text: Free-text description of what the user wants
+        candidate_ids: Property ids that already match the structured filters
+        limit: Number of results to return
+    """
+    index = get_index()
+    if not index.exists():
+        return None
+    if candidate_ids is not None and not index.covers(candidate_ids):
+        # Some matches have not been embedded by the dispatcher yet
+        logger.info("Listing index is behind; ranking in SQL instead")
+        return None
+    query_vector = embed_query(text)
+    if query_vector is None:
+        return None
+    return index.search(query_vector, candidate_ids, limit)
+
+
+def reindex_listings(property_ids):
+    """
+    Re-embed changed listings in one model call; drop those no longer paid.
+
+    Called by the outbox dispatcher for ``listing.activated`` and
+    ``listing.changed`` messages.
+    """
+    from listings.models import Property
+
+    index = get_index()
+    if not index.exists():
+        return
+    property_ids = set(property_ids)
+    properties = list(Property.objects.filter(pk__in=property_ids, is_paid=True).prefetch_related('amenities'))
+    vectors_by_id = {}
+    if properties:
+        vectors = embed_documents([listing_document(prop) for prop in properties])
+        if vectors is None:
+            return
+        vectors_by_id = {prop.pk: vector for prop, vector in zip(properties, vectors)}
+    index.update(vectors_by_id, property_ids - vectors_by_id.keys())
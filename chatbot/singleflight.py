@@ -0,0 +1,119 @@
+"""
+Single-flight deduplication of identical in-flight LLM extractions.
+
+When several users send the same query at the same moment, only one
+request calls Groq; the others wait for and share its result. Within a
+process this uses a dict of in-flight calls guarded by a lock. With
+``CHATBOT_SINGLEFLIGHT_SHARED`` enabled, a cache lock extends this across
+workers: the process holding the lock publishes its result in the cache
+for a few seconds and the others poll for it.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from tourwise_website import metrics
+
+logger = logging.getLogger(__name__)
+
+# How long a cross-process leader may hold the lock before others give up waiting
+LOCK_TIMEOUT = 15
+# How long a published result stays available to late followers
+RESULT_TIMEOUT = 5
+POLL_INTERVAL = 0.05
+
+
+def flight_key(messages):
+    """Stable key for a prompt, ignoring case and whitespace differences."""
+    normalized = [
+        {'role': m['role'], 'content': ' '.join(m['content'].split()).lower()}
+        for m in messages
+    ]
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its result."""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Return fn()'s result, sharing it with concurrent callers using the same key.
+
+        Args:
+            key: Identifies equivalent calls
+            fn: Zero-argument callable doing the upstream work
+
+        Returns:
+            The result of fn(), possibly computed by another caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            metrics.increment(f"{self.name}.coalesced")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _run(self, key, fn):
+        if not getattr(settings, 'CHATBOT_SINGLEFLIGHT_SHARED', False):
+            return self._call_upstream(fn)
+
+        lock_key = f"singleflight:{self.name}:{key}:lock"
+        result_key = f"singleflight:{self.name}:{key}:result"
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            # A result published moments ago by another process is as good as our own
+            published = cache.get(result_key)
+            if published is not None:
+                metrics.increment(f"{self.name}.coalesced")
+                return published
+            if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+                break
+            if time.monotonic() >= deadline:
+                logger.warning(f"Single-flight lock wait timed out for {self.name}")
+                return self._call_upstream(fn)
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            result = self._call_upstream(fn)
+            cache.set(result_key, result, timeout=RESULT_TIMEOUT)
+            return result
+        finally:
+            cache.delete(lock_key)
+
+    def _call_upstream(self, fn):
+        metrics.increment(f"{self.name}.calls")
+        return fn()
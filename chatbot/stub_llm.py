@@ -0,0 +1,134 @@
+"""
+Local stand-in for the Groq chat completions API.
+
+Serves ``POST /openai/v1/chat/completions`` with canned filter JSON after a
+configurable delay, and counts the calls it receives. Used by the
+``benchmark_chatbot`` command; can also be run on its own and pointed at
+with ``GROQ_BASE_URL=http://127.0.0.1:8765``:
+
+    python -m chatbot.stub_llm --port 8765 --latency-ms 300
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETIONS_PATH = '/openai/v1/chat/completions'
+
+# User message -> filters the stub "extracts" for it
+DEFAULT_RESPONSES = {
+    "3 bedroom house in Harare under $1000": {"property_type": "house", "bedrooms": 3, "city": "Harare", "max_price": 1000},
+    "apartment in Borrowdale": {"property_type": "apartment", "suburb": "Borrowdale"},
+    "houses with 2 bathrooms": {"property_type": "house", "bathrooms": 2},
+    "cheap rooms in Bulawayo": {"property_type": "room", "city": "Bulawayo", "max_price": 200},
+    "guesthouse in Victoria Falls": {"property_type": "guesthouse", "city": "Victoria Falls"},
+    "4 bedroom house in Avondale with a pool": {"property_type": "house", "bedrooms": 4, "suburb": "Avondale"},
+    "what can you do?": {"query_type": "conversation"},
+}
+
+
+class StubLLMServer:
+    """Threaded HTTP server answering chat completions with canned JSON."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0, jitter_ms=0, responses=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.responses = responses if responses is not None else DEFAULT_RESPONSES
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != COMPLETIONS_PATH:
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                payload = server.complete(body)
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def complete(self, body):
+        """Build a chat completion response for a request body."""
+        with self._lock:
+            self.calls += 1
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+
+        messages = body.get('messages', [])
+        user_message = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+        content = json.dumps(self.responses.get(user_message, {}))
+        prompt_tokens = sum(len(m.get('content', '')) for m in messages) // 4
+        return {
+            'id': f"chatcmpl-stub-{self.calls}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(content) // 4,
+                'total_tokens': prompt_tokens + len(content) // 4,
+            },
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a stub Groq chat completions server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--responses', help='JSON file mapping user messages to filter objects')
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses) as f:
+            responses = json.load(f)
+
+    server = StubLLMServer(args.host, args.port, args.latency_ms, args.jitter_ms, responses)
+    print(f"Stub LLM listening on {server.base_url} (latency {args.latency_ms}ms ± {args.jitter_ms}ms)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,416 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from unittest.mock import patch
+from listings.locations import get_location_index
+from listings.models import Property
+from payments.models import OutboxMessage
+from payments.outbox import dispatch_outbox
+from chatbot.history import RING_SIZE, SESSION_KEY, append_turn, load_history
+from chatbot.models import ChatMessage
+from chatbot.parsing import parse_llm_json, validate_filters
+from chatbot.prompt import build_messages
+from chatbot.semantic import ListingVectorIndex, semantic_search
+from chatbot.singleflight import SingleFlight, flight_key
+from chatbot.views import canonicalize_filters, query_properties
+from tourwise_website import metrics, ratelimit
+import json
+import tempfile
+import threading
+import time
+import numpy as np
 
-# Create your tests here.
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class QueryPropertiesCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="chatuser",
+            email="chat@example.com",
+            password="password",
+        )
+        for bedrooms in (2, 3, 4):
+            Property.objects.create(
+                owner=self.user,
+                property_type="house",
+                city="Harare",
+                bedrooms=bedrooms,
+                price=500,
+                is_paid=True,
+            )
+
+    def test_canonical_filters_ignore_case_spacing_and_unknown_keys(self):
+        self.assertEqual(
+            canonicalize_filters({"city": " Harare ", "bedrooms": 3.0, "foo": "bar", "suburb": ""}),
+            canonicalize_filters({"bedrooms": 3, "city": "harare"}),
+        )
+
+    def test_total_count_and_page_come_from_one_query(self):
+        get_location_index()  # built once per listings version
+        with self.assertNumQueries(1):
+            cards, total = query_properties({"city": "Harare", "bedrooms": 3})
+        self.assertEqual(total, 2)
+        self.assertEqual(len(cards), 2)
+
+    def test_identical_filters_are_served_from_cache(self):
+        query_properties({"city": "Harare"})
+        with self.assertNumQueries(0):
+            cards, total = query_properties({"city": "HARARE"})
+        self.assertEqual(total, 3)
+
+    def test_paid_listing_change_invalidates_cache(self):
+        query_properties({"city": "Harare"})
+        Property.objects.create(owner=self.user, city="Harare", price=900, is_paid=True)
+        cards, total = query_properties({"city": "Harare"})
+        self.assertEqual(total, 4)
+
+    def test_unpublishing_a_listing_invalidates_cache(self):
+        query_properties({"city": "Harare"})
+        listing = Property.objects.filter(city="Harare").first()
+        listing.is_paid = False
+        listing.save()
+        cards, total = query_properties({"city": "Harare"})
+        self.assertEqual(total, 2)
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class ConversationStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.conversation_id = "2f1c7a52-5a0e-4bb4-9f0a-3d1c1b7f9e11"
+
+    def test_history_is_bounded_to_ring_size(self):
+        for i in range(8):
+            append_turn(self.conversation_id, f"question {i}", f"answer {i}")
+
+        self.assertLessEqual(ChatMessage.objects.count(), RING_SIZE * 2)
+        cache.clear()
+        history = load_history(self.conversation_id)
+        self.assertEqual(len(history), RING_SIZE)
+        self.assertEqual(history[-1], {"role": "assistant", "content": "answer 7"})
+
+    def test_turn_is_kept_when_cached_window_is_stale(self):
+        append_turn(self.conversation_id, "first question", "first answer")
+        stale_window = cache.get(f"chatbot:conversation:{self.conversation_id}")
+        append_turn(self.conversation_id, "second question", "second answer")
+        # Another worker's cache still holds the window from before the second turn
+        cache.set(f"chatbot:conversation:{self.conversation_id}", stale_window)
+
+        append_turn(self.conversation_id, "third question", "third answer")
+
+        self.assertEqual(ChatMessage.objects.filter(conversation_id=self.conversation_id).count(), 6)
+        history = load_history(self.conversation_id)
+        self.assertEqual([m["content"] for m in history][-3:], ["second answer", "third question", "third answer"])
+
+    def test_history_is_trimmed_to_token_budget(self):
+        append_turn(self.conversation_id, "x" * 400, "y" * 400)
+        append_turn(self.conversation_id, "recent question", "recent answer")
+
+        history = load_history(self.conversation_id, budget=20)
+        self.assertEqual([m["content"] for m in history], ["recent question", "recent answer"])
+
+    def test_query_view_keeps_only_conversation_id_in_session(self):
+        with patch("chatbot.views.extract_filters_with_groq", return_value={"query_type": "conversation"}):
+            response = self.client.post(
+                reverse("chatbot:chatbot_query"),
+                data=json.dumps({"message": "hello"}),
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        session = self.client.session
+        self.assertNotIn("chat_history", session)
+        self.assertEqual(len(load_history(session[SESSION_KEY])), 2)
+
+
+class PromptBuilderTests(TestCase):
+    def test_previous_filters_replace_assistant_text(self):
+        history = [
+            {"role": "user", "content": "houses in Harare"},
+            {"role": "assistant", "content": "I found 12 properties matching house in Harare:"},
+        ]
+        messages, _ = build_messages("show me cheaper ones", history, {"city": "Harare", "property_type": "house"})
+
+        self.assertNotIn("assistant", [m["role"] for m in messages])
+        self.assertIn('"city": "Harare"', messages[1]["content"])
+        self.assertEqual(messages[-1], {"role": "user", "content": "show me cheaper ones"})
+
+    def test_earlier_turns_are_not_replayed(self):
+        history = [
+            {"role": "user", "content": "houses in Harare"},
+            {"role": "assistant", "content": "I found 12 properties"},
+            {"role": "user", "content": "with a pool"},
+            {"role": "assistant", "content": "I found 3 properties"},
+        ]
+        messages, _ = build_messages("show me cheaper ones", history, {"city": "Harare", "keywords": "pool"})
+        self.assertEqual([m["role"] for m in messages], ["system", "system", "user"])
+
+        # A standalone query never carries history
+        messages, _ = build_messages("apartments in Borrowdale", history)
+        self.assertEqual(len(messages), 2)
+
+    def test_previous_turn_resolves_a_reference_without_filter_state(self):
+        history = [
+            {"role": "user", "content": "hello"},
+            {"role": "user", "content": "anything near the university"},
+            {"role": "assistant", "content": "I couldn't find any properties"},
+        ]
+        messages, _ = build_messages("show me cheaper ones", history)
+        self.assertEqual([m["content"] for m in messages[1:]], ["anything near the university", "show me cheaper ones"])
+
+        messages, estimated = build_messages("cheaper ones", [{"role": "user", "content": "x" * 4000}], budget=1000)
+        self.assertEqual(len(messages), 2)
+        self.assertLessEqual(estimated, 1000)
+
+
+class FilterParsingTests(TestCase):
+    def test_fenced_and_prose_wrapped_json_is_parsed(self):
+        content = 'Sure! Here you go:\n```json\n{"city": "Harare", "bedrooms": 3,}\n```'
+        self.assertEqual(parse_llm_json(content), {"city": "Harare", "bedrooms": 3})
+
+    def test_truncated_json_keeps_complete_pairs(self):
+        content = '{"property_type": "house", "max_price": 1500, "city": "Har'
+        self.assertEqual(parse_llm_json(content), {"property_type": "house", "max_price": 1500})
+
+    def test_values_are_coerced_clamped_and_unknown_keys_dropped(self):
+        filters = validate_filters({
+            "property_type": "Flats",
+            "bedrooms": "3 bedrooms",
+            "bathrooms": 99,
+            "min_price": "$1,500",
+            "max_price": "1k",
+            "city": "any",
+            "pool": True,
+        })
+        self.assertEqual(filters, {
+            "property_type": "apartment",
+            "bedrooms": 3,
+            "bathrooms": 20,
+            "min_price": 1000,
+            "max_price": 1500,
+        })
+
+
+class ListingVectorIndexTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.index = ListingVectorIndex(self.tmpdir.name)
+        self.index.build([1, 2, 3], np.eye(3, dtype=np.float32), "test-model")
+
+    def test_search_ranks_by_cosine_within_candidates(self):
+        query = np.array([0.9, 0.1, 0.0], dtype=np.float32)
+        self.assertEqual([pid for pid, _ in self.index.search(query)], [1, 2, 3])
+        self.assertEqual([pid for pid, _ in self.index.search(query, candidate_ids=[2, 3])], [2, 3])
+
+    def test_upsert_overwrites_appends_and_grows(self):
+        self.index.upsert(3, np.array([1, 0, 0], dtype=np.float32))
+        for pid in range(4, 300):
+            self.index.upsert(pid, np.array([0, 0, 1], dtype=np.float32))
+
+        reopened = ListingVectorIndex(self.tmpdir.name)
+        top = reopened.search(np.array([1, 0, 0], dtype=np.float32), limit=2)
+        self.assertEqual(sorted(pid for pid, _ in top), [1, 3])
+        self.assertEqual(len(reopened.search(np.array([0, 0, 1], dtype=np.float32), limit=500)), 299)
+
+    def test_removed_listing_is_not_returned(self):
+        self.index.remove(1)
+        self.assertNotIn(1, [pid for pid, _ in self.index.search(np.array([1, 0, 0], dtype=np.float32))])
+
+    def test_batched_update_writes_the_index_files_once(self):
+        vectors = {pid: np.array([0, 1, 0], dtype=np.float32) for pid in range(4, 100)}
+        with patch.object(ListingVectorIndex, "_write_ids", autospec=True,
+                          side_effect=ListingVectorIndex._write_ids) as mock_ids:
+            self.index.update(vectors, removed_ids=[1])
+        self.assertEqual(mock_ids.call_count, 1)
+
+        reopened = ListingVectorIndex(self.tmpdir.name)
+        found = [pid for pid, _ in reopened.search(np.array([1, 0, 0], dtype=np.float32), limit=500)]
+        self.assertNotIn(1, found)
+        self.assertEqual(len(found), 98)
+
+    def test_covers_only_embedded_listings(self):
+        self.assertTrue(self.index.covers([1, 3]))
+        self.assertFalse(self.index.covers([1, 4]))
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class HybridSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username="hybrid", email="hybrid@example.com", password="password")
+        self.quiet = Property.objects.create(owner=user, property_type="house", city="Harare", is_paid=True)
+        self.busy = Property.objects.create(owner=user, property_type="house", city="Harare", is_paid=True)
+        Property.objects.create(owner=user, property_type="apartment", city="Harare", is_paid=True)
+
+    def test_keywords_rank_structured_matches_semantically(self):
+        hits = [(self.quiet.pk, 0.9), (self.busy.pk, 0.2)]
+        with patch("chatbot.views.semantic_search", return_value=hits) as mock_search:
+            cards, total = query_properties({"property_type": "house", "keywords": "quiet, borehole"})
+
+        self.assertEqual([card["id"] for card in cards], [self.quiet.pk, self.busy.pk])
+        self.assertEqual(total, 2)
+        self.assertEqual(sorted(mock_search.call_args.args[1]), sorted([self.quiet.pk, self.busy.pk]))
+
+    def test_total_counts_matches_beyond_the_candidate_limit(self):
+        with patch("chatbot.views.SEMANTIC_CANDIDATE_LIMIT", 1), \
+                patch("chatbot.views.semantic_search", return_value=[(self.quiet.pk, 0.9)]):
+            cards, total = query_properties({"property_type": "house", "keywords": "quiet"})
+
+        self.assertEqual(len(cards), 1)
+        self.assertEqual(total, 2)
+
+    def test_listing_changes_are_embedded_by_the_dispatcher(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        index = ListingVectorIndex(tmpdir.name)
+        index.build([self.quiet.pk], np.eye(1, 2, dtype=np.float32), "test-model")
+        vectors = np.array([[0, 1]], dtype=np.float32)
+        OutboxMessage.objects.all().delete()  # queued by setUp
+
+        with patch("chatbot.semantic.get_index", return_value=index), \
+                patch("chatbot.semantic.embed_documents", return_value=vectors) as mock_embed:
+            self.busy.description = "Quiet street"
+            self.busy.save()
+            # Nothing is embedded on the saving request, and the stale index is not used
+            mock_embed.assert_not_called()
+            self.assertIsNone(semantic_search("quiet", [self.quiet.pk, self.busy.pk]))
+
+            self.assertEqual(dispatch_outbox(), {"processed": 1, "failed": 0})
+
+        self.assertTrue(index.covers([self.quiet.pk, self.busy.pk]))
+
+    def test_structured_results_when_semantic_search_unavailable(self):
+        with patch("chatbot.views.semantic_search", return_value=None):
+            cards, total = query_properties({"property_type": "house", "keywords": "quiet"})
+        self.assertEqual(total, 2)
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class RelevanceRankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="ranker", email="rank@example.com", password="password")
+
+    def _create(self, **kwargs):
+        defaults = {"owner": self.user, "city": "Harare", "is_paid": True, "bedrooms": 3, "price": 500}
+        defaults.update(kwargs)
+        return Property.objects.create(**defaults)
+
+    def test_priority_and_closeness_outrank_arbitrary_order(self):
+        far = self._create(price=200, bedrooms=6)
+        close = self._create(price=950, bedrooms=3)
+        priority = self._create(price=950, bedrooms=3, listing_type="priority")
+
+        cards, total = query_properties({"city": "Harare", "bedrooms": 3, "max_price": 1000})
+
+        self.assertEqual([card["id"] for card in cards], [priority.pk, close.pk, far.pk])
+        self.assertEqual(total, 3)
+
+    def test_ties_are_broken_by_newest_first(self):
+        older = self._create()
+        newer = self._create()
+        cards, _ = query_properties({"city": "Harare"})
+        self.assertEqual([card["id"] for card in cards], [newer.pk, older.pk])
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+    RATE_LIMIT_ENABLED=True,
+    RATE_LIMIT_BACKEND="local",
+    RATE_LIMITS={"chatbot": {"rate": "1/m", "burst": 2}},
+)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ratelimit._local_buckets.clear()
+
+    def _post(self, **extra):
+        with patch("chatbot.views.extract_filters_with_groq", return_value={"query_type": "conversation"}):
+            return self.client.post(
+                reverse("chatbot:chatbot_query"),
+                data=json.dumps({"message": "hello"}),
+                content_type="application/json",
+                **extra,
+            )
+
+    def test_burst_then_429_with_retry_after(self):
+        self.assertEqual(self._post().status_code, 200)
+        self.assertEqual(self._post().status_code, 200)
+
+        response = self._post()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertEqual(metrics.snapshot(), {"ratelimit.rejected.chatbot": 1})
+
+    def test_buckets_are_per_client(self):
+        for _ in range(3):
+            self._post(REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(self._post(REMOTE_ADDR="10.0.0.2").status_code, 200)
+
+    def test_clients_behind_a_trusted_proxy_get_their_own_buckets(self):
+        for _ in range(3):
+            self._post(REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.7")
+        self.assertEqual(self._post(REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.8").status_code, 200)
+
+        # Forged headers from an untrusted address all share that address's bucket
+        statuses = [
+            self._post(REMOTE_ADDR="198.51.100.1", HTTP_X_FORWARDED_FOR=f"203.0.113.{i}").status_code
+            for i in range(10, 13)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_cache_backend_shares_buckets(self):
+        with self.settings(RATE_LIMIT_BACKEND="cache"):
+            statuses = [self._post().status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _concurrent(self, flight, key, fn, callers=5):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do(key, fn))) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_identical_calls_share_one_upstream_call(self):
+        calls = []
+
+        def upstream():
+            calls.append(1)
+            time.sleep(0.1)
+            return {"city": "Harare"}
+
+        results = self._concurrent(SingleFlight("test"), "key", upstream)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"city": "Harare"}] * 5)
+        self.assertEqual(metrics.snapshot(), {"test.calls": 1, "test.coalesced": 4})
+
+    @override_settings(CHATBOT_SINGLEFLIGHT_SHARED=True)
+    def test_shared_mode_reuses_result_published_by_another_process(self):
+        SingleFlight("test").do("key", lambda: {"city": "Harare"})
+        # A separate instance stands in for another worker process
+        result = SingleFlight("test").do("key", lambda: self.fail("upstream called twice"))
+        self.assertEqual(result, {"city": "Harare"})
+
+    def test_flight_key_ignores_case_and_whitespace(self):
+        a, _ = build_messages("3 bedroom house  in Harare", [])
+        b, _ = build_messages("3 Bedroom House in harare", [])
+        self.assertEqual(flight_key(a), flight_key(b))
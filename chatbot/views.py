@@ -3,120 +3,191 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
-from django.db.models import Q
+from django.core.cache import cache
+from django.db.models import Q, Count, Window
+from listings.cache import get_listings_version
+from listings.locations import location_filter
 from listings.models import Property
+from tourwise_website.pagecache import PAGE_CACHE_TIMEOUT
+from tourwise_website.ratelimit import rate_limit
+from .history import get_conversation_id, start_conversation, load_history, load_filters, append_turn
+from .parsing import FILTER_KEYS, parse_llm_json, validate_filters
+from .prompt import build_messages, MAX_COMPLETION_TOKENS
+from .ranking import rank_properties
+from .semantic import semantic_search
+from .singleflight import SingleFlight, flight_key
+import hashlib
 import json
 import logging
-from groq import Groq
+import time
+from groq import Groq, BadRequestError
 
 logger = logging.getLogger(__name__)
 
+# Cleared if the provider rejects response_format, so we stop paying for the failed attempt
+_json_mode_supported = True
+
+extraction_flight = SingleFlight('chatbot.extraction')
+
+RESULTS_PAGE_SIZE = 10
+# The listings version bump only reaches other workers through a shared cache
+# (REDIS_URL); with per-process caches this bounds how long they serve stale
+# results, matching cached pages and property cards
+RESULTS_CACHE_TIMEOUT = PAGE_CACHE_TIMEOUT
+# Upper bound on structured matches re-ranked by semantic similarity
+SEMANTIC_CANDIDATE_LIMIT = 5000
+
 
 def chatbot_view(request):
     """Render the chatbot interface."""
-    # Initialize chat history in session if it doesn't exist
-    if 'chat_history' not in request.session:
-        request.session['chat_history'] = []
+    # History lives in the conversation store; drop any legacy copy from the session
+    request.session.pop('chat_history', None)
     return render(request, 'chatbot/chatbot.html')
 
 
-def extract_filters_with_groq(user_query, conversation_history):
+def extract_filters_with_groq(user_query, conversation_history, previous_filters=None):
     """
     Call Groq API to extract property search filters from natural language.
     
     Args:
         user_query: The user's current message
         conversation_history: List of previous messages [{"role": "user/assistant", "content": "..."}]
+        previous_filters: Filters extracted on the previous search turn, carried forward as context
     
     Returns:
         dict: Extracted filters or empty dict if no filters found
     """
+    # System prompt + current filter state + query (previous user turn only to resolve a reference)
+    messages, estimated_tokens = build_messages(user_query, conversation_history, previous_filters)
+
     try:
-        client = Groq(api_key=settings.GROQ_API_KEY)
-        
-        system_prompt = """You are a helpful real estate assistant for properties in Zimbabwe. Your job is to extract search parameters from user queries.
-
-IMPORTANT: Return ONLY a valid JSON object. Do not include any explanatory text before or after the JSON.
-
-Return a JSON object with these fields (all optional):
-{
-  "property_type": "house|apartment|airbnb|room|guesthouse",
-  "bedrooms": number (minimum bedrooms required),
-  "bathrooms": number (minimum bathrooms required),
-  "city": "string",
-  "suburb": "string", 
-  "min_price": number,
-  "max_price": number,
-  "min_area": number,
-  "max_area": number
-}
-
-Examples:
-- "3 bedroom house in Harare under $1000" -> {"property_type": "house", "bedrooms": 3, "city": "Harare", "max_price": 1000}
-- "apartment in Borrowdale" -> {"property_type": "apartment", "suburb": "Borrowdale"}
-- "show me cheaper ones" (in context) -> {"max_price": <adjusted value based on context>}
-- "houses with 2 bathrooms" -> {"property_type": "house", "bathrooms": 2}
-
-If the user asks a general question or makes conversation without search intent, return: {"query_type": "conversation"}
-If no filters can be extracted, return: {}"""
-
-        # Build messages for Groq API
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # Add conversation history (last 5 messages for context)
-        for msg in conversation_history[-5:]:
-            messages.append(msg)
-        
-        # Add current query
-        messages.append({"role": "user", "content": user_query})
-        
-        # Call Groq API
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            temperature=0.1,  # Low temperature for consistent extraction
-            max_tokens=500
+        # Identical prompts in flight at the same time share one Groq call
+        filters = extraction_flight.do(
+            flight_key(messages), lambda: _run_extraction(messages, estimated_tokens)
         )
-        
-        # Extract and parse JSON response
-        content = response.choices[0].message.content.strip()
-        
-        # Try to find JSON in the response
-        if content.startswith('{') and content.endswith('}'):
-            filters = json.loads(content)
-        else:
-            # Try to extract JSON from markdown code blocks
-            if '```json' in content:
-                json_str = content.split('```json')[1].split('```')[0].strip()
-                filters = json.loads(json_str)
-            elif '```' in content:
-                json_str = content.split('```')[1].split('```')[0].strip()
-                filters = json.loads(json_str)
-            else:
-                # Try to parse as-is
-                filters = json.loads(content)
-        
         logger.info(f"Extracted filters: {filters}")
-        return filters
-        
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error: {e}, content: {content}")
-        return {}
+        return dict(filters)
+
     except Exception as e:
         logger.error(f"Error calling Groq API: {e}")
         return {}
 
 
+def _run_extraction(messages, estimated_tokens):
+    """Call Groq with a built prompt and return validated filters."""
+    client = Groq(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL)
+
+    # Call Groq API, in JSON mode when the provider accepts it
+    started = time.perf_counter()
+    response = _create_completion(client, messages)
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    usage = getattr(response, 'usage', None)
+    logger.info(
+        f"Groq extraction: messages={len(messages)} est_prompt_tokens={estimated_tokens} "
+        f"prompt_tokens={getattr(usage, 'prompt_tokens', None)} "
+        f"completion_tokens={getattr(usage, 'completion_tokens', None)} latency_ms={latency_ms:.0f}"
+    )
+
+    # Parse tolerantly, then coerce/clamp values and drop unknown keys
+    content = response.choices[0].message.content or ''
+    filters = validate_filters(parse_llm_json(content))
+    if not filters and content.strip() not in ('', '{}'):
+        logger.warning(f"No usable filters in Groq response: {content[:200]}")
+    return filters
+
+
+def _create_completion(client, messages):
+    """
+    Request a completion, using structured JSON output when supported.
+
+    If the provider rejects ``response_format`` the call is retried once
+    without it and JSON mode stays off for the rest of the process.
+    """
+    global _json_mode_supported
+    options = {
+        'model': "llama-3.3-70b-versatile",
+        'messages': messages,
+        'temperature': 0.1,  # Low temperature for consistent extraction
+        'max_tokens': MAX_COMPLETION_TOKENS,
+    }
+    if _json_mode_supported and getattr(settings, 'GROQ_JSON_MODE', True):
+        try:
+            return client.chat.completions.create(response_format={"type": "json_object"}, **options)
+        except BadRequestError as e:
+            if 'response_format' not in str(e):
+                raise
+            logger.warning(f"Groq rejected JSON mode, falling back to plain completions: {e}")
+            _json_mode_supported = False
+    return client.chat.completions.create(**options)
+
+
+def canonicalize_filters(filters):
+    """
+    Reduce extracted filters to a stable form so equivalent searches share a cache entry.
+
+    Args:
+        filters: Dictionary of search parameters as returned by the LLM
+
+    Returns:
+        dict: Known, non-empty filters with normalized strings and numbers
+    """
+    canonical = {}
+    for key in FILTER_KEYS:
+        value = filters.get(key)
+        if not value:
+            continue
+        if isinstance(value, str):
+            value = ' '.join(value.split()).lower()
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        canonical[key] = value
+    return canonical
+
+
+def _results_cache_key(filters):
+    digest = hashlib.sha1(
+        json.dumps(filters, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"chatbot:results:{get_listings_version()}:{digest}"
+
+
+def serialize_property_card(prop):
+    """Serialize a property into the card payload rendered by the chat UI."""
+    return {
+        'id': prop.id,
+        'title': prop.title,
+        'property_type': prop.get_property_type_display(),
+        'bedrooms': prop.bedrooms,
+        'bathrooms': prop.bathrooms,
+        'price': str(prop.price),
+        'city': prop.city,
+        'suburb': prop.suburb,
+        'main_image': prop.main_image.url if prop.main_image else None,
+        'street_address': prop.street_address,
+    }
+
+
 def query_properties(filters):
     """
     Query the Property database using extracted filters.
-    
+
+    Results are ranked by relevance in SQL, cached per canonical filter set
+    and invalidated whenever a paid listing changes. The total match count
+    is computed in the same query as the page via a window aggregate.
+
     Args:
         filters: Dictionary of search parameters
-    
+
     Returns:
-        QuerySet of matching properties
+        tuple: (list of serialized property cards, total number of matches)
     """
+    filters = canonicalize_filters(filters)
+    cache_key = _results_cache_key(filters)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     # Base filter: only paid listings
     query = Q(is_paid=True)
     
@@ -130,11 +201,9 @@ def query_properties(filters):
     if filters.get('bathrooms'):
         query &= Q(bathrooms__gte=filters['bathrooms'])
     
-    if filters.get('city'):
-        query &= Q(city__iexact=filters['city'])
-    
-    if filters.get('suburb'):
-        query &= Q(suburb__iexact=filters['suburb'])
+    if filters.get('city') or filters.get('suburb'):
+        # Resolve loose place names to exact stored values
+        query &= location_filter(filters.get('suburb', ''), filters.get('city', ''))
     
     if filters.get('max_price'):
         query &= Q(price__lte=filters['max_price'])
@@ -148,27 +217,64 @@ def query_properties(filters):
     if filters.get('max_area'):
         query &= Q(area__lte=filters['max_area'])
     
-    # Execute query with limit
-    properties = Property.objects.filter(query).select_related('currency').prefetch_related('images')[:10]
-    
-    return properties
+    queryset = rank_properties(Property.objects.filter(query), filters)
+    result = None
+    if filters.get('keywords'):
+        result = _semantic_page(queryset, filters['keywords'])
+
+    if result is None:
+        # Fetch the page and the total match count in one round trip
+        properties = list(
+            queryset.annotate(total_count=Window(expression=Count('pk')))[:RESULTS_PAGE_SIZE]
+        )
+        total_count = properties[0].total_count if properties else 0
+        result = ([serialize_property_card(prop) for prop in properties], total_count)
 
+    cache.set(cache_key, result, RESULTS_CACHE_TIMEOUT)
+    return result
 
-def format_response(properties, user_query, filters):
+
+def _semantic_page(queryset, keywords):
+    """
+    Rank structured matches by semantic similarity to the user's wishes.
+
+    Candidates are the best SQL-ranked matches, so the relevance score still
+    decides which listings are considered when there are very many.
+
+    Returns:
+        tuple or None: (cards, total) or None if semantic search is unavailable
+    """
+    # Same window count as the structured path, so the total is not capped
+    rows = list(
+        queryset.annotate(total_count=Window(expression=Count('pk')))
+        .values_list('pk', 'total_count')[:SEMANTIC_CANDIDATE_LIMIT]
+    )
+    if not rows:
+        return [], 0
+    candidate_ids = [property_id for property_id, _ in rows]
+
+    hits = semantic_search(keywords, candidate_ids, RESULTS_PAGE_SIZE)
+    if hits is None:
+        return None
+
+    properties = Property.objects.in_bulk([property_id for property_id, _ in hits])
+    cards = [serialize_property_card(properties[property_id]) for property_id, _ in hits if property_id in properties]
+    return cards, rows[0][1]
+
+
+def format_response(total_count, user_query, filters):
     """
     Generate a friendly conversational response based on search results.
     
     Args:
-        properties: QuerySet of matching properties
+        total_count: Total number of matching properties
         user_query: The user's original query
         filters: Extracted filters
     
     Returns:
         str: Conversational response message
     """
-    count = properties.count()
-    
-    if count == 0:
+    if total_count == 0:
         return "I couldn't find any properties matching your criteria. Try adjusting your search parameters, or I can help you explore other options!"
     
     # Build response based on filters
@@ -190,13 +296,14 @@ def format_response(properties, user_query, filters):
     
     criteria_str = " ".join(criteria_parts) if criteria_parts else "your criteria"
     
-    if count == 1:
+    if total_count == 1:
         return f"I found 1 property matching {criteria_str}:"
     else:
-        return f"I found {count} properties matching {criteria_str}:"
+        return f"I found {total_count} properties matching {criteria_str}:"
 
 
 @require_http_methods(["POST"])
+@rate_limit('chatbot')
 def chatbot_query_view(request):
     """
     Handle chatbot queries: extract filters, search properties, return results.
@@ -208,14 +315,13 @@ def chatbot_query_view(request):
         if not user_message:
             return JsonResponse({'error': 'Message is required'}, status=400)
         
-        # Get or initialize conversation history
-        if 'chat_history' not in request.session:
-            request.session['chat_history'] = []
-        
-        conversation_history = request.session['chat_history']
+        # Load recent history from the conversation store (session holds only the id)
+        conversation_id = get_conversation_id(request)
+        conversation_history = load_history(conversation_id)
+        previous_filters = load_filters(conversation_id)
         
         # Extract filters using Groq
-        filters = extract_filters_with_groq(user_message, conversation_history)
+        filters = extract_filters_with_groq(user_message, conversation_history, previous_filters)
         
         # Check if this is a conversational query (no search intent)
         if filters.get('query_type') == 'conversation':
@@ -226,38 +332,17 @@ def chatbot_query_view(request):
             response_message = "I'd be happy to help you find a property! Could you tell me what you're looking for? For example, you can specify the number of bedrooms, property type, location, or budget."
             properties_data = []
         else:
-            # Query database with extracted filters
-            properties = query_properties(filters)
+            # Query database with extracted filters (serialized, possibly cached)
+            properties_data, total_count = query_properties(filters)
             
             # Format response message
-            response_message = format_response(properties, user_message, filters)
-            
-            # Serialize properties for JSON response
-            properties_data = []
-            for prop in properties:
-                properties_data.append({
-                    'id': prop.id,
-                    'title': prop.title,
-                    'property_type': prop.get_property_type_display(),
-                    'bedrooms': prop.bedrooms,
-                    'bathrooms': prop.bathrooms,
-                    'price': str(prop.price),
-                    'city': prop.city,
-                    'suburb': prop.suburb,
-                    'main_image': prop.main_image.url if prop.main_image else None,
-                    'street_address': prop.street_address,
-                })
-        
-        # Update conversation history
-        conversation_history.append({"role": "user", "content": user_message})
-        conversation_history.append({"role": "assistant", "content": response_message})
-        
-        # Keep only last 10 messages (5 exchanges) to prevent session bloat
-        if len(conversation_history) > 10:
-            conversation_history = conversation_history[-10:]
+            response_message = format_response(total_count, user_message, filters)
         
-        request.session['chat_history'] = conversation_history
-        request.session.modified = True
+        # Update conversation history; the session is only written when a conversation starts
+        if not conversation_id:
+            conversation_id = start_conversation(request)
+        search_filters = filters if filters and filters.get('query_type') != 'conversation' else None
+        append_turn(conversation_id, user_message, response_message, filters=search_filters)
         
         return JsonResponse({
             'message': response_message,
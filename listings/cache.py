@@ -0,0 +1,41 @@
+"""
+Cache helpers shared by the listing read paths.
+
+Cached listing data embeds a global listings version in its key. Bumping the
+version whenever a paid listing changes orphans every stale entry at once,
+so readers never have to know which keys to delete.
+
+A bump only reaches other processes through a shared cache (``REDIS_URL``).
+With the default per-process LocMemCache, entries keyed on the version must
+expire within the page-cache timeout so other workers are never stale for
+longer than their cached pages.
+
+Listing saves and deletes bump it from signal receivers. Code that changes
+``is_paid`` with a queryset ``update()`` bypasses them and must bump (or
+send ``post_save``) itself, as the payment outbox does.
+"""
+import time
+
+from django.core.cache import cache
+
+LISTINGS_VERSION_KEY = 'listings:version'
+
+
+def get_listings_version():
+    """Return the current listings version, initialising it if needed."""
+    version = cache.get(LISTINGS_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a version lost to eviction never reuses an old value
+        cache.add(LISTINGS_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(LISTINGS_VERSION_KEY)
+    return version
+
+
+def bump_listings_version():
+    """Invalidate every cache entry keyed on the listings version."""
+    try:
+        return cache.incr(LISTINGS_VERSION_KEY)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(LISTINGS_VERSION_KEY, version, timeout=None)
+        return version
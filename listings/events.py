@@ -0,0 +1,12 @@
+"""
+Outbox topics for listing changes.
+
+Messages carry ``{'property_id': ...}`` and are recorded by the payments
+outbox (``payments.outbox.enqueue``) in the transaction making the change:
+
+- ``listing.activated``: a payment made the listing public
+- ``listing.changed``: a paid listing was edited, unpublished or deleted
+"""
+
+LISTING_ACTIVATED = 'listing.activated'
+LISTING_CHANGED = 'listing.changed'
@@ -0,0 +1,203 @@
+"""
+Resolve free-text place names to canonical (suburb, city) values.
+
+Users and the chatbot's LLM write locations loosely ("harare cbd",
+"Borrowdale Brook", "byo"). Matching those with ``iexact`` returns nothing,
+so instead they are resolved against an in-memory index of the suburb and
+city values that paid listings actually use, through an alias table, exact
+normalized lookup, and finally trigram similarity combined with edit
+distance. Queries can then filter on exact, indexed column values.
+"""
+import re
+import threading
+from collections import defaultdict, namedtuple
+
+from django.db.models import Q
+
+from .cache import get_listings_version
+from .models import Property
+
+# Normalized alias -> normalized canonical name (suburb or city)
+LOCATION_ALIASES = {
+    'hre': 'harare',
+    'harare cbd': 'harare',
+    'harare central': 'harare',
+    'harare city': 'harare',
+    'harare town': 'harare',
+    'byo': 'bulawayo',
+    'bulawayo cbd': 'bulawayo',
+    'vic falls': 'victoria falls',
+    'vf': 'victoria falls',
+    'borrowdale brook': 'borrowdale brooke',
+    'the brooke': 'borrowdale brooke',
+    'mt pleasant': 'mount pleasant',
+    'chitungwiza town': 'chitungwiza',
+}
+
+# Words that don't help identify a place
+NOISE_WORDS = {'zimbabwe', 'zim', 'suburb', 'area', 'province'}
+
+# Minimum combined similarity for a fuzzy match
+MATCH_THRESHOLD = 0.6
+
+ResolvedLocation = namedtuple('ResolvedLocation', ['suburb', 'city', 'unmatched_suburb', 'unmatched_city'])
+
+_index_lock = threading.Lock()
+_index = None
+
+
+def normalize_location(text):
+    """Lowercase, strip punctuation and noise words, collapse whitespace."""
+    text = re.sub(r'[^\w\s]', ' ', (text or '').lower())
+    return ' '.join(word for word in text.split() if word not in NOISE_WORDS)
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def similarity(a, b):
+    """Combined trigram (Jaccard) and edit-distance similarity in [0, 1]."""
+    if a == b:
+        return 1.0
+    trigrams_a, trigrams_b = _trigrams(a), _trigrams(b)
+    trigram_score = len(trigrams_a & trigrams_b) / len(trigrams_a | trigrams_b)
+    edit_score = 1 - _edit_distance(a, b) / max(len(a), len(b))
+    return (trigram_score + edit_score) / 2
+
+
+class LocationIndex:
+    """Known suburbs and cities keyed by normalized name."""
+
+    def __init__(self, pairs):
+        self.cities = {}
+        self.suburbs = defaultdict(set)
+        for suburb, city in pairs:
+            if city and city.strip():
+                self.cities.setdefault(normalize_location(city), city)
+            if suburb and suburb.strip():
+                self.suburbs[normalize_location(suburb)].add((suburb, city))
+
+    def _lookup(self, names, text):
+        key = normalize_location(text)
+        if not key:
+            return None
+        key = LOCATION_ALIASES.get(key, key)
+        if key in names:
+            return key
+        best, best_score = None, MATCH_THRESHOLD
+        for name in names:
+            score = similarity(key, name)
+            if score >= best_score:
+                best, best_score = name, score
+        return best
+
+    def match_city(self, text):
+        """Return the exact stored city value for text, or None."""
+        key = self._lookup(self.cities, text)
+        return self.cities[key] if key else None
+
+    def match_suburb(self, text, city=None):
+        """
+        Return (suburb, city) stored values for text, or None.
+
+        With a known city only suburbs in that city match. When the suburb
+        name exists in several cities and no city is known, the city part of
+        the result is None.
+        """
+        key = self._lookup(self.suburbs, text)
+        if not key:
+            return None
+        pairs = self.suburbs[key]
+        if city:
+            return next((pair for pair in pairs if pair[1] == city), None)
+        cities = {pair[1] for pair in pairs}
+        suburb = next(iter(pairs))[0]
+        return (suburb, cities.pop()) if len(cities) == 1 else (suburb, None)
+
+
+def get_location_index():
+    """Return the location index, rebuilt when the listings version changes."""
+    global _index
+    version = get_listings_version()
+    index = _index
+    if index is None or index[0] != version:
+        with _index_lock:
+            if _index is None or _index[0] != version:
+                pairs = Property.objects.filter(is_paid=True).values_list('suburb', 'city').distinct()
+                _index = (version, LocationIndex(pairs))
+            index = _index
+    return index[1]
+
+
+def resolve_location(suburb='', city=''):
+    """
+    Resolve free-text suburb/city to stored values.
+
+    A "city" that is really a suburb (e.g. "Borrowdale") resolves to that
+    suburb and its city, and a "suburb" that is really a city (e.g.
+    "Harare CBD") resolves to the city.
+
+    Returns:
+        ResolvedLocation: Stored suburb/city values (or None), plus any input
+        text that could not be resolved
+    """
+    index = get_location_index()
+    resolved_suburb = resolved_city = None
+    unmatched_suburb = unmatched_city = ''
+
+    if city:
+        resolved_city = index.match_city(city)
+
+    if suburb:
+        match = index.match_suburb(suburb, resolved_city)
+        if match:
+            resolved_suburb, resolved_city = match[0], resolved_city or match[1]
+        elif not city:
+            resolved_city = index.match_city(suburb)
+            unmatched_suburb = '' if resolved_city else suburb
+        else:
+            unmatched_suburb = suburb
+
+    if city and not resolved_city:
+        match = None if resolved_suburb else index.match_suburb(city)
+        if match:
+            resolved_suburb, resolved_city = match
+        else:
+            unmatched_city = city
+
+    return ResolvedLocation(resolved_suburb, resolved_city, unmatched_suburb, unmatched_city)
+
+
+def location_filter(suburb='', city=''):
+    """
+    Build a Q filtering on resolved, exact location values.
+
+    Parts that can't be resolved fall back to case-insensitive matching.
+    """
+    location = resolve_location(suburb, city)
+    query = Q()
+    if location.suburb:
+        query &= Q(suburb=location.suburb)
+    elif location.unmatched_suburb:
+        query &= Q(suburb__iexact=location.unmatched_suburb)
+    if location.city:
+        query &= Q(city=location.city)
+    elif location.unmatched_city:
+        query &= Q(city__iexact=location.unmatched_city)
+    return query
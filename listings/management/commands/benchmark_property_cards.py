@@ -0,0 +1,106 @@
+"""
+Django management command to benchmark page rendering with cached property cards
+Run with: python manage.py benchmark_property_cards --listings 50 --iterations 20
+
+Creates a throwaway test database, seeds paid listings with images, and
+renders the listing pages directly (bypassing the anonymous page cache),
+once with an empty cache before every render (every card rendered from its
+template) and once with warm card fragments, reporting milliseconds and
+queries per page.
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+
+from accounts.views import home_view, search_results_view
+from listings.models import Currency, Property, PropertyImage
+from listings.views import featured_listings_view, recent_listings_view
+
+PAGES = [
+    ('home', home_view, '/'),
+    ('recent', recent_listings_view, '/listings/recent/'),
+    ('featured', featured_listings_view, '/listings/featured/'),
+    ('search', search_results_view, '/search/?location=Harare'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare listing page render time with cold and warm property card fragments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=50, help='Paid listings to seed')
+        parser.add_argument('--images', type=int, default=3, help='Interior images per listing')
+        parser.add_argument('--iterations', type=int, default=20, help='Renders per page and mode')
+
+    def handle(self, *args, **options):
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            self._seed(options['listings'], options['images'])
+            self.stdout.write(f"Seeded {options['listings']} listings with {options['images']} images each\n")
+            self.stdout.write(f"{'page':>9} {'cold ms':>9} {'warm ms':>9} {'speedup':>8} {'cold q':>7} {'warm q':>7}")
+            for name, view, path in PAGES:
+                cold_ms, cold_queries = self._measure(view, path, options['iterations'], cold=True)
+                warm_ms, warm_queries = self._measure(view, path, options['iterations'], cold=False)
+                self.stdout.write(
+                    f"{name:>9} {cold_ms:>9.1f} {warm_ms:>9.1f} {cold_ms / warm_ms:>7.1f}x "
+                    f"{cold_queries:>7} {warm_queries:>7}"
+                )
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+    def _seed(self, count, images):
+        owner = get_user_model().objects.create_user(
+            username='cards', email='cards@example.com', password='benchmark'
+        )
+        currency = Currency.objects.create(code='USD', name='US Dollar', symbol='$')
+        properties = Property.objects.bulk_create([
+            Property(
+                owner=owner,
+                title=f"Benchmark listing {i}",
+                property_type='house',
+                street_address=f"{i} Enterprise Road",
+                suburb='Borrowdale',
+                city='Harare',
+                price=500 + i,
+                currency=currency,
+                listing_type='priority' if i % 3 == 0 else 'normal',
+                main_image=f"property_main_images/benchmark-{i}.jpg",
+                is_paid=True,
+            )
+            for i in range(count)
+        ])
+        PropertyImage.objects.bulk_create([
+            PropertyImage(property=prop, image=f"property_images/benchmark-{prop.pk}-{n}.jpg")
+            for prop in properties for n in range(images)
+        ])
+
+    def _measure(self, view, path, iterations, cold):
+        factory = RequestFactory()
+        cache.clear()
+        view(self._request(factory, path))  # warm-up: templates loaded, card fragments stored
+        timings = []
+        for _ in range(iterations):
+            if cold:
+                cache.clear()
+            request = self._request(factory, path)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                view(request)
+                timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), len(queries)
+
+    def _request(self, factory, path):
+        request = factory.get(path)
+        request.user = AnonymousUser()
+        return request
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-19 11:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0007_remove_property_current_step'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_paid', True)), fields=['city', 'suburb'], name='listing_paid_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_paid', True)), fields=['property_type', 'price'], name='listing_paid_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_paid', True)), fields=['-created_at'], name='listing_paid_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('is_paid', True)), fields=['listing_type', '-created_at'], name='listing_paid_featured_idx'),
+        ),
+    ]
@@ -100,6 +100,31 @@ class Property(models.Model):
     #Metadata
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Partial indexes: every public query filters on is_paid=True
+        indexes = [
+            models.Index(fields=['city', 'suburb'], condition=models.Q(is_paid=True), name='listing_paid_location_idx'),
+            models.Index(fields=['property_type', 'price'], condition=models.Q(is_paid=True), name='listing_paid_type_price_idx'),
+            models.Index(fields=['-created_at'], condition=models.Q(is_paid=True), name='listing_paid_recent_idx'),
+            models.Index(fields=['listing_type', '-created_at'], condition=models.Q(is_paid=True), name='listing_paid_featured_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so unpublishing (paid -> unpaid) still counts as a public change
+        instance._loaded_is_paid = instance.__dict__.get('is_paid', True)
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_is_paid = self.is_paid
+
+    @property
+    def was_paid(self):
+        """Whether the listing was public when loaded from the database."""
+        return getattr(self, '_loaded_is_paid', False)
+
     @property
     def google_maps_directions_url(self):
         if self.location:
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from tourwise_website.pagecache import invalidate_pages
+from .cache import bump_listings_version
+from .models import Property, PropertyImage
+
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, **kwargs):
+    # Drafts are never visible, but unpublishing a paid listing is a public change
+    if instance.is_paid or instance.was_paid:
+        bump_listings_version()
+        invalidate_pages('listings', f"property:{instance.pk}")
+
+
+@receiver(post_delete, sender=Property)
+def property_deleted(sender, instance, **kwargs):
+    if instance.is_paid:
+        bump_listings_version()
+        invalidate_pages('listings', f"property:{instance.pk}")
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyImage)
+def property_image_changed(sender, instance, **kwargs):
+    # Listing cards show the image carousel too
+    if Property.objects.filter(pk=instance.property_id, is_paid=True).exists():
+        invalidate_pages('listings', f"property:{instance.property_id}")
+
+
+@receiver(m2m_changed, sender=Property.amenities.through)
+def property_amenities_changed(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Property) and instance.is_paid:
+        invalidate_pages(f"property:{instance.pk}")
@@ -0,0 +1,65 @@
+"""
+Cached property card rendering.
+
+``{% property_cards properties 'grid' %}`` renders one card per listing
+from ``listings/partials/property_card_<layout>.html``. Each rendered card
+is cached under (layout, card class, property id, content version), where
+the content version is the listing's ``property:<pk>`` page-cache tag,
+bumped whenever the listing, its images or its amenities change. A page of
+cards costs two ``get_many`` calls, and template evaluation only for cards
+that changed since they were last rendered.
+
+Tag versions are only shared across workers with a shared cache; with
+per-process caches an edit handled by one worker bumps that worker's tag
+only. Cards therefore expire with the page cache, which bounds how long
+another worker can show a stale card.
+"""
+from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from tourwise_website.pagecache import PAGE_CACHE_TIMEOUT, tag_versions
+
+register = template.Library()
+
+CARD_LAYOUTS = ('grid', 'carousel', 'list', 'home', 'home_mobile')
+CARD_CACHE_TIMEOUT = PAGE_CACHE_TIMEOUT
+
+
+@register.simple_tag
+def property_cards(properties, layout, card_class=''):
+    """
+    Render the cards for a list of properties.
+
+    Args:
+        properties: Iterable of Property objects
+        layout: One of CARD_LAYOUTS
+        card_class: Extra CSS class on the card, e.g. 'featured-card'
+    """
+    if layout not in CARD_LAYOUTS:
+        raise template.TemplateSyntaxError(f"Unknown property card layout: {layout}")
+    properties = list(properties)
+    if not properties:
+        return ''
+
+    versions = tag_versions([f"property:{prop.pk}" for prop in properties])
+    keys = [
+        f"card:{layout}:{card_class}:{prop.pk}:{version}"
+        for prop, version in zip(properties, versions)
+    ]
+    cached = cache.get_many(keys)
+
+    cards, rendered = [], {}
+    for prop, key in zip(properties, keys):
+        card = cached.get(key)
+        if card is None:
+            card = render_to_string(
+                f"listings/partials/property_card_{layout}.html",
+                {'property': prop, 'card_class': card_class},
+            )
+            rendered[key] = card
+        cards.append(card)
+    if rendered:
+        cache.set_many(rendered, CARD_CACHE_TIMEOUT)
+    return mark_safe(''.join(cards))
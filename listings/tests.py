@@ -1,3 +1,121 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.template import Context, Template
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from listings.locations import resolve_location, location_filter
+from listings.models import Property
 
-# Create your tests here.
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class LocationResolverTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username="locator", email="loc@example.com", password="password")
+        for suburb, city in [("Borrowdale Brooke", "Harare"), ("Borrowdale", "Harare"), ("Hillside", "Bulawayo")]:
+            Property.objects.create(owner=user, suburb=suburb, city=city, is_paid=True)
+
+    def test_aliases_and_typos_resolve_to_stored_values(self):
+        self.assertEqual(resolve_location("Borrowdale Brook", "").suburb, "Borrowdale Brooke")
+        self.assertEqual(resolve_location("", "harare cbd").city, "Harare")
+        self.assertEqual(resolve_location("", "Bulawyo").city, "Bulawayo")
+
+    def test_suburb_given_as_city_resolves_to_suburb_and_city(self):
+        location = resolve_location("", "borrowdale")
+        self.assertEqual((location.suburb, location.city), ("Borrowdale", "Harare"))
+
+    def test_suburb_outside_requested_city_is_not_matched(self):
+        location = resolve_location("Hillside", "Harare")
+        self.assertIsNone(location.suburb)
+        self.assertEqual(location.unmatched_suburb, "Hillside")
+
+    def test_filter_uses_exact_values(self):
+        matches = Property.objects.filter(location_filter("borrowdale brook", "HARARE CBD"))
+        self.assertEqual([p.suburb for p in matches], ["Borrowdale Brooke"])
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="cached", email="cached@example.com", password="password")
+        image = "property_main_images/listing.jpg"
+        self.listing = Property.objects.create(
+            owner=self.user, title="Garden cottage", city="Harare", main_image=image, is_paid=True
+        )
+        self.other = Property.objects.create(owner=self.user, title="City flat", city="Harare", main_image=image, is_paid=True)
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        url = reverse("property_detail", args=[self.listing.pk])
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "miss")
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"utm_source": "newsletter"})
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertContains(response, "Garden cottage")
+
+    def test_changes_purge_only_pages_tagged_with_the_listing(self):
+        detail = reverse("property_detail", args=[self.listing.pk])
+        other_detail = reverse("property_detail", args=[self.other.pk])
+        search = f"{reverse('search_results')}?location=Harare"
+        for url in (detail, other_detail, search):
+            self.client.get(url)
+
+        self.listing.title = "Renovated cottage"
+        self.listing.save()
+
+        self.assertContains(self.client.get(detail), "Renovated cottage")
+        self.assertEqual(self.client.get(search)["X-Page-Cache"], "miss")
+        self.assertEqual(self.client.get(other_detail)["X-Page-Cache"], "hit")
+
+    def test_unpublishing_purges_cached_pages(self):
+        detail = reverse("property_detail", args=[self.listing.pk])
+        recent = reverse("recent_listings")
+        self.client.get(detail)
+        self.assertContains(self.client.get(recent), "Garden cottage")
+
+        self.listing.is_paid = False
+        self.listing.save()
+
+        self.assertEqual(self.client.get(detail).status_code, 404)
+        self.assertNotContains(self.client.get(recent), "Garden cottage")
+
+    def test_logged_in_users_bypass_the_cache(self):
+        url = reverse("recent_listings")
+        self.client.get(url)
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertNotIn("X-Page-Cache", response)
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class PropertyCardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="cards", email="cards@example.com", password="password")
+        image = "property_main_images/listing.jpg"
+        self.listing = Property.objects.create(
+            owner=self.user, title="Garden cottage", city="Harare", main_image=image, is_paid=True
+        )
+
+    def render(self):
+        template = Template("{% load property_cards %}{% property_cards properties 'grid' %}")
+        return template.render(Context({"properties": Property.objects.filter(pk=self.listing.pk)}))
+
+    def test_cached_cards_skip_rendering_queries(self):
+        self.render()
+        # Only the listing query itself; no image or currency lookups
+        with self.assertNumQueries(1):
+            html = self.render()
+        self.assertIn("Garden cottage", html)
+
+    def test_saving_a_listing_rerenders_its_card(self):
+        self.render()
+        self.listing.title = "Renovated cottage"
+        self.listing.save()
+        self.assertIn("Renovated cottage", self.render())
@@ -11,6 +11,8 @@ from django.http import JsonResponse
 from django.db.models import Q
 from django.contrib.gis.geos import Point
 from django.db import transaction
+from tourwise_website.ratelimit import rate_limit
+from tourwise_website.pagecache import cache_page_for_anonymous
 
 
 # ==================== UNIFIED SINGLE-PAGE FORM ====================
@@ -233,6 +235,7 @@ def upload_profile_photo(request, property_id):
         property_obj.save()
     return redirect('edit_listing', property_id=property_id)
 
+@cache_page_for_anonymous(tags=('property:{pk}',))
 def property_detail(request, pk):
     property_obj = get_object_or_404(Property, pk=pk, is_paid=True)  # Only show paid listings
 
@@ -247,12 +250,14 @@ def property_detail(request, pk):
         'longitude': property_obj.longitude,
     })
 
+@cache_page_for_anonymous(tags=('listings',))
 def recent_listings_view(request):
     two_weeks_ago = timezone.now() - timedelta(weeks=2)
     recent_properties =  Property.objects.filter(is_paid=True,created_at__gte=two_weeks_ago).order_by('-created_at')
     return render(request, 'listings/recent_listings.html', {'properties': recent_properties, 'title': 'Recent Listings'})
 
 
+@cache_page_for_anonymous(tags=('listings',))
 def featured_listings_view(request):
     featured_properties = list(Property.objects.filter(is_paid=True, listing_type='priority').order_by('-created_at'))
 
@@ -262,6 +267,7 @@ def featured_listings_view(request):
 
     return render(request, 'listings/featured_listings.html', {'properties': featured_properties, 'title': 'Featured Listings'})
 
+@rate_limit('location_suggestions')
 def location_suggestions(request):
     """
     Enhanced location autocomplete with Zimbabwe priority
@@ -1,4 +1,17 @@
 from django.contrib import admin
-from .models import Payment
+from .models import OutboxMessage, Payment, PaymentEvent
 
 admin.site.register(Payment)
+
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ('payment', 'from_status', 'to_status', 'source', 'created_at')
+    list_filter = ('to_status', 'source')
+    raw_id_fields = ('payment',)
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('topic', 'created_at', 'processed_at', 'attempts')
+    list_filter = ('topic', ('processed_at', admin.EmptyFieldListFilter))
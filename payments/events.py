@@ -0,0 +1,28 @@
+"""
+Payment status change notifications for streaming clients.
+
+Whoever moves a payment out of pending (webhook, background poller,
+simulation) publishes the new status under a per-reference cache key.
+The ``payment_events`` stream checks that key every second and only
+re-reads the database every few seconds and before closing, since with a
+per-process cache a change made by another worker or the poller is never
+seen there.
+"""
+from django.core.cache import cache
+
+# Long enough for any open stream to notice; streams reconnect within a minute
+PAYMENT_EVENT_TIMEOUT = 60 * 10
+
+
+def payment_event_key(reference):
+    return f"payments:status:{reference}"
+
+
+def publish_payment_status(reference, status):
+    """Record a payment's new status for streams waiting on it."""
+    cache.set(payment_event_key(reference), status, timeout=PAYMENT_EVENT_TIMEOUT)
+
+
+async def aget_published_status(reference):
+    """Return the last published status for a payment, or None."""
+    return await cache.aget(payment_event_key(reference))
@@ -0,0 +1,163 @@
+"""
+Django management command to load test the payment flow offline
+Run with: python manage.py benchmark_payments --payments 500 --concurrency 16
+
+Creates a throwaway test database, seeds hosts with unpaid listings, starts
+the stub Paynow server (payments/stub_paynow.py) and a live server for its
+result callbacks, then drives initiate_payment -> webhook -> is_paid for
+every listing and reports initiation latency and end-to-end throughput.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.testcases import LiveServerThread
+from django.urls import reverse
+
+from listings.models import Property
+from payments.models import Payment
+from payments.services import paynow_service
+from payments.stub_paynow import StubPaynowServer
+
+STUB_INTEGRATION_KEY = 'benchmark-key'
+
+
+class Command(BaseCommand):
+    help = 'Load test initiate_payment -> Paynow webhook -> is_paid against a stub Paynow server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=200, help='Listings to pay for')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent initiating clients')
+        parser.add_argument('--paynow-latency-ms', type=float, default=100, help='Stub Paynow response delay')
+        parser.add_argument('--settle-ms', type=float, default=500, help='Delay before the stub calls the result URL')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of initiations the stub rejects')
+        parser.add_argument('--decline-rate', type=float, default=0.0, help='Share of payments settling as cancelled')
+        parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait for webhooks to settle')
+
+    def handle(self, *args, **options):
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        live_server = self._start_live_server()
+        stub = StubPaynowServer(
+            integration_key=STUB_INTEGRATION_KEY,
+            latency_ms=options['paynow_latency_ms'],
+            failure_rate=options['failure_rate'],
+            decline_rate=options['decline_rate'],
+            settle_ms=options['settle_ms'],
+        ).start()
+
+        overrides = {
+            'PAYNOW_BASE_URL': stub.base_url,
+            'PAYNOW_INTEGRATION_KEY': STUB_INTEGRATION_KEY,
+            'PAYNOW_RESULT_URL': f"http://{live_server.host}:{live_server.port}{reverse('payment_update')}",
+            'PAYNOW_MODE': 'live',
+            'RATE_LIMIT_ENABLED': False,
+        }
+        originals = {name: getattr(settings, name, None) for name in overrides}
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        # Rebuild the client against the stub
+        paynow_service._paynow = None
+
+        try:
+            users = self._seed(options['payments'])
+            self.stdout.write(f"Seeded {len(users)} unpaid listings; stub Paynow at {stub.base_url}\n")
+            self._report(stub, *self._run(users, options))
+        finally:
+            for name, value in originals.items():
+                setattr(settings, name, value)
+            paynow_service._paynow = None
+            stub.stop()
+            live_server.terminate()
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+    def _start_live_server(self):
+        # In-memory SQLite can only be shared with the server thread through the same connection
+        connections_override = {
+            conn.alias: conn for conn in connections.all()
+            if conn.vendor == 'sqlite' and conn.is_in_memory_db()
+        }
+        for conn in connections_override.values():
+            conn.inc_thread_sharing()
+        server = LiveServerThread('127.0.0.1', lambda app: app, connections_override=connections_override)
+        server.daemon = True
+        server.start()
+        server.is_ready.wait()
+        if server.error:
+            raise server.error
+        return server
+
+    def _seed(self, count):
+        users = []
+        for i in range(count):
+            user = get_user_model().objects.create_user(
+                username=f"host{i}",
+                email=f"host{i}@example.com",
+                password='benchmark',
+                phone_number=f"077{i:07d}",
+                user_type='host',
+            )
+            Property.objects.create(owner=user, title=f"Benchmark listing {i}", price=100)
+            users.append(user)
+        return users
+
+    def _run(self, users, options):
+        def initiate(user):
+            client = Client()
+            client.force_login(user)
+            property_id = Property.objects.filter(owner=user).values_list('pk', flat=True).get()
+            started = time.perf_counter()
+            response = client.get(reverse('initiate_payment', args=[property_id]))
+            elapsed = (time.perf_counter() - started) * 1000
+            connections.close_all()
+            ok = response.status_code == 200 and b'Payment Instructions' in response.content
+            return elapsed, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            samples = list(pool.map(initiate, users))
+        initiated = time.perf_counter() - started
+
+        deadline = time.perf_counter() + options['timeout']
+        while time.perf_counter() < deadline:
+            if not Payment.objects.filter(status=Payment.PENDING).exclude(poll_url__isnull=True).exists():
+                break
+            time.sleep(0.05)
+        settled = time.perf_counter() - started
+        return samples, initiated, settled
+
+    def _report(self, stub, samples, initiated, settled):
+        latencies = sorted(latency for latency, _ in samples) or [0.0]
+        if len(latencies) > 1:
+            cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = latencies[0]
+
+        paid = Payment.objects.filter(status=Payment.PAID).count()
+        failed = Payment.objects.filter(status=Payment.FAILED).count()
+        pending = Payment.objects.filter(status=Payment.PENDING).count()
+        listed = Property.objects.filter(is_paid=True).count()
+
+        self.stdout.write(
+            f"Initiated {len(samples)} payments in {initiated:.2f}s ({len(samples) / initiated:.1f}/s), "
+            f"{sum(1 for _, ok in samples if not ok)} initiation errors"
+        )
+        self.stdout.write(f"Initiation latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}")
+        self.stdout.write(
+            f"Settled in {settled:.2f}s: {paid} paid ({paid / settled:.1f}/s end to end), "
+            f"{failed} failed, {pending} still pending; {listed} listings live"
+        )
+        self.stdout.write(
+            f"Stub Paynow: {stub.stats['initiated']} initiated, {stub.stats['rejected']} rejected, "
+            f"{stub.stats['polls']} polls, {stub.stats['callbacks']} callbacks, "
+            f"{stub.stats['callback_errors']} callback errors"
+        )
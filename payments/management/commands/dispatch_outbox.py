@@ -0,0 +1,31 @@
+"""
+Django management command to deliver queued outbox messages (listing activation after payment)
+Run with: python manage.py dispatch_outbox
+Run once (e.g. from cron) with: python manage.py dispatch_outbox --once
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.outbox import dispatch_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver outbox messages recorded alongside payment changes, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Deliver everything pending and exit')
+        parser.add_argument('--interval', type=float, default=1, help='Seconds to sleep when nothing is pending')
+        parser.add_argument('--batch-size', type=int, default=100, help='Messages delivered per batch')
+
+    def handle(self, *args, **options):
+        while True:
+            stats = dispatch_outbox(batch_size=options['batch_size'])
+            handled = stats['processed'] + stats['failed']
+            if handled:
+                self.stdout.write(f"Dispatched {stats['processed']} messages, {stats['failed']} failed")
+            # Keep draining while full batches come back
+            if handled < options['batch_size']:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
@@ -0,0 +1,35 @@
+"""
+Django management command to poll Paynow for pending payment statuses
+Run with: python manage.py poll_payments
+Run once (e.g. from cron) with: python manage.py poll_payments --once
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.poller import claim_due_payments, poll_payments
+
+
+class Command(BaseCommand):
+    help = 'Check pending payments with Paynow in the background and record their status'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process all due payments and exit')
+        parser.add_argument('--interval', type=float, default=2, help='Seconds to sleep when nothing is due')
+        parser.add_argument('--batch-size', type=int, default=50, help='Payments claimed per batch')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent Paynow requests')
+
+    def handle(self, *args, **options):
+        while True:
+            payments = claim_due_payments(options['batch_size'])
+            if payments:
+                stats = poll_payments(payments, workers=options['workers'])
+                self.stdout.write(
+                    f"Polled {len(payments)} payments: {stats['paid']} paid, {stats['failed']} failed, "
+                    f"{stats['pending']} pending, {stats['errors']} errors"
+                )
+            # Keep draining while full batches come back
+            if len(payments) < options['batch_size']:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
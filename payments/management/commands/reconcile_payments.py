@@ -0,0 +1,33 @@
+"""
+Django management command to reconcile stuck payments with Paynow
+Run with: python manage.py reconcile_payments --older-than 30
+Preview without writing: python manage.py reconcile_payments --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from payments.reconciliation import reconcile_payments
+
+
+class Command(BaseCommand):
+    help = 'Check pending and failed payments with Paynow and correct their status in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=30, help='Minutes since the payment was last updated')
+        parser.add_argument('--batch-size', type=int, default=500, help='Payments checked and written per batch')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent Paynow requests')
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without writing them')
+
+    def handle(self, *args, **options):
+        stats = reconcile_payments(
+            older_than_minutes=options['older_than'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+        rate = stats['checked'] / stats['seconds'] if stats['seconds'] else 0
+        prefix = "[dry run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Checked {stats['checked']} payments in {stats['seconds']:.1f}s ({rate:.0f}/s): "
+            f"{stats['paid']} marked paid, {stats['failed']} marked failed, "
+            f"{stats['unchanged']} unchanged, {stats['errors']} errors"
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-19 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_alter_payment_listing_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='next_poll_at',
+            field=models.DateTimeField(blank=True, help_text='When the background poller should next check this payment', null=True),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='poll_attempts',
+            field=models.PositiveIntegerField(default=0, help_text='Status checks made by the background poller'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'next_poll_at'], name='payment_poll_queue_idx'),
+        ),
+    ]
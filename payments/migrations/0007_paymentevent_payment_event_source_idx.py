@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-19 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentevent',
+            index=models.Index(fields=['source', 'created_at'], name='payment_event_source_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from listings.models import Property
 
 class Payment(models.Model):
@@ -63,6 +64,15 @@ class Payment(models.Model):
         null=True,
         help_text="URL to poll for payment status updates"
     )
+    poll_attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Status checks made by the background poller"
+    )
+    next_poll_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="When the background poller should next check this payment"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -70,6 +80,11 @@ class Payment(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Payment'
         verbose_name_plural = 'Payments'
+        indexes = [
+            # Pending payments are a small, hot subset; pollers only ever scan those
+            models.Index(fields=['next_poll_at'], condition=models.Q(status='pending'), name='payment_pending_poll_idx'),
+            models.Index(fields=['created_at'], name='payment_created_idx'),
+        ]
 
     def __str__(self):
         return f"Payment #{self.id} - {self.property.title} ({self.get_status_display()})"
@@ -77,3 +92,51 @@ class Payment(models.Model):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
+
+class PaymentEvent(models.Model):
+    """
+    Append-only record of a payment status transition.
+
+    Rows are only ever inserted, with the foreign key index and one for the
+    funnel report's range scan by source, to keep writes on the payment path
+    cheap.
+    """
+    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='events')
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20)
+    source = models.CharField(max_length=20, help_text="What made the change, e.g. webhook, poller, reconcile")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['source', 'created_at'], name='payment_event_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"Payment #{self.payment_id}: {self.from_status or '-'} -> {self.to_status} ({self.source})"
+
+
+class OutboxMessage(models.Model):
+    """
+    Follow-up work recorded in the same transaction as a payment change.
+
+    The ``dispatch_outbox`` command delivers pending messages in batches
+    (see payments/outbox.py), so downstream updates happen exactly when the
+    change commits, without running on the webhook path.
+    """
+    topic = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['pk']
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(processed_at__isnull=True), name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({'done' if self.processed_at else 'pending'})"
@@ -0,0 +1,119 @@
+"""
+Transactional outbox for work that follows a payment.
+
+A successful payment only flips ``Payment.status`` and ``Property.is_paid``
+and, in the same transaction, records a ``listing.activated`` message; edits
+to paid listings record ``listing.changed`` (see payments/signals.py, topics
+in listings/events.py). Everything downstream (listing cache invalidation,
+the semantic search index, and future notifications) is delivered from the
+outbox by the ``dispatch_outbox`` command in batches, so it never runs on the
+webhook path and never happens for a change that rolled back.
+
+Cache invalidation is the exception: with the default per-process cache,
+invalidating only in the dispatcher would never reach the web workers, so
+the process that activates a listing also drops its own cached listing
+results and pages once the transaction commits.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from chatbot.semantic import reindex_listings
+from listings.cache import bump_listings_version
+from listings.events import LISTING_ACTIVATED, LISTING_CHANGED
+from tourwise_website.pagecache import invalidate_pages
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Messages failing this many times are left for inspection in the admin
+OUTBOX_MAX_ATTEMPTS = 5
+
+
+def enqueue(topic, payloads):
+    """
+    Record outbox messages; call inside the transaction making the change.
+
+    Args:
+        topic: Message topic, e.g. LISTING_ACTIVATED
+        payloads: Iterable of JSON-serialisable dicts, one message each
+    """
+    OutboxMessage.objects.bulk_create([OutboxMessage(topic=topic, payload=payload) for payload in payloads])
+
+
+def invalidate_activated_listings(property_ids):
+    """
+    Drop this process's cached listing results and pages after activation.
+
+    Call inside the activating transaction; the invalidation runs on commit.
+    """
+    if not property_ids:
+        return
+    # A cache outage must not fail the payment; the dispatcher invalidates again
+    transaction.on_commit(lambda: _invalidate_listings(property_ids), robust=True)
+
+
+def _invalidate_listings(property_ids):
+    bump_listings_version()
+    invalidate_pages('listings', *[f"property:{property_id}" for property_id in property_ids])
+
+
+def activate_listings(payloads):
+    """Fan out newly paid listings to caches and the search index."""
+    property_ids = {payload['property_id'] for payload in payloads}
+    # One bump and one embedding call cover the batch
+    _invalidate_listings(property_ids)
+    reindex_listings(property_ids)
+
+
+def reindex_changed_listings(payloads):
+    """Re-embed edited, unpublished or deleted listings for semantic search."""
+    reindex_listings(payload['property_id'] for payload in payloads)
+
+
+HANDLERS = {
+    LISTING_ACTIVATED: activate_listings,
+    LISTING_CHANGED: reindex_changed_listings,
+}
+
+
+def dispatch_outbox(batch_size=100):
+    """
+    Deliver one batch of pending outbox messages.
+
+    Messages are claimed with SKIP LOCKED so several dispatchers can run,
+    handed to their topic's handler together, and marked processed. A
+    failing handler leaves its messages pending with the error recorded.
+
+    Returns:
+        dict: 'processed' and 'failed' message counts
+    """
+    stats = {'processed': 0, 'failed': 0}
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True, attempts__lt=OUTBOX_MAX_ATTEMPTS)
+            .order_by('pk')[:batch_size]
+        )
+        by_topic = defaultdict(list)
+        for message in messages:
+            by_topic[message.topic].append(message)
+
+        for topic, batch in by_topic.items():
+            ids = [message.pk for message in batch]
+            try:
+                handler = HANDLERS[topic]
+                with transaction.atomic():
+                    handler([message.payload for message in batch])
+            except Exception as e:
+                logger.exception(f"Outbox handler for {topic} failed on {len(batch)} messages: {e}")
+                OutboxMessage.objects.filter(pk__in=ids).update(attempts=F('attempts') + 1, last_error=str(e))
+                stats['failed'] += len(batch)
+            else:
+                OutboxMessage.objects.filter(pk__in=ids).update(processed_at=timezone.now(), attempts=F('attempts') + 1)
+                stats['processed'] += len(batch)
+    return stats
@@ -0,0 +1,114 @@
+"""
+Background polling of pending Paynow payments.
+
+Browsers waiting on the instructions page used to trigger a Paynow status
+request on every poll. Instead, the ``poll_payments`` command claims due
+pending payments in batches, checks them with Paynow concurrently (bounded
+by a thread pool), and records the outcome. Payments still pending are
+rescheduled with exponential backoff, so ``payment_status`` only has to
+read the database.
+"""
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Payment
+from .services import PAYNOW_FAILED_STATUSES, mark_payment_failed, mark_payment_paid, paynow_service
+
+logger = logging.getLogger(__name__)
+
+POLL_BASE_DELAY = 5
+POLL_MAX_DELAY = 300
+# A claimed batch is hidden from other pollers for this long
+POLL_CLAIM_SECONDS = 60
+# Pending payments older than this are marked failed
+POLL_GIVE_UP_AFTER = timedelta(hours=24)
+
+
+def poll_backoff(attempts):
+    """Seconds to wait before the next check, with jitter to spread bursts."""
+    delay = min(POLL_BASE_DELAY * 2 ** attempts, POLL_MAX_DELAY)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_due_payments(batch_size):
+    """
+    Claim up to batch_size pending payments that are due for a check.
+
+    Claimed rows have next_poll_at pushed forward so concurrent pollers skip
+    them; they are rescheduled properly once polled.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = (
+            Payment.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(next_poll_at__isnull=True) | Q(next_poll_at__lte=now), status=Payment.PENDING)
+            .exclude(poll_url__isnull=True)
+            .order_by(F('next_poll_at').asc(nulls_first=True))
+        )
+        payments = list(due[:batch_size])
+        Payment.objects.filter(pk__in=[p.pk for p in payments]).update(
+            next_poll_at=now + timedelta(seconds=POLL_CLAIM_SECONDS)
+        )
+    return payments
+
+
+def fetch_paynow_status(payment):
+    """Return (payment, status, error) without raising, for use with pool.map."""
+    try:
+        return payment, paynow_service.fetch_status(payment), None
+    except Exception as e:
+        return payment, None, e
+
+
+def poll_payments(payments, workers=8):
+    """
+    Check payments with Paynow concurrently and record the results.
+
+    Only the HTTP calls run in worker threads; database writes happen on
+    the calling thread.
+
+    Returns:
+        dict: Counts of 'paid', 'failed', 'pending' and 'errors'
+    """
+    stats = {'paid': 0, 'failed': 0, 'pending': 0, 'errors': 0}
+    if not payments:
+        return stats
+
+    now = timezone.now()
+    with ThreadPoolExecutor(max_workers=min(workers, len(payments))) as pool:
+        results = list(pool.map(fetch_paynow_status, payments))
+
+    for payment, status, error in results:
+        if status == 'paid':
+            mark_payment_paid(payment, source='poller')
+            stats['paid'] += 1
+            continue
+        if status in PAYNOW_FAILED_STATUSES:
+            mark_payment_failed(payment, source='poller')
+            stats['failed'] += 1
+            continue
+        if error is not None:
+            # Transient upstream errors are retried with the same backoff
+            logger.warning(f"Paynow status check failed for {payment.reference}: {error}")
+            stats['errors'] += 1
+
+        if payment.created_at < now - POLL_GIVE_UP_AFTER:
+            logger.info(f"Giving up on payment {payment.reference} after {payment.poll_attempts + 1} checks")
+            mark_payment_failed(payment, source='poller')
+            stats['failed'] += 1
+            continue
+
+        Payment.objects.filter(pk=payment.pk, status=Payment.PENDING).update(
+            poll_attempts=F('poll_attempts') + 1,
+            next_poll_at=now + timedelta(seconds=poll_backoff(payment.poll_attempts)),
+        )
+        stats['pending'] += 1
+
+    return stats
@@ -0,0 +1,132 @@
+"""
+Reconciliation of stuck payments against Paynow.
+
+Pending or failed payments whose webhook was lost (or that the poller gave
+up on) are streamed from the database with ``iterator()``, checked with
+Paynow on a bounded thread pool one batch at a time, and corrected with a
+few bulk UPDATEs per batch rather than a save per row.
+"""
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from listings.events import LISTING_ACTIVATED
+from listings.models import Property
+from .events import publish_payment_status
+from .models import Payment, PaymentEvent
+from .outbox import enqueue, invalidate_activated_listings
+from .poller import fetch_paynow_status
+from .services import PAYNOW_FAILED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _apply(paid_ids, failed_ids, now):
+    """
+    Write one batch of outcomes.
+
+    Returns:
+        tuple: (payments marked paid, payments marked failed)
+    """
+    with transaction.atomic():
+        # Lock what is still eligible so concurrent webhooks can't double-apply
+        newly_paid = list(
+            Payment.objects.select_for_update()
+            .filter(pk__in=paid_ids, status__in=[Payment.PENDING, Payment.FAILED])
+            .values_list('pk', 'property_id', 'reference', 'status')
+        )
+        Payment.objects.filter(pk__in=[pk for pk, _, _, _ in newly_paid]).update(status=Payment.PAID, updated_at=now)
+        property_ids = [property_id for _, property_id, _, _ in newly_paid]
+        Property.objects.filter(pk__in=property_ids, is_paid=False).update(is_paid=True)
+
+        newly_failed = list(
+            Payment.objects.select_for_update()
+            .filter(pk__in=failed_ids, status=Payment.PENDING)
+            .values_list('pk', 'reference')
+        )
+        Payment.objects.filter(pk__in=[pk for pk, _ in newly_failed]).update(status=Payment.FAILED, updated_at=now)
+
+        PaymentEvent.objects.bulk_create(
+            [
+                PaymentEvent(payment_id=pk, from_status=status, to_status=Payment.PAID, source='reconcile', created_at=now)
+                for pk, _, _, status in newly_paid
+            ] + [
+                PaymentEvent(payment_id=pk, from_status=Payment.PENDING, to_status=Payment.FAILED, source='reconcile', created_at=now)
+                for pk, _ in newly_failed
+            ]
+        )
+
+        enqueue(LISTING_ACTIVATED, [
+            {'property_id': property_id, 'payment_id': pk} for pk, property_id, _, _ in newly_paid
+        ])
+        invalidate_activated_listings(property_ids)
+
+        def notify():
+            for _, _, reference, _ in newly_paid:
+                publish_payment_status(reference, Payment.PAID)
+            for _, reference in newly_failed:
+                publish_payment_status(reference, Payment.FAILED)
+
+        transaction.on_commit(notify)
+    return len(newly_paid), len(newly_failed)
+
+
+def reconcile_payments(older_than_minutes=30, batch_size=500, workers=16, dry_run=False):
+    """
+    Check pending and failed payments older than a cutoff with Paynow and fix their status.
+
+    Args:
+        older_than_minutes: Only payments untouched for this long are checked
+        batch_size: Rows fetched, checked and written per batch
+        workers: Concurrent Paynow requests
+        dry_run: Check and count, but don't write
+
+    Returns:
+        Counter: 'checked', 'paid', 'failed', 'unchanged', 'errors', plus 'seconds'
+    """
+    started = time.perf_counter()
+    now = timezone.now()
+    payments = (
+        Payment.objects
+        .filter(status__in=[Payment.PENDING, Payment.FAILED], updated_at__lt=now - timedelta(minutes=older_than_minutes))
+        .exclude(poll_url__isnull=True)
+        .only('pk', 'reference', 'poll_url', 'status', 'property_id', 'created_at', 'updated_at')
+        .order_by('pk')
+    )
+
+    stats = Counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in _batches(payments.iterator(chunk_size=batch_size), batch_size):
+            paid_ids, failed_ids = [], []
+            for payment, status, error in pool.map(fetch_paynow_status, batch):
+                stats['checked'] += 1
+                if error is not None:
+                    logger.warning(f"Reconciliation check failed for {payment.reference}: {error}")
+                    stats['errors'] += 1
+                elif status == 'paid':
+                    paid_ids.append(payment.pk)
+                elif status in PAYNOW_FAILED_STATUSES and payment.status == Payment.PENDING:
+                    failed_ids.append(payment.pk)
+
+            if dry_run:
+                paid, failed = len(paid_ids), len(failed_ids)
+            else:
+                paid, failed = _apply(paid_ids, failed_ids, timezone.now())
+            stats['paid'] += paid
+            stats['failed'] += failed
+
+    stats['unchanged'] = stats['checked'] - stats['errors'] - stats['paid'] - stats['failed']
+    stats['seconds'] = time.perf_counter() - started
+    return stats
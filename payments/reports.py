@@ -0,0 +1,88 @@
+"""
+Payment funnel report: initiations, payments and revenue by listing type and day.
+
+The report is two grouped aggregates over a ``created_at`` range, bounded
+by a timestamp rather than a date cast so ``payment_created_idx`` and
+``payment_event_source_idx`` serve it, cached for a few minutes so dashboards refreshing it don't rescan the
+window on every load.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Payment, PaymentEvent
+
+REPORT_CACHE_TIMEOUT = 60 * 5
+REPORT_MAX_DAYS = 366
+
+
+def funnel_report(days=30):
+    """
+    Aggregate the payment funnel for the last ``days`` days.
+
+    Args:
+        days: Window size, counting today
+
+    Returns:
+        list: One dict per (day, listing_type) with 'attempts' (initiations,
+        including retries), 'payments', 'paid', 'revenue' and 'conversion'
+        (paid / payments), newest day first
+    """
+    today = timezone.localdate()
+    key = f"payments:funnel:{today.isoformat()}:{days}"
+    rows = cache.get(key)
+    if rows is None:
+        rows = _build_report(today - timedelta(days=days - 1))
+        cache.set(key, rows, timeout=REPORT_CACHE_TIMEOUT)
+    return rows
+
+
+def _build_report(since):
+    start = timezone.make_aware(datetime.combine(since, time.min))
+    payments = (
+        Payment.objects
+        .filter(created_at__gte=start)
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'listing_type')
+        .annotate(
+            payments=Count('pk'),
+            paid=Count('pk', filter=Q(status=Payment.PAID)),
+            revenue=Sum('amount', filter=Q(status=Payment.PAID)),
+        )
+    )
+    attempts = (
+        PaymentEvent.objects
+        .filter(source='initiate', to_status=Payment.PENDING, created_at__gte=start)
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'payment__listing_type')
+        .annotate(attempts=Count('pk'))
+    )
+
+    rows = {}
+    for row in payments:
+        rows[row['day'], row['listing_type']] = {
+            'day': row['day'].isoformat(),
+            'listing_type': row['listing_type'],
+            'attempts': 0,
+            'payments': row['payments'],
+            'paid': row['paid'],
+            'revenue': f"{row['revenue'] or Decimal('0'):.2f}",
+            'conversion': round(row['paid'] / row['payments'], 4),
+        }
+    for row in attempts:
+        entry = rows.setdefault((row['day'], row['payment__listing_type']), {
+            'day': row['day'].isoformat(),
+            'listing_type': row['payment__listing_type'],
+            'attempts': 0,
+            'payments': 0,
+            'paid': 0,
+            'revenue': '0.00',
+            'conversion': 0.0,
+        })
+        entry['attempts'] = row['attempts']
+
+    return sorted(rows.values(), key=lambda row: (row['day'], row['listing_type']), reverse=True)
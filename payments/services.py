@@ -1,46 +1,195 @@
 from paynow import Paynow
+from paynow.model import HashMismatchException, InitResponse, StatusResponse
+from requests.adapters import HTTPAdapter
+from urllib.parse import parse_qs
 from django.conf import settings
-from .models import Payment
+from django.db import transaction
+from django.utils import timezone
+from .events import publish_payment_status
+from .models import Payment, PaymentEvent
+from .outbox import enqueue, invalidate_activated_listings
+from listings.events import LISTING_ACTIVATED
+from listings.models import Property
+from accounts.utils import normalize_phone_number
+import hashlib
+import hmac
+import requests
+import threading
 import uuid
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
+# Paynow statuses after which a payment will never be paid
+PAYNOW_FAILED_STATUSES = {'cancelled', 'failed'}
 
-class PaynowService:
-    def __init__(self):
-        # Check if we're in development mode
-        self.is_test_mode = getattr(settings, 'PAYNOW_MODE', 'test') == 'test'
-        self.is_dev_mode = getattr(settings, 'DEBUG', False)
+# (connect, read) timeouts in seconds for Paynow HTTP calls
+PAYNOW_TIMEOUT = (5, 30)
+# Sized for the background poller's concurrent status checks
+PAYNOW_POOL_SIZE = 16
 
-        if self.is_dev_mode and self.is_test_mode:
-            logger.info("Running in DEVELOPMENT TEST MODE - payments will be simulated")
+# Development test mode: mock payments succeed this many seconds after creation
+MOCK_PAYMENT_DELAY = 10
+
+
+def mark_payment_paid(payment, source='check'):
+    """
+    Mark a payment and its property as paid, once.
 
-        self.paynow = Paynow(
-            integration_id=settings.PAYNOW_INTEGRATION_ID,
-            integration_key=settings.PAYNOW_INTEGRATION_KEY,
-            return_url=settings.PAYNOW_RETURN_URL,
-            result_url=settings.PAYNOW_RESULT_URL
+    The payment row is locked and moved to paid with a conditional UPDATE,
+    so concurrent webhook retries, pollers and browser checks can't
+    double-apply. The listing goes live in the same transaction, which also
+    queues a ``listing.activated`` outbox message for the downstream updates.
+
+    Args:
+        payment: Payment to settle
+        source: What observed the payment, recorded on the PaymentEvent
+
+    Returns:
+        bool: True if this call made the transition, False if it was already paid
+    """
+    with transaction.atomic():
+        previous = (
+            Payment.objects.select_for_update()
+            .filter(pk=payment.pk, status__in=[Payment.PENDING, Payment.FAILED])
+            .values_list('status', flat=True)
+            .first()
         )
+        if previous is None:
+            return False
+        Payment.objects.filter(pk=payment.pk, status=previous).update(status=Payment.PAID, updated_at=timezone.now())
+        PaymentEvent.objects.create(payment_id=payment.pk, from_status=previous, to_status=Payment.PAID, source=source)
+        Property.objects.filter(pk=payment.property_id).update(is_paid=True)
+        enqueue(LISTING_ACTIVATED, [{'property_id': payment.property_id, 'payment_id': payment.pk}])
+        invalidate_activated_listings([payment.property_id])
+        payment.status = Payment.PAID
+        transaction.on_commit(lambda: publish_payment_status(payment.reference, Payment.PAID))
+    return True
+
+
+def verify_paynow_hash(data, integration_key):
+    """
+    Check the hash Paynow sends with a status update.
+
+    Paynow hashes the field values in the order sent (excluding the hash
+    itself) followed by the integration key, with SHA-512.
+    """
+    received = data.get('hash', '')
+    if not received or not integration_key:
+        return False
+    values = ''.join(str(value) for key, value in data.items() if key.lower() != 'hash')
+    expected = hashlib.sha512(f"{values}{integration_key.lower()}".encode('utf-8')).hexdigest().upper()
+    return hmac.compare_digest(expected, received.upper())
 
-    def _format_phone_number(self, phone_number):
-        """Format phone number for Paynow"""
-        if not phone_number:
-            return None
 
-        # Remove spaces and special characters
-        phone = ''.join(filter(str.isdigit, phone_number))
+def mark_payment_failed(payment, source='check'):
+    """
+    Mark a payment as failed if it is still pending.
 
-        # Handle Zimbabwe numbers
-        if phone.startswith('263'):
-            return phone
-        elif phone.startswith('0'):
-            return '263' + phone[1:]
-        elif len(phone) == 9:
-            return '263' + phone
-        else:
-            return phone
+    Returns:
+        bool: True if the payment was pending and is now failed
+    """
+    with transaction.atomic():
+        updated = Payment.objects.filter(pk=payment.pk, status=Payment.PENDING).update(
+            status=Payment.FAILED, updated_at=timezone.now()
+        )
+        if updated:
+            PaymentEvent.objects.create(
+                payment_id=payment.pk, from_status=Payment.PENDING, to_status=Payment.FAILED, source=source
+            )
+    if updated:
+        payment.status = Payment.FAILED
+        publish_payment_status(payment.reference, Payment.FAILED)
+    return bool(updated)
+
+
+class PooledPaynow(Paynow):
+    """
+    Paynow SDK client that reuses one pooled HTTP session with timeouts.
+
+    The SDK sends every call with a bare ``requests.post`` (a new connection
+    and no timeout). These overrides keep the SDK's request building, hash
+    checks and response parsing, but send through a shared session.
+    """
+
+    def __init__(self, *args, base_url=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if base_url:
+            # Point initiation at another host, e.g. the local stub (payments/stub_paynow.py)
+            base_url = base_url.rstrip('/')
+            self.URL_INITIATE_TRANSACTION = f"{base_url}/interface/initiatetransaction"
+            self.URL_INITIATE_MOBILE_TRANSACTION = f"{base_url}/interface/remotetransaction"
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=PAYNOW_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _post(self, url, data):
+        response = self.session.post(url, data=data, timeout=PAYNOW_TIMEOUT)
+        return self._Paynow__rebuild_response(parse_qs(response.text))
+
+    def send_mobile(self, payment, phone, method):
+        if payment.total() <= 0:
+            raise ValueError('Transaction total cannot be less than 1')
+        if not payment.auth_email:
+            raise ValueError('Auth email is required for mobile transactions')
+
+        response = self._post(self.URL_INITIATE_MOBILE_TRANSACTION, self._Paynow__build_mobile(payment, phone, method))
+        # Error responses carry no hash
+        if str(response['status']).lower() != 'error' and not self._Paynow__verify_hash(response, self.integration_key):
+            raise HashMismatchException("Hashes do not match")
+        result = InitResponse(response)
+        # The SDK stores these as .instruction; callers read .instructions like the dev mock provides
+        result.instructions = response.get('instructions', '')
+        return result
+
+    def check_transaction_status(self, poll_url):
+        return StatusResponse(self._post(poll_url, {}), False)
+
+
+class PaynowService:
+    """
+    Payment operations against Paynow.
+
+    Cheap to construct: the Paynow client and its HTTP session are created
+    on first use, so importing this module (management commands, tests)
+    doesn't build one.
+    """
+
+    def __init__(self):
+        self._paynow = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_test_mode(self):
+        return getattr(settings, 'PAYNOW_MODE', 'test') == 'test'
+
+    @property
+    def is_dev_mode(self):
+        return getattr(settings, 'DEBUG', False)
+
+    @property
+    def paynow(self):
+        """Shared Paynow client, created once on first use."""
+        if self._paynow is None:
+            with self._lock:
+                if self._paynow is None:
+                    if self.is_dev_mode and self.is_test_mode:
+                        logger.info("Running in DEVELOPMENT TEST MODE - payments will be simulated")
+                    self._paynow = PooledPaynow(
+                        integration_id=settings.PAYNOW_INTEGRATION_ID,
+                        integration_key=settings.PAYNOW_INTEGRATION_KEY,
+                        return_url=settings.PAYNOW_RETURN_URL,
+                        result_url=settings.PAYNOW_RESULT_URL,
+                        base_url=getattr(settings, 'PAYNOW_BASE_URL', None),
+                    )
+        return self._paynow
+
+    def _format_phone_number(self, phone_number):
+        """Format phone number for Paynow: E.164 digits without the '+'"""
+        phone = normalize_phone_number(phone_number)
+        return phone[1:] if phone else None
 
     def _create_mock_response(self, payment, success=True):
         """Create a mock response for development testing"""
@@ -87,12 +236,15 @@ class PaynowService:
         if payment:
             if payment.status == Payment.PAID:
                 raise ValueError("This property has already been paid for.")
+            previous_status = payment.status
             # Update existing failed/pending payment
             payment.reference = reference
             payment.amount = amount
             payment.listing_type = property_obj.listing_type
             payment.status = Payment.PENDING
             payment.poll_url = None  # reset poll URL
+            payment.poll_attempts = 0
+            payment.next_poll_at = None
             payment.save()
         else:
             # Create new payment
@@ -103,6 +255,8 @@ class PaynowService:
                 amount=amount,
                 reference=reference
             )
+            previous_status = ''
+        PaymentEvent.objects.create(payment=payment, from_status=previous_status, to_status=Payment.PENDING, source='initiate')
 
         # DEVELOPMENT MODE: Use mock responses
         if self.is_dev_mode and self.is_test_mode:
@@ -135,35 +289,39 @@ class PaynowService:
 
         except Exception as e:
             logger.exception(f"Failed to initiate payment with Paynow for reference {reference}: {str(e)}")
-            payment.status = Payment.FAILED
-            payment.save()
+            mark_payment_failed(payment, source='initiate')
             return None
 
         if response.success:
             payment.poll_url = response.poll_url
-            payment.save()
+            # Only this field: the result webhook may already have marked the payment paid
+            payment.save(update_fields=['poll_url', 'updated_at'])
             return response
 
-        payment.status = Payment.FAILED
-        payment.save()
+        mark_payment_failed(payment, source='initiate')
         return None
 
+    def fetch_status(self, payment):
+        """
+        Ask Paynow for a payment's current status without changing anything.
+
+        Returns:
+            str: Lowercase Paynow status, e.g. 'paid', 'sent', 'cancelled'
+        """
+        if self.is_dev_mode and self.is_test_mode:
+            # updated_at rather than created_at: retried payments reuse the row
+            age = (timezone.now() - payment.updated_at).total_seconds()
+            return 'paid' if age > MOCK_PAYMENT_DELAY else 'sent'
+        return self.paynow.check_transaction_status(payment.poll_url).status
+
     def check_payment_status(self, payment):
         # DEVELOPMENT MODE: Simulate successful payment after delay
         if self.is_dev_mode and self.is_test_mode:
             logger.info(f"DEVELOPMENT: Checking mock payment status for {payment.reference}")
-            # Simulate successful payment after 10 seconds
-            import time
-            if hasattr(payment, '_created_at'):
-                time_diff = time.time() - payment._created_at
-                if time_diff > 10:  # 10 seconds delay
-                    payment.status = Payment.PAID
-                    payment.save()
-                    property_obj = payment.property
-                    property_obj.is_paid = True
-                    property_obj.save()
-                    logger.info(f"DEVELOPMENT: Mock payment successful for {payment.reference}")
-                    return True
+            if self.fetch_status(payment) == 'paid':
+                mark_payment_paid(payment)
+                logger.info(f"DEVELOPMENT: Mock payment successful for {payment.reference}")
+                return True
             return False
 
         # PRODUCTION MODE: Check real Paynow status
@@ -172,18 +330,11 @@ class PaynowService:
             logger.info(f"Paynow status check: {status.paid} for {payment.reference}")
         except Exception as e:
             logger.exception(f"Failed to check payment status for reference {payment.reference}: {str(e)}")
-            payment.status = Payment.FAILED
-            payment.save()
+            mark_payment_failed(payment)
             return False
 
         if status.paid:
-            payment.status = Payment.PAID
-            payment.save()
-
-            property_obj = payment.property
-            property_obj.is_paid = True
-            property_obj.save()
-
+            mark_payment_paid(payment)
             return True
 
         return False
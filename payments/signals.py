@@ -0,0 +1,29 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from listings.events import LISTING_CHANGED
+from listings.models import Property
+from .outbox import enqueue
+
+
+def _schedule_reindex(property_id):
+    # Embedding is slow; the outbox dispatcher does it after this transaction commits
+    enqueue(LISTING_CHANGED, [{'property_id': property_id}])
+
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, **kwargs):
+    if instance.is_paid or instance.was_paid:
+        _schedule_reindex(instance.pk)
+
+
+@receiver(post_delete, sender=Property)
+def property_deleted(sender, instance, **kwargs):
+    if instance.is_paid:
+        _schedule_reindex(instance.pk)
+
+
+@receiver(m2m_changed, sender=Property.amenities.through)
+def property_amenities_changed(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Property) and instance.is_paid:
+        _schedule_reindex(instance.pk)
@@ -0,0 +1,223 @@
+"""
+Local stand-in for the Paynow mobile payments API.
+
+Implements the three parts of the flow the site uses:
+
+- ``POST /interface/remotetransaction``: initiate a mobile (EcoCash/OneMoney)
+  payment; the request hash is verified and a poll URL returned
+- ``POST /interface/checktransaction?guid=...``: poll a transaction's status
+- the result callback: after ``settle_ms`` the transaction is paid (or
+  cancelled, at ``decline_rate``) and the update is POSTed to the
+  merchant's result URL, hashed like Paynow does
+
+Latency, initiation failures and declines are configurable, so the whole
+``initiate_payment`` -> webhook -> ``is_paid`` flow can be exercised and
+load tested offline. Used by the ``benchmark_payments`` command; can also
+run on its own and be pointed at with ``PAYNOW_BASE_URL``:
+
+    python -m payments.stub_paynow --port 8766 --integration-key <key>
+"""
+import argparse
+import hashlib
+import heapq
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlparse, parse_qs
+
+import requests
+
+INITIATE_MOBILE_PATH = '/interface/remotetransaction'
+CHECK_PATH = '/interface/checktransaction'
+
+
+def paynow_hash(values, integration_key):
+    """SHA-512 over the field values in order (minus the hash) plus the key, as Paynow does."""
+    out = ''.join(str(value) for key, value in values.items() if key.lower() != 'hash')
+    return hashlib.sha512(f"{out}{integration_key.lower()}".encode('utf-8')).hexdigest().upper()
+
+
+class StubPaynowServer:
+    """Threaded HTTP server emulating Paynow initiation, polling and result callbacks."""
+
+    def __init__(self, host='127.0.0.1', port=0, integration_key='stub-key', latency_ms=0, jitter_ms=0,
+                 failure_rate=0.0, decline_rate=0.0, settle_ms=1000, callback_workers=8):
+        self.integration_key = integration_key
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.decline_rate = decline_rate
+        self.settle_ms = settle_ms
+        self.transactions = {}
+        self.stats = {'initiated': 0, 'rejected': 0, 'polls': 0, 'callbacks': 0, 'callback_errors': 0}
+        self._lock = threading.Lock()
+        self._schedule = []
+        self._schedule_ready = threading.Condition(self._lock)
+        self._running = False
+        self._callbacks = ThreadPoolExecutor(max_workers=callback_workers)
+        self._session = requests.Session()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                url = urlparse(self.path)
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+                data = dict(parse_qsl(body, keep_blank_values=True))
+                if url.path == INITIATE_MOBILE_PATH:
+                    payload = server.initiate(data)
+                elif url.path == CHECK_PATH:
+                    payload = server.check(parse_qs(url.query).get('guid', [''])[0])
+                else:
+                    self.send_error(404)
+                    return
+                encoded = urlencode(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-www-form-urlencoded')
+                self.send_header('Content-Length', str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _delay(self):
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+
+    def _signed(self, values):
+        values['hash'] = paynow_hash(values, self.integration_key)
+        return values
+
+    def initiate(self, data):
+        """Handle a mobile initiation request and return the response fields."""
+        self._delay()
+        if data.get('hash') != paynow_hash(data, self.integration_key):
+            with self._lock:
+                self.stats['rejected'] += 1
+            return {'status': 'Error', 'error': 'Invalid hash'}
+        if random.random() < self.failure_rate:
+            with self._lock:
+                self.stats['rejected'] += 1
+            return {'status': 'Error', 'error': 'Simulated upstream failure'}
+
+        guid = uuid.uuid4().hex
+        transaction = {
+            'reference': data.get('reference', ''),
+            'paynowreference': str(random.randint(10 ** 6, 10 ** 7)),
+            'amount': data.get('amount', '0'),
+            'status': 'Sent',
+            'pollurl': f"{self.base_url}{CHECK_PATH}?guid={guid}",
+            'resulturl': data.get('resulturl', ''),
+        }
+        with self._lock:
+            self.transactions[guid] = transaction
+            self.stats['initiated'] += 1
+            heapq.heappush(self._schedule, (time.monotonic() + self.settle_ms / 1000, guid))
+            self._schedule_ready.notify()
+
+        return self._signed({
+            'status': 'Ok',
+            'instructions': f"Dial *151# to approve payment {transaction['reference']} (stub)",
+            'paynowreference': transaction['paynowreference'],
+            'pollurl': transaction['pollurl'],
+        })
+
+    def _status_fields(self, transaction):
+        return self._signed({
+            'reference': transaction['reference'],
+            'paynowreference': transaction['paynowreference'],
+            'amount': transaction['amount'],
+            'status': transaction['status'],
+            'pollurl': transaction['pollurl'],
+        })
+
+    def check(self, guid):
+        """Return the status fields for a poll URL."""
+        self._delay()
+        with self._lock:
+            self.stats['polls'] += 1
+            transaction = self.transactions.get(guid)
+        if transaction is None:
+            return {'status': 'Error', 'error': 'Transaction not found'}
+        return self._status_fields(transaction)
+
+    def _settle_loop(self):
+        while True:
+            with self._lock:
+                while self._running and (not self._schedule or self._schedule[0][0] > time.monotonic()):
+                    timeout = self._schedule[0][0] - time.monotonic() if self._schedule else None
+                    self._schedule_ready.wait(timeout)
+                if not self._running:
+                    return
+                _, guid = heapq.heappop(self._schedule)
+                transaction = self.transactions[guid]
+                transaction['status'] = 'Cancelled' if random.random() < self.decline_rate else 'Paid'
+            if transaction['resulturl']:
+                self._callbacks.submit(self._send_result, transaction)
+
+    def _send_result(self, transaction):
+        try:
+            self._session.post(transaction['resulturl'], data=self._status_fields(transaction), timeout=10)
+            key = 'callbacks'
+        except requests.RequestException:
+            key = 'callback_errors'
+        with self._lock:
+            self.stats[key] += 1
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        threading.Thread(target=self._settle_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._schedule_ready.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._callbacks.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a stub Paynow server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--integration-key', default='stub-key', help='Must match PAYNOW_INTEGRATION_KEY')
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of initiations answered with an error')
+    parser.add_argument('--decline-rate', type=float, default=0.0, help='Share of payments settling as cancelled')
+    parser.add_argument('--settle-ms', type=float, default=5000, help='Delay before a payment settles and the result URL is called')
+    args = parser.parse_args()
+
+    server = StubPaynowServer(
+        args.host, args.port, args.integration_key, args.latency_ms, args.jitter_ms,
+        args.failure_rate, args.decline_rate, args.settle_ms,
+    )
+    server.start()
+    print(f"Stub Paynow listening on {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,28 @@
 from django.test import TestCase, RequestFactory, override_settings
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from django.http import HttpResponse
 from django.urls import reverse
+from django.utils import timezone
+from datetime import datetime, timedelta
 from unittest.mock import patch
+import hashlib
+import json
+import threading
+import time
 from listings.models import Property
-from payments.models import Payment
+from payments.models import OutboxMessage, Payment, PaymentEvent
+from payments.events import aget_published_status, publish_payment_status
+from payments.services import (
+    PAYNOW_TIMEOUT, PaynowService, PooledPaynow, mark_payment_failed, mark_payment_paid, verify_paynow_hash,
+)
+from payments.stub_paynow import StubPaynowServer
+from payments.reconciliation import reconcile_payments
+from payments.reports import funnel_report
+from payments.outbox import dispatch_outbox
+from listings.cache import get_listings_version
+from listings.events import LISTING_ACTIVATED, LISTING_CHANGED
+from payments.poller import claim_due_payments, poll_payments
 from payments.views import payment_complete, payment_update
 
 @override_settings(
@@ -75,3 +93,450 @@ class PaymentUpdateTests(TestCase):
 
             self.assertEqual(response.status_code, 404)
             mock_check.assert_not_called()
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class PaymentPollerTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="poller",
+            email="poller@example.com",
+            password="password",
+        )
+
+    def _payment(self, reference, **kwargs):
+        return Payment.objects.create(
+            property=Property.objects.create(owner=self.user),
+            user=self.user,
+            amount=10,
+            reference=reference,
+            poll_url=f"https://paynow.example/poll/{reference}",
+            **kwargs,
+        )
+
+    @patch("payments.poller.paynow_service.fetch_status")
+    def test_results_are_written_to_the_database(self, mock_fetch):
+        statuses = {"PAID1": "paid", "GONE1": "cancelled", "WAIT1": "sent"}
+        mock_fetch.side_effect = lambda payment: statuses[payment.reference]
+        for reference in statuses:
+            self._payment(reference)
+
+        stats = poll_payments(claim_due_payments(10))
+
+        self.assertEqual(stats, {"paid": 1, "failed": 1, "pending": 1, "errors": 0})
+        paid = Payment.objects.get(reference="PAID1")
+        self.assertEqual(paid.status, Payment.PAID)
+        self.assertTrue(paid.property.is_paid)
+        self.assertEqual(Payment.objects.get(reference="GONE1").status, Payment.FAILED)
+        waiting = Payment.objects.get(reference="WAIT1")
+        self.assertEqual(waiting.poll_attempts, 1)
+        self.assertGreater(waiting.next_poll_at, timezone.now())
+
+    @patch("payments.poller.paynow_service.fetch_status", side_effect=ConnectionError("timeout"))
+    def test_upstream_errors_back_off_and_payments_not_due_are_skipped(self, mock_fetch):
+        self._payment("ERR1")
+        self._payment("LATER1", next_poll_at=timezone.now() + timedelta(minutes=5))
+
+        stats = poll_payments(claim_due_payments(10))
+
+        self.assertEqual(mock_fetch.call_count, 1)
+        self.assertEqual(stats["errors"], 1)
+        payment = Payment.objects.get(reference="ERR1")
+        self.assertEqual(payment.status, Payment.PENDING)
+        self.assertEqual(claim_due_payments(10), [])
+
+    def test_status_endpoint_reads_database_only(self):
+        self._payment("READ1", status=Payment.PAID)
+        with patch("payments.services.paynow_service.fetch_status") as mock_fetch, self.assertNumQueries(1):
+            response = self.client.get(reverse("payment_status", args=["READ1"]))
+
+        self.assertEqual(response.json(), {"status": "paid", "paid": True})
+        mock_fetch.assert_not_called()
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class PaymentEventsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="streamer",
+            email="streamer@example.com",
+            password="password",
+        )
+        self.payment = Payment.objects.create(
+            property=Property.objects.create(owner=self.user),
+            user=self.user,
+            amount=10,
+            reference="SSE123",
+        )
+
+    async def _events(self, response):
+        chunks = [chunk.decode() async for chunk in response.streaming_content]
+        return [
+            json.loads(line[len("data: "):])
+            for line in "".join(chunks).splitlines()
+            if line.startswith("data: ")
+        ]
+
+    @patch("payments.views.PAYMENT_EVENTS_INTERVAL", 0.01)
+    async def test_stream_ends_when_status_is_published(self):
+        publish_payment_status("SSE123", Payment.PAID)
+        response = await self.async_client.get(reverse("payment_events", args=["SSE123"]))
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = await self._events(response)
+        self.assertEqual(events, [{"status": "pending", "paid": False}, {"status": "paid", "paid": True}])
+
+    @patch("payments.views.PAYMENT_EVENTS_DB_INTERVAL", 0.01)
+    @patch("payments.views.PAYMENT_EVENTS_INTERVAL", 0.01)
+    async def test_stream_sees_changes_made_by_another_process(self):
+        response = await self.async_client.get(reverse("payment_events", args=["SSE123"]))
+        content = aiter(response.streaming_content)
+        await anext(content)  # retry hint
+        await anext(content)  # initial pending status
+        # Settled elsewhere (e.g. the poller), with nothing published to this process's cache
+        await Payment.objects.filter(reference="SSE123").aupdate(status=Payment.PAID)
+
+        self.assertIn('"status": "paid"', (await anext(content)).decode())
+
+    @patch("payments.views.PAYMENT_EVENTS_TIMEOUT", 0.1)
+    @patch("payments.views.PAYMENT_EVENTS_INTERVAL", 0.01)
+    async def test_database_is_read_once_more_before_closing(self):
+        response = await self.async_client.get(reverse("payment_events", args=["SSE123"]))
+        content = aiter(response.streaming_content)
+        await anext(content)  # retry hint
+        await anext(content)  # initial pending status
+        await Payment.objects.filter(reference="SSE123").aupdate(status=Payment.PAID)
+
+        with patch("payments.views.aget_published_status", wraps=aget_published_status) as mock_published:
+            self.assertIn('"status": "paid"', (await anext(content)).decode())
+        # Only the cache was checked each interval until the final database read
+        self.assertGreater(mock_published.call_count, 1)
+
+    @patch("payments.views.PAYMENT_EVENTS_TIMEOUT", 0.05)
+    @patch("payments.views.PAYMENT_EVENTS_INTERVAL", 0.01)
+    async def test_stream_times_out_while_pending(self):
+        response = await self.async_client.get(reverse("payment_events", args=["SSE123"]))
+        self.assertEqual(await self._events(response), [{"status": "pending", "paid": False}])
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+    PAYNOW_INTEGRATION_KEY="test-key",
+)
+class PaymentWebhookTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="webhook",
+            email="webhook@example.com",
+            password="password",
+        )
+        self.property = Property.objects.create(owner=self.user)
+        self.payment = Payment.objects.create(
+            property=self.property,
+            user=self.user,
+            amount=10,
+            reference="HOOK123",
+        )
+
+    def _post(self, status="Paid", amount="10.00", key="test-key"):
+        data = {"reference": "HOOK123", "paynowreference": "991", "amount": amount, "status": status}
+        values = "".join(data.values()) + key
+        data["hash"] = hashlib.sha512(values.encode()).hexdigest().upper()
+        return self.client.post(reverse("payment_update"), data)
+
+    @patch("payments.views.paynow_service.check_payment_status")
+    def test_paid_update_is_applied_once_without_calling_paynow(self, mock_check):
+        self.assertEqual(self._post().status_code, 200)
+        self.payment.refresh_from_db()
+        self.property.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PAID)
+        self.assertTrue(self.property.is_paid)
+
+        # A retried delivery only reads the payment
+        with self.assertNumQueries(1):
+            self.assertEqual(self._post().status_code, 200)
+        mock_check.assert_not_called()
+
+    def test_invalid_hash_or_short_amount_is_rejected(self):
+        self.assertEqual(self._post(key="wrong-key").status_code, 400)
+        self.assertEqual(self._post(amount="1.00").status_code, 400)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PENDING)
+
+    def test_late_paid_update_settles_a_failed_payment(self):
+        # e.g. the poller gave up after its deadline
+        Payment.objects.filter(pk=self.payment.pk).update(status=Payment.FAILED)
+
+        self.assertEqual(self._post().status_code, 200)
+        self.payment.refresh_from_db()
+        self.property.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PAID)
+        self.assertTrue(self.property.is_paid)
+        self.assertEqual(
+            list(self.payment.events.values_list("from_status", "to_status", "source")),
+            [(Payment.FAILED, Payment.PAID, "webhook")],
+        )
+
+    def test_cancelled_update_marks_payment_failed(self):
+        self._post(status="Cancelled")
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.FAILED)
+
+
+@override_settings(PAYNOW_INTEGRATION_KEY="test-key")
+class PaynowClientTests(TestCase):
+    def test_client_is_created_once_on_first_use(self):
+        service = PaynowService()
+        self.assertIsNone(service._paynow)
+
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(service.paynow)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(client) for client in clients}), 1)
+
+    def test_status_checks_reuse_session_with_timeout(self):
+        paynow = PaynowService().paynow
+        with patch.object(paynow.session, "post") as mock_post:
+            mock_post.return_value.text = "status=Paid&reference=REF1&amount=10.00"
+            status = paynow.check_transaction_status("https://paynow.example/poll/1")
+
+        self.assertTrue(status.paid)
+        mock_post.assert_called_once_with("https://paynow.example/poll/1", data={}, timeout=PAYNOW_TIMEOUT)
+
+
+class PaynowStubTests(TestCase):
+    def setUp(self):
+        self.stub = StubPaynowServer(integration_key="stub-key", settle_ms=50).start()
+        self.addCleanup(self.stub.stop)
+        self.paynow = PooledPaynow("1234", "stub-key", "http://return", "", base_url=self.stub.base_url)
+
+    def _send(self):
+        payment = self.paynow.create_payment("STUB1", "host@example.com")
+        payment.add("Normal Listing", 10.0)
+        return self.paynow.send_mobile(payment, "263771234567", "ecocash")
+
+    def test_mobile_payment_settles_and_polls_as_paid(self):
+        response = self._send()
+        self.assertTrue(response.success)
+        self.assertIn("STUB1", response.instructions)
+        self.assertFalse(self.paynow.check_transaction_status(response.poll_url).paid)
+
+        time.sleep(0.2)
+        self.assertTrue(self.paynow.check_transaction_status(response.poll_url).paid)
+
+    def test_result_payload_passes_webhook_hash_check(self):
+        response = self._send()
+        transaction = next(iter(self.stub.transactions.values()))
+        self.assertEqual(transaction["pollurl"], response.poll_url)
+        self.assertTrue(verify_paynow_hash(self.stub._status_fields(transaction), "stub-key"))
+
+    def test_failure_rate_returns_error_response(self):
+        self.stub.failure_rate = 1.0
+        self.assertFalse(self._send().success)
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="reconciler",
+            email="reconciler@example.com",
+            password="password",
+        )
+        stale = timezone.now() - timedelta(hours=2)
+        self.statuses = {}
+        for reference, status, paynow_status in [
+            ("LOST1", Payment.PENDING, "paid"),
+            ("LOST2", Payment.FAILED, "paid"),
+            ("GONE2", Payment.PENDING, "cancelled"),
+            ("WAIT2", Payment.PENDING, "sent"),
+        ]:
+            Payment.objects.create(
+                property=Property.objects.create(owner=self.user),
+                user=self.user,
+                amount=10,
+                reference=reference,
+                status=status,
+                poll_url=f"https://paynow.example/poll/{reference}",
+            )
+            self.statuses[reference] = paynow_status
+        Payment.objects.update(updated_at=stale)
+
+    @patch("payments.poller.paynow_service.fetch_status")
+    def test_stale_payments_are_corrected_in_bulk(self, mock_fetch):
+        mock_fetch.side_effect = lambda payment: self.statuses[payment.reference]
+
+        stats = reconcile_payments(older_than_minutes=30, batch_size=3)
+
+        self.assertEqual((stats["checked"], stats["paid"], stats["failed"], stats["unchanged"]), (4, 2, 1, 1))
+        self.assertEqual(
+            dict(Payment.objects.values_list("reference", "status")),
+            {"LOST1": "paid", "LOST2": "paid", "GONE2": "failed", "WAIT2": "pending"},
+        )
+        self.assertEqual(Property.objects.filter(is_paid=True).count(), 2)
+        self.assertEqual(
+            sorted(PaymentEvent.objects.values_list("payment__reference", "from_status", "to_status", "source")),
+            [
+                ("GONE2", "pending", "failed", "reconcile"),
+                ("LOST1", "pending", "paid", "reconcile"),
+                ("LOST2", "failed", "paid", "reconcile"),
+            ],
+        )
+
+    @patch("payments.poller.paynow_service.fetch_status", return_value="paid")
+    def test_dry_run_and_recent_payments_are_left_alone(self, mock_fetch):
+        Payment.objects.filter(reference="LOST1").update(updated_at=timezone.now())
+
+        stats = reconcile_payments(older_than_minutes=30, dry_run=True)
+
+        self.assertEqual(stats["checked"], 3)
+        self.assertFalse(Payment.objects.filter(status=Payment.PAID).exists())
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class PaymentEventTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="funnel",
+            email="funnel@example.com",
+            password="password",
+            is_staff=True,
+        )
+
+    def _payment(self, reference, listing_type="standard", amount=10):
+        return Payment.objects.create(
+            property=Property.objects.create(owner=self.user, listing_type=listing_type),
+            user=self.user,
+            listing_type=listing_type,
+            amount=amount,
+            reference=reference,
+        )
+
+    def test_transitions_are_recorded_once(self):
+        payment = self._payment("EVT1")
+
+        self.assertTrue(mark_payment_paid(payment, source="webhook"))
+        self.assertFalse(mark_payment_paid(payment, source="poller"))
+        self.assertFalse(mark_payment_failed(payment))
+
+        event = PaymentEvent.objects.get(payment=payment)
+        self.assertEqual((event.from_status, event.to_status, event.source), ("pending", "paid", "webhook"))
+
+    def test_funnel_report_groups_by_day_and_listing_type(self):
+        for reference, listing_type, amount in [("F1", "standard", 10), ("F2", "standard", 10), ("F3", "priority", 20)]:
+            payment = self._payment(reference, listing_type, amount)
+            PaymentEvent.objects.create(payment=payment, to_status=Payment.PENDING, source="initiate")
+        mark_payment_paid(Payment.objects.get(reference="F1"))
+        mark_payment_paid(Payment.objects.get(reference="F3"))
+
+        today = timezone.localdate().isoformat()
+        rows = {row["listing_type"]: row for row in funnel_report(days=7)}
+        self.assertEqual(rows["standard"], {
+            "day": today, "listing_type": "standard", "attempts": 2,
+            "payments": 2, "paid": 1, "revenue": "10.00", "conversion": 0.5,
+        })
+        self.assertEqual((rows["priority"]["paid"], rows["priority"]["revenue"]), (1, "20.00"))
+
+        # Served from the cache until it expires
+        mark_payment_paid(Payment.objects.get(reference="F2"))
+        with self.assertNumQueries(0):
+            self.assertEqual(len(funnel_report(days=7)), 2)
+
+    def test_funnel_report_window_starts_at_local_midnight(self):
+        start = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=6), datetime.min.time()))
+        self._payment("EDGE1")
+        self._payment("EDGE2")
+        Payment.objects.filter(reference="EDGE1").update(created_at=start)
+        Payment.objects.filter(reference="EDGE2").update(created_at=start - timedelta(seconds=1))
+
+        rows = funnel_report(days=7)
+        self.assertEqual([(row["day"], row["payments"]) for row in rows], [(start.date().isoformat(), 1)])
+
+    def test_report_view_is_staff_only(self):
+        url = reverse("payment_report")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.user)
+        response = self.client.get(url, {"days": "7"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"days": 7, "rows": []})
+
+
+@override_settings(
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="outbox",
+            email="outbox@example.com",
+            password="password",
+        )
+        self.payments = [
+            Payment.objects.create(
+                property=Property.objects.create(owner=self.user),
+                user=self.user,
+                amount=10,
+                reference=f"OUT{i}",
+            )
+            for i in range(3)
+        ]
+
+    @patch("payments.outbox.reindex_listings")
+    def test_payment_queues_activation_and_dispatcher_fans_out_once(self, mock_reindex):
+        for payment in self.payments:
+            mark_payment_paid(payment, source="webhook")
+        # Nothing downstream runs on the payment path
+        mock_reindex.assert_not_called()
+        self.assertEqual(Property.objects.filter(is_paid=True).count(), 3)
+        self.assertEqual(OutboxMessage.objects.filter(topic=LISTING_ACTIVATED).count(), 3)
+
+        version = get_listings_version()
+        self.assertEqual(dispatch_outbox(batch_size=10), {"processed": 3, "failed": 0})
+        self.assertNotEqual(get_listings_version(), version)
+        # The whole batch is embedded in one call, without queueing more work
+        mock_reindex.assert_called_once_with({payment.property_id for payment in self.payments})
+        self.assertEqual(dispatch_outbox(batch_size=10), {"processed": 0, "failed": 0})
+
+    def test_paid_listing_edits_queue_a_reindex(self):
+        prop = self.payments[0].property
+        prop.save()
+        self.assertFalse(OutboxMessage.objects.exists())
+
+        Property.objects.filter(pk=prop.pk).update(is_paid=True)
+        prop.refresh_from_db()
+        prop.description = "Renovated"
+        prop.save()
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.topic, message.payload), (LISTING_CHANGED, {"property_id": prop.pk}))
+
+    def test_activating_process_invalidates_its_own_cache_on_commit(self):
+        version = get_listings_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_payment_paid(self.payments[0], source="webhook")
+        # Before any dispatcher runs, so a per-process cache is not left stale
+        self.assertNotEqual(get_listings_version(), version)
+
+    @patch("payments.outbox.bump_listings_version", side_effect=ConnectionError("cache down"))
+    def test_failed_delivery_is_kept_for_retry(self, mock_bump):
+        mark_payment_paid(self.payments[0])
+
+        self.assertEqual(dispatch_outbox(), {"processed": 0, "failed": 1})
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.processed_at, message.attempts, message.last_error), (None, 1, "cache down"))
+
+        mock_bump.side_effect = None
+        self.assertEqual(dispatch_outbox(), {"processed": 1, "failed": 0})
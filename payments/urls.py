@@ -7,6 +7,8 @@ urlpatterns = [
     path('complete/', views.payment_complete, name='payment_complete'),
     path('update/', views.payment_update, name='payment_update'),
     path('status/<str:reference>/', views.payment_status, name='payment_status'),
+    path('events/<str:reference>/', views.payment_events, name='payment_events'),
     path('simulate/<str:reference>/', views.simulate_payment_success, name='simulate_payment_success'),
+    path('report/', views.payment_report, name='payment_report'),
     path('choose/', listing_views.choose_payment, name='choose_payment')
 ]
@@ -1,15 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
-from django.http import HttpResponse, HttpResponseForbidden, Http404, JsonResponse
-from .services import paynow_service
+from django.http import HttpResponse, HttpResponseForbidden, Http404, JsonResponse, StreamingHttpResponse
+from .services import (
+    PAYNOW_FAILED_STATUSES, mark_payment_failed, mark_payment_paid, paynow_service, verify_paynow_hash,
+)
+from .events import aget_published_status
+from .reports import REPORT_MAX_DAYS, funnel_report
 from .models import Payment
 from listings.models import Property
 from django.conf import settings
+from tourwise_website.ratelimit import rate_limit
+from decimal import Decimal, InvalidOperation
+import asyncio
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Server-sent status stream: how long one connection waits, and how often it checks
+PAYMENT_EVENTS_TIMEOUT = 55
+PAYMENT_EVENTS_INTERVAL = 1
+PAYMENT_EVENTS_DB_INTERVAL = 10
+PAYMENT_EVENTS_RETRY_MS = 3000
+
 
 @login_required
 def initiate_payment(request, property_id):
@@ -80,7 +96,13 @@ def payment_complete(request):
 
 @csrf_exempt
 def payment_update(request):
-    # Handle Paynow webhook
+    """
+    Handle Paynow's status update webhook.
+
+    The update is trusted once its hash verifies, so no request is made
+    back to Paynow. Transitions are conditional, which makes retried and
+    duplicate deliveries no-ops.
+    """
     if request.method == 'POST':
         reference = request.POST.get('reference')
         if reference:
@@ -88,26 +110,92 @@ def payment_update(request):
                 payment = Payment.objects.get(reference=reference)
             except Payment.DoesNotExist:
                 return HttpResponse(status=404)
-            service = paynow_service
-            service.check_payment_status(payment)
+
+            if not verify_paynow_hash(request.POST, settings.PAYNOW_INTEGRATION_KEY):
+                logger.warning(f"Rejected Paynow update with invalid hash for {reference}")
+                return HttpResponse(status=400)
+
+            if payment.status == Payment.PAID:
+                # Already settled by an earlier delivery, the poller or a browser check
+                return HttpResponse(status=200)
+
+            # A FAILED payment may still be paid late (the poller gave up, or a check errored)
+            status = request.POST.get('status', '').lower()
+            if status == 'paid':
+                try:
+                    amount = Decimal(request.POST.get('amount', ''))
+                except InvalidOperation:
+                    amount = None
+                if amount is None or amount < payment.amount:
+                    logger.error(f"Paynow update for {reference} paid {request.POST.get('amount')}, expected {payment.amount}")
+                    return HttpResponse(status=400)
+                if mark_payment_paid(payment, source='webhook'):
+                    logger.info(f"Payment {reference} marked paid by Paynow update")
+            elif status in PAYNOW_FAILED_STATUSES:
+                mark_payment_failed(payment, source='webhook')
     return HttpResponse(status=200)
 
 
 @csrf_exempt
+@rate_limit('payment_status')
 def payment_status(request, reference):
-    """API endpoint to check payment status for frontend polling"""
-    try:
-        payment = Payment.objects.get(reference=reference)
-        service = paynow_service
-
-        if service.check_payment_status(payment):
-            return JsonResponse({'status': 'paid', 'paid': True})
-        else:
-            return JsonResponse({'status': 'pending', 'paid': False})
-    except Payment.DoesNotExist:
+    """
+    API endpoint to check payment status for frontend polling.
+
+    Only reads the database; Paynow is polled by the poll_payments command
+    and the payment_update webhook.
+    """
+    status = Payment.objects.filter(reference=reference).values_list('status', flat=True).first()
+    if status is None:
         return JsonResponse({'status': 'not_found', 'paid': False}, status=404)
-    except Exception as e:
-        return JsonResponse({'status': 'error', 'paid': False}, status=500)
+    return JsonResponse({'status': status, 'paid': status == Payment.PAID})
+
+
+async def payment_events(request, reference):
+    """
+    Server-sent events stream of a payment's status.
+
+    Sends the current status, then holds the connection until the payment
+    leaves pending or PAYMENT_EVENTS_TIMEOUT passes; the browser's
+    EventSource reconnects on its own after a timeout. Each interval checks
+    the status published to the cache; the database is only re-read every
+    PAYMENT_EVENTS_DB_INTERVAL and once before the stream closes, since with
+    a per-process cache the webhook, poller or outbox may have settled the
+    payment in another process. Under ASGI a waiting client costs no worker
+    thread.
+    """
+    payments = Payment.objects.filter(reference=reference).values_list('status', flat=True)
+    status = await payments.afirst()
+    if status is None:
+        return JsonResponse({'status': 'not_found', 'paid': False}, status=404)
+
+    def event(current):
+        data = json.dumps({'status': current, 'paid': current == Payment.PAID})
+        return f"event: status\ndata: {data}\n\n"
+
+    async def stream():
+        yield f"retry: {PAYMENT_EVENTS_RETRY_MS}\n\n"
+        yield event(status)
+        current = status
+        deadline = time.monotonic() + PAYMENT_EVENTS_TIMEOUT
+        next_db_read = time.monotonic() + PAYMENT_EVENTS_DB_INTERVAL
+        while current == Payment.PENDING:
+            await asyncio.sleep(PAYMENT_EVENTS_INTERVAL)
+            now = time.monotonic()
+            latest = await aget_published_status(reference)
+            if latest is None and (now >= next_db_read or now >= deadline):
+                latest = await payments.afirst()
+                next_db_read = now + PAYMENT_EVENTS_DB_INTERVAL
+            if latest and latest != current:
+                current = latest
+                yield event(current)
+            if now >= deadline:
+                break
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
 
 
 @csrf_exempt
@@ -119,14 +207,8 @@ def simulate_payment_success(request, reference):
     try:
         payment = Payment.objects.get(reference=reference)
 
-        # Update payment status
-        payment.status = Payment.PAID
-        payment.save()
-
-        # Update property status
-        property_obj = payment.property
-        property_obj.is_paid = True
-        property_obj.save()
+        # Update payment and property status
+        mark_payment_paid(payment, source='simulate')
 
         logger.info(f"DEVELOPMENT: Simulated successful payment for {reference}")
 
@@ -143,3 +225,13 @@ def simulate_payment_success(request, reference):
         logger.error(f"Error simulating payment: {e}")
         return JsonResponse({'error': 'Simulation failed'}, status=500)
 
+
+
+@staff_member_required
+def payment_report(request):
+    """Staff-only JSON funnel report; ?days= sets the window (default 30)."""
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), REPORT_MAX_DAYS)
+    except ValueError:
+        return JsonResponse({'error': 'days must be a number'}, status=400)
+    return JsonResponse({'days': days, 'rows': funnel_report(days)})
@@ -0,0 +1,127 @@
+// Persistent Floating Pill Header Logic
+document.addEventListener('DOMContentLoaded', function() {
+  const pill = document.getElementById('floating-pill-header');
+  const navbar = document.querySelector('.navbar-custom');
+  const isHome = window.location.pathname === '/' || window.location.pathname === '/home/';
+
+  // Initialize pill header display
+  if (window.innerWidth <= 768 && !isHome) {
+    pill.classList.remove('d-none');
+  }
+
+  function handlePill() {
+    if (window.innerWidth > 768) {
+      pill.classList.remove('show');
+      navbar.classList.remove('hidden');
+      return;
+    }
+
+    if (isHome) {
+      pill.classList.remove('show');
+      navbar.classList.remove('hidden');
+      return;
+    }
+
+    if (window.scrollY > 100) {
+      pill.classList.add('show');
+      navbar.classList.add('hidden');
+    } else {
+      pill.classList.remove('show');
+      navbar.classList.remove('hidden');
+    }
+  }
+
+  // Add scroll threshold to prevent flickering
+  let lastScroll = 0;
+  let ticking = false;
+
+  window.addEventListener('scroll', function() {
+    lastScroll = window.scrollY;
+
+    if (!ticking) {
+      window.requestAnimationFrame(function() {
+        handlePill();
+        ticking = false;
+      });
+      ticking = true;
+    }
+  });
+
+  window.addEventListener('resize', function() {
+    if (window.innerWidth <= 768 && !isHome) {
+      pill.classList.remove('d-none');
+    } else {
+      pill.classList.add('d-none');
+    }
+    handlePill();
+  });
+
+  handlePill(); // Initial check
+});
+
+// Mobile Dropdown Menu Logic
+document.addEventListener('DOMContentLoaded', function() {
+  const btn = document.getElementById('mobile-dropdown-btn');
+  const menu = document.getElementById('mobile-dropdown-menu');
+
+  if (!btn || !menu) return;
+
+  btn.addEventListener('click', function(e) {
+    e.stopPropagation();
+    menu.classList.toggle('show');
+    menu.classList.remove('d-none');
+  });
+
+  document.addEventListener('click', function(e) {
+    if (!menu.contains(e.target) && e.target !== btn) {
+      menu.classList.remove('show');
+    }
+  });
+
+  window.addEventListener('scroll', function() {
+    menu.classList.remove('show');
+  });
+
+  window.addEventListener('resize', function() {
+    if (window.innerWidth > 768) menu.classList.remove('show');
+  });
+});
+
+// Mobile user dropdown toggle (for hosts and tenants)
+document.addEventListener('DOMContentLoaded', function() {
+  // Host dropdown
+  var hostTrigger = document.getElementById('mobile-user-menu-trigger');
+  var hostDropdown = document.getElementById('mobile-user-dropdown');
+  if (hostTrigger && hostDropdown) {
+    hostTrigger.addEventListener('click', function(e) {
+      e.stopPropagation();
+      hostDropdown.style.display = hostDropdown.style.display === 'block' ? 'none' : 'block';
+      // Close tenant dropdown if open
+      var tenantDropdown = document.getElementById('mobile-tenant-dropdown');
+      if (tenantDropdown) tenantDropdown.style.display = 'none';
+    });
+    document.addEventListener('click', function(e) {
+      if (!hostDropdown.contains(e.target) && e.target !== hostTrigger) {
+        hostDropdown.style.display = 'none';
+      }
+    });
+  }
+
+  // Tenant dropdown
+  var tenantTrigger = document.getElementById('mobile-tenant-menu-trigger');
+  var tenantDropdown = document.getElementById('mobile-tenant-dropdown');
+  if (tenantTrigger && tenantDropdown) {
+    tenantTrigger.addEventListener('click', function(e) {
+      e.stopPropagation();
+      tenantDropdown.style.display = tenantDropdown.style.display === 'block' ? 'none' : 'block';
+      // Close host dropdown if open
+      var hostDropdown = document.getElementById('mobile-user-dropdown');
+      if (hostDropdown) hostDropdown.style.display = 'none';
+    });
+    document.addEventListener('click', function(e) {
+      if (!tenantDropdown.contains(e.target) && e.target !== tenantTrigger) {
+        tenantDropdown.style.display = 'none';
+      }
+    });
+  }
+});
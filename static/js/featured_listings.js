@@ -0,0 +1,69 @@
+// Carousel functionality for 1 card per view
+function initCarousel(carouselId, navId) {
+  const carousel = document.getElementById(carouselId);
+  const nav = document.getElementById(navId);
+  const track = carousel.querySelector('.carousel-track');
+  const items = track.querySelectorAll('.carousel-item');
+  if (items.length === 0) return;
+  // Always 1 item per view for mobile
+  const itemsPerView = 1;
+  const numDots = Math.ceil(items.length / itemsPerView);
+  nav.innerHTML = '';
+  for (let i = 0; i < numDots; i++) {
+    const dot = document.createElement('div');
+    dot.className = 'carousel-dot';
+    if (i === 0) dot.classList.add('active');
+    dot.addEventListener('click', () => {
+      const itemWidth = items[0].offsetWidth;
+      const scrollPosition = i * itemWidth;
+      track.scrollTo({ left: scrollPosition, behavior: 'smooth' });
+      nav.querySelectorAll('.carousel-dot').forEach(d => d.classList.remove('active'));
+      dot.classList.add('active');
+    });
+    nav.appendChild(dot);
+  }
+  track.addEventListener('scroll', () => {
+    const scrollLeft = track.scrollLeft;
+    const itemWidth = items[0].offsetWidth;
+    const activeIndex = Math.round(scrollLeft / itemWidth);
+    nav.querySelectorAll('.carousel-dot').forEach((dot, index) => {
+      dot.classList.toggle('active', index === activeIndex);
+    });
+  });
+  window.addEventListener('resize', () => {
+    setTimeout(() => {
+      initCarousel(carouselId, navId);
+    }, 100);
+  });
+}
+document.addEventListener('DOMContentLoaded', () => {
+  initCarousel('featured-carousel', 'featured-nav');
+});
+
+// --- Mobile gallery pagination dots ---
+document.addEventListener('DOMContentLoaded', function() {
+  document.querySelectorAll('.mobile-img-scroll').forEach(function(scrollEl) {
+    const galleryId = scrollEl.id;
+    if (!galleryId) return;
+    const propertyId = galleryId.replace('gallery-', '');
+    const images = scrollEl.querySelectorAll('.mobile-card-img');
+    const dotsContainer = document.getElementById('dots-' + propertyId);
+    if (!dotsContainer || images.length < 2) return;
+    // Create dots
+    dotsContainer.innerHTML = '';
+    for (let i = 0; i < images.length; i++) {
+      const dot = document.createElement('span');
+      dot.className = 'mobile-dot' + (i === 0 ? ' active' : '');
+      dotsContainer.appendChild(dot);
+    }
+    // Update dots on scroll
+    scrollEl.addEventListener('scroll', function() {
+      const scrollLeft = scrollEl.scrollLeft;
+      const imgWidth = images[0].offsetWidth;
+      const idx = Math.round(scrollLeft / imgWidth);
+      dotsContainer.querySelectorAll('.mobile-dot').forEach((dot, i) => {
+        dot.classList.toggle('active', i === idx);
+      });
+    });
+  });
+});
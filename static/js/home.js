@@ -0,0 +1,98 @@
+// Smooth scroll for Discover button
+document.addEventListener('DOMContentLoaded', function() {
+  var discoverBtn = document.getElementById('discover-btn');
+  if (discoverBtn) {
+    discoverBtn.addEventListener('click', function(e) {
+      e.preventDefault();
+      var target = document.getElementById('recent-listings-section');
+      if (target) {
+        target.scrollIntoView({ behavior: 'smooth' });
+      }
+    });
+  }
+});
+
+(function() {
+  // Autocomplete functionality for location input
+  document.addEventListener('DOMContentLoaded', function() {
+    const input = document.getElementById('desktop-location-input');
+    const suggestionsBox = document.getElementById('desktop-location-suggestions');
+
+    if (!input || !suggestionsBox) return;
+
+    let debounceTimer;
+
+    // Debounced fetch function
+    function fetchSuggestions(query) {
+      clearTimeout(debounceTimer);
+
+      if (query.length < 2) {
+        suggestionsBox.innerHTML = '';
+        suggestionsBox.classList.remove('show');
+        return;
+      }
+
+      debounceTimer = setTimeout(async () => {
+        try {
+          const response = await fetch(`/listings/api/locations/?q=${encodeURIComponent(query)}`);
+          const data = await response.json();
+
+          if (data.suggestions && data.suggestions.length > 0) {
+            displaySuggestions(data.suggestions, query);
+          } else {
+            suggestionsBox.innerHTML = '<div class="suggestion-item" style="pointer-events: none;">No locations found</div>';
+            suggestionsBox.classList.add('show');
+          }
+        } catch (error) {
+          console.error('Error fetching suggestions:', error);
+          suggestionsBox.innerHTML = '';
+          suggestionsBox.classList.remove('show');
+        }
+      }, 300);
+    }
+
+    // Display suggestions
+    function displaySuggestions(suggestions, query) {
+      suggestionsBox.innerHTML = suggestions.map(suggestion => {
+        const displayName = suggestion.display_name;
+        // Highlight matching text
+        const highlighted = highlightMatch(displayName, query);
+        return `<div class="suggestion-item" data-value="${displayName}">${highlighted}</div>`;
+      }).join('');
+
+      suggestionsBox.classList.add('show');
+
+      // Add click handlers
+      suggestionsBox.querySelectorAll('.suggestion-item').forEach(item => {
+        item.addEventListener('click', function() {
+          const value = this.dataset.value;
+          input.value = value;
+          suggestionsBox.innerHTML = '';
+          suggestionsBox.classList.remove('show');
+        });
+      });
+    }
+
+    // Highlight matching text
+    function highlightMatch(text, query) {
+      const regex = new RegExp(`(${query})`, 'gi');
+      return text.replace(regex, '<span class="highlight">$1</span>');
+    }
+
+    // Event listeners
+    input.addEventListener('input', (e) => fetchSuggestions(e.target.value));
+    input.addEventListener('focus', (e) => {
+      if (e.target.value.length >= 2) {
+        fetchSuggestions(e.target.value);
+      }
+    });
+
+    // Close dropdown when clicking outside
+    document.addEventListener('click', (e) => {
+      if (!input.contains(e.target) && !suggestionsBox.contains(e.target)) {
+        suggestionsBox.innerHTML = '';
+        suggestionsBox.classList.remove('show');
+      }
+    });
+  });
+})();
@@ -0,0 +1,108 @@
+// Improved Carousel functionality
+document.addEventListener('DOMContentLoaded', function() {
+  function initCarousel(carouselId, navId) {
+    const carousel = document.getElementById(carouselId);
+    const nav = document.getElementById(navId);
+    if (!carousel || !nav) return;
+
+    const track = carousel.querySelector('.carousel-track');
+    const items = track.querySelectorAll('.carousel-item');
+    if (items.length === 0) return;
+
+    // Create dots based on number of items
+    nav.innerHTML = '';
+    items.forEach((_, index) => {
+      const dot = document.createElement('div');
+      dot.className = 'carousel-dot';
+      if (index === 0) dot.classList.add('active');
+      dot.addEventListener('click', () => {
+        scrollToItem(index);
+      });
+      nav.appendChild(dot);
+    });
+
+    function scrollToItem(index) {
+      const item = items[index];
+      if (!item) return;
+
+      const containerWidth = carousel.offsetWidth;
+      const itemLeft = item.offsetLeft;
+      const itemWidth = item.offsetWidth;
+      const scrollPosition = itemLeft - (containerWidth - itemWidth) / 2;
+
+      track.scrollTo({
+        left: scrollPosition,
+        behavior: 'smooth'
+      });
+
+      // Update active dot
+      nav.querySelectorAll('.carousel-dot').forEach((dot, i) => {
+        dot.classList.toggle('active', i === index);
+      });
+    }
+
+    // Handle scroll events to update active dot
+    let isScrolling;
+    track.addEventListener('scroll', () => {
+      clearTimeout(isScrolling);
+      isScrolling = setTimeout(() => {
+        const scrollPosition = track.scrollLeft + track.offsetWidth / 2;
+        let activeIndex = 0;
+        let minDistance = Infinity;
+
+        items.forEach((item, index) => {
+          const itemCenter = item.offsetLeft + item.offsetWidth / 2;
+          const distance = Math.abs(scrollPosition - itemCenter);
+          if (distance < minDistance) {
+            minDistance = distance;
+            activeIndex = index;
+          }
+        });
+
+        nav.querySelectorAll('.carousel-dot').forEach((dot, index) => {
+          dot.classList.toggle('active', index === activeIndex);
+        });
+      }, 100);
+    });
+
+    // Handle window resize
+    window.addEventListener('resize', () => {
+      const activeDot = nav.querySelector('.carousel-dot.active');
+      if (activeDot) {
+        const activeIndex = Array.from(nav.children).indexOf(activeDot);
+        scrollToItem(activeIndex);
+      }
+    });
+  }
+
+  // Initialize the carousel
+  initCarousel('recent-carousel', 'recent-nav');
+});
+
+// --- Mobile gallery pagination dots ---
+document.addEventListener('DOMContentLoaded', function() {
+  document.querySelectorAll('.mobile-img-scroll').forEach(function(scrollEl) {
+    const galleryId = scrollEl.id;
+    if (!galleryId) return;
+    const propertyId = galleryId.replace('gallery-', '');
+    const images = scrollEl.querySelectorAll('.mobile-card-img');
+    const dotsContainer = document.getElementById('dots-' + propertyId);
+    if (!dotsContainer || images.length < 2) return;
+    // Create dots
+    dotsContainer.innerHTML = '';
+    for (let i = 0; i < images.length; i++) {
+      const dot = document.createElement('span');
+      dot.className = 'mobile-dot' + (i === 0 ? ' active' : '');
+      dotsContainer.appendChild(dot);
+    }
+    // Update dots on scroll
+    scrollEl.addEventListener('scroll', function() {
+      const scrollLeft = scrollEl.scrollLeft;
+      const imgWidth = images[0].offsetWidth;
+      const idx = Math.round(scrollLeft / imgWidth);
+      dotsContainer.querySelectorAll('.mobile-dot').forEach((dot, i) => {
+        dot.classList.toggle('active', i === idx);
+      });
+    });
+  });
+});
@@ -0,0 +1,84 @@
+// Image preview
+document.querySelectorAll('[data-bs-target="#imageModal"]').forEach(img => {
+  img.addEventListener('click', () => {
+    document.getElementById('modalImage').src = img.getAttribute('data-img');
+  });
+});
+
+// Toggle amenities
+document.getElementById('toggleAmenitiesBtn')?.addEventListener('click', function () {
+  const amenities = document.querySelectorAll('.amenity-item');
+  let showingAll = false;
+
+  amenities.forEach((item, index) => {
+    if (index >= 6) {
+      item.classList.toggle('d-none');
+      showingAll = !item.classList.contains('d-none');
+    }
+  });
+
+  this.textContent = showingAll
+    ? 'Show Fewer Amenities'
+    : this.dataset.moreLabel;
+});
+
+// Toggle contact information
+function toggleContactInfo() {
+  const contactInfo = document.getElementById('contactInfo');
+  const button = document.querySelector('button[onclick="toggleContactInfo()"]');
+
+  if (contactInfo.classList.contains('d-none')) {
+    contactInfo.classList.remove('d-none');
+    button.textContent = 'Hide Contact Details';
+  } else {
+    contactInfo.classList.add('d-none');
+    button.textContent = 'Show Contact Details';
+  }
+}
+
+// Lightbox for mobile gallery
+function openLightbox(src) {
+  var overlay = document.getElementById('mobileLightbox');
+  var img = document.getElementById('lightboxImg');
+  overlay.style.display = 'flex'; // Show overlay
+  overlay.classList.add('show');
+  img.src = src;
+  document.body.style.overflow = 'hidden';
+}
+function closeLightbox() {
+  var overlay = document.getElementById('mobileLightbox');
+  overlay.style.display = 'none'; // Hide overlay
+  overlay.classList.remove('show');
+  document.body.style.overflow = '';
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+  const lat = JSON.parse(document.getElementById('lat').textContent);
+  const lng = JSON.parse(document.getElementById('lng').textContent);
+
+  // Ensure lightbox is hidden on page load
+  document.getElementById('mobileLightbox')?.classList.remove('show');
+
+  if (lat && lng) {
+    const map = L.map('map').setView([lat, lng], 15);
+    L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+      attribution: 'Map data © OpenStreetMap contributors'
+    }).addTo(map);
+
+    const mapEl = document.getElementById('map');
+    const popup = document.createElement('div');
+    const title = document.createElement('b');
+    title.textContent = mapEl.dataset.title;
+    const directions = document.createElement('a');
+    directions.href = mapEl.dataset.directionsUrl;
+    directions.target = '_blank';
+    directions.textContent = 'Get Directions';
+    popup.append(title, document.createElement('br'), directions);
+
+    L.marker([lat, lng]).addTo(map)
+      .bindPopup(popup)
+      .openPopup();
+  } else {
+    document.getElementById('map').innerHTML = "<div class='d-flex align-items-center justify-content-center h-100'><p class='text-muted mb-0'>Location not available.</p></div>";
+  }
+});
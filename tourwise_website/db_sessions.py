@@ -0,0 +1,17 @@
+"""
+Session engine: database sessions, written only when data changes.
+
+The default without a shared cache. Sessions live in ``django_session``
+only, so every worker sees logouts, flushes and key changes at once, and
+a session whose data is unchanged since it was loaded is not written back
+(see ``tourwise_website.sessions`` for the cached variant used with Redis).
+
+Enable with ``SESSION_ENGINE = 'tourwise_website.db_sessions'``.
+"""
+from django.contrib.sessions.backends import db
+
+from .sessions import SkipUnchangedSaveMixin
+
+
+class SessionStore(SkipUnchangedSaveMixin, db.SessionStore):
+    pass
@@ -0,0 +1,41 @@
+"""
+Lightweight operational counters.
+
+Counters live in the default cache so every worker and node reports into
+the same numbers (with LocMemCache they are per process). Each increment
+is a cache round trip, so they count events that are rare or already
+expensive (rate-limit rejections, LLM calls), not every request.
+"""
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.http import JsonResponse
+
+METRICS_PREFIX = 'metrics:'
+METRICS_INDEX_KEY = 'metrics:names'
+
+
+def increment(name, amount=1):
+    """Increase a named counter, creating it on first use."""
+    key = f"{METRICS_PREFIX}{name}"
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # incr raises ValueError for missing keys; add() only wins once
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+        names = cache.get(METRICS_INDEX_KEY, set())
+        if name not in names:
+            cache.set(METRICS_INDEX_KEY, names | {name}, timeout=None)
+
+
+def snapshot():
+    """Return all known counters as a {name: value} dict."""
+    names = sorted(cache.get(METRICS_INDEX_KEY, set()))
+    values = cache.get_many([f"{METRICS_PREFIX}{name}" for name in names])
+    return {name: values.get(f"{METRICS_PREFIX}{name}", 0) for name in names}
+
+
+@staff_member_required
+def metrics_view(request):
+    """Staff-only JSON dump of the operational counters."""
+    return JsonResponse({'counters': snapshot()})
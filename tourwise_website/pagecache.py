@@ -0,0 +1,136 @@
+"""
+Full-page cache for anonymous visitors, invalidated by tags.
+
+Views opt in with ``@cache_page_for_anonymous(tags=..., params=...)``. For a
+GET from a visitor without a session or messages cookie,
+``AnonymousPageCacheMiddleware`` serves the stored response or stores the
+rendered one. Anyone with a session cookie (every logged-in user) bypasses
+the cache entirely, so personalised pages are never stored or served.
+
+Cache keys combine the path, the view's declared query parameters (others,
+like tracking parameters, are ignored) and the current version of each of
+the view's tags, e.g. ``listings`` or ``property:{pk}`` (formatted with the
+view's URL kwargs). ``invalidate_pages('property:12')`` bumps that tag's
+version, which orphans exactly the pages carrying it.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_PREFIX = 'pagecache'
+
+
+def cache_page_for_anonymous(tags=(), params=(), timeout=PAGE_CACHE_TIMEOUT):
+    """
+    Mark a view as cacheable for anonymous visitors.
+
+    Args:
+        tags: Invalidation tags; may use the view's URL kwargs, e.g. 'property:{pk}'
+        params: Query parameters the response depends on
+        timeout: Seconds a page is kept even if no tag changes
+    """
+    def decorator(view_func):
+        view_func.page_cache = {'tags': tuple(tags), 'params': tuple(params), 'timeout': timeout}
+        return view_func
+    return decorator
+
+
+def _tag_key(tag):
+    return f"{PAGE_CACHE_PREFIX}:tag:{tag}"
+
+
+def tag_versions(tags):
+    """Return the current version of each tag, in order."""
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Seed from the clock so a version lost to eviction never reuses an old value
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate_pages(*tags):
+    """Drop every cached page carrying any of these tags."""
+    for tag in tags:
+        key = _tag_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), timeout=None)
+
+
+def _is_cacheable_request(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+def _page_key(request, config, view_kwargs):
+    tags = [tag.format(**view_kwargs) for tag in config['tags']]
+    query = urlencode([(name, request.GET.get(name, '')) for name in config['params'] if name in request.GET])
+    versions = ':'.join(str(version) for version in tag_versions(tags))
+    digest = hashlib.md5(f"{request.path}?{query}|{versions}".encode('utf-8')).hexdigest()
+    return f"{PAGE_CACHE_PREFIX}:page:{digest}"
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Serve and store opted-in views for anonymous visitors.
+
+    Must come after the session, CSRF and message middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, '_page_cache_key', None)
+        if key is None:
+            return response
+
+        patch_vary_headers(response, ('Cookie',))
+        if self._should_store(request, response):
+            cache.set(key, (response.content, response['Content-Type']), request._page_cache_timeout)
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        config = getattr(view_func, 'page_cache', None)
+        if config is None or not _is_cacheable_request(request):
+            return None
+
+        key = _page_key(request, config, view_kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Page-Cache'] = 'hit'
+            patch_vary_headers(response, ('Cookie',))
+            return response
+
+        request._page_cache_key = key
+        request._page_cache_timeout = config['timeout']
+        return None
+
+    def _should_store(self, request, response):
+        return (
+            request.method == 'GET'
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not (hasattr(request, 'session') and request.session.modified)
+            # A rendered CSRF token belongs to this visitor only
+            and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            and 'private' not in response.get('Cache-Control', '')
+        )
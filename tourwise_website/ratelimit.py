@@ -0,0 +1,183 @@
+"""
+Token-bucket rate limiting for expensive endpoints.
+
+Each scope (e.g. ``chatbot``) has a rate and a burst size configured in
+``settings.RATE_LIMITS``. Requests are bucketed per authenticated user, or
+per client IP for anonymous users (see ``client_ip`` for requests arriving
+through a proxy such as ngrok). Rejected requests get a 429 with a
+Retry-After header and bump the ``ratelimit.rejected.<scope>`` counter.
+
+Two backends are available via ``settings.RATE_LIMIT_BACKEND``:
+
+- ``local``: buckets in process memory behind a lock. Adds a few
+  microseconds per request but limits are per worker process.
+- ``cache``: buckets in the Django cache (Redis in production) so limits
+  hold across workers and nodes. The read-modify-write is not atomic, so a
+  burst racing across nodes can let a request or two extra through.
+"""
+import functools
+import ipaddress
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+RATE_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
+# Local buckets are pruned once this many keys are tracked
+LOCAL_MAX_BUCKETS = 10000
+
+
+def parse_rate(rate):
+    """Parse '20/m' into tokens per second."""
+    count, unit = rate.split('/')
+    return int(count) / RATE_UNITS[unit[0]]
+
+
+class LocalBuckets:
+    """In-process token buckets keyed by (scope, client)."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, burst):
+        """
+        Take one token from a bucket.
+
+        Returns:
+            float: 0 if allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                if len(self._buckets) > LOCAL_MAX_BUCKETS:
+                    self._prune(now)
+                return 0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def _prune(self, now):
+        # Drop buckets idle long enough to have refilled completely
+        for key, (tokens, updated) in list(self._buckets.items()):
+            scope = key[0]
+            rate, burst = _scope_config(scope)
+            if tokens + (now - updated) * rate >= burst:
+                del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """Token buckets stored in the Django cache, shared across processes."""
+
+    def consume(self, key, rate, burst):
+        cache_key = 'ratelimit:' + ':'.join(key)
+        now = time.time()
+        tokens, updated = cache.get(cache_key, (burst, now))
+        tokens = min(burst, tokens + max(0, now - updated) * rate)
+        # Expire once the bucket would be full again anyway
+        timeout = math.ceil(burst / rate) + 1
+        if tokens >= 1:
+            cache.set(cache_key, (tokens - 1, now), timeout)
+            return 0
+        cache.set(cache_key, (tokens, now), timeout)
+        return (1 - tokens) / rate
+
+    def clear(self):
+        pass
+
+
+_local_buckets = LocalBuckets()
+_cache_buckets = CacheBuckets()
+
+
+def get_buckets():
+    return _cache_buckets if settings.RATE_LIMIT_BACKEND == 'cache' else _local_buckets
+
+
+def _scope_config(scope):
+    config = settings.RATE_LIMITS[scope]
+    return parse_rate(config['rate']), config['burst']
+
+
+@functools.lru_cache(maxsize=8)
+def _proxy_networks(proxies):
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def _is_trusted_proxy(address, networks):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(request):
+    """
+    Return the client's IP address, looking through trusted proxies.
+
+    Behind a proxy every request comes from the proxy's address, so the
+    ``X-Forwarded-For`` chain is walked back from the nearest hop, skipping
+    addresses in ``settings.TRUSTED_PROXIES``. The first address that is not
+    a trusted proxy is the client. A client cannot spoof its IP by sending
+    its own header, because entries it adds sit behind an untrusted hop.
+    """
+    networks = _proxy_networks(tuple(settings.TRUSTED_PROXIES))
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    chain = [address.strip() for address in forwarded.split(',') if address.strip()]
+    chain.append(request.META.get('REMOTE_ADDR', ''))
+    for address in reversed(chain):
+        if not _is_trusted_proxy(address, networks):
+            return address
+    return chain[0]
+
+
+def client_key(request):
+    """Identify the caller: user id when logged in, otherwise client IP."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+def rate_limit(scope):
+    """
+    Decorate a view with the token bucket configured for a scope.
+
+    Args:
+        scope: Key into settings.RATE_LIMITS
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not settings.RATE_LIMIT_ENABLED:
+                return view_func(request, *args, **kwargs)
+
+            rate, burst = _scope_config(scope)
+            client = client_key(request)
+            retry_after = get_buckets().consume((scope, client), rate, burst)
+            if not retry_after:
+                return view_func(request, *args, **kwargs)
+
+            metrics.increment(f"ratelimit.rejected.{scope}")
+            logger.warning(f"Rate limit exceeded for {scope} by {client}")
+            response = JsonResponse({'error': 'Too many requests. Please try again shortly.'}, status=429)
+            response['Retry-After'] = str(math.ceil(retry_after))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,65 @@
+"""
+Session engine: cached reads, and database writes only when data changes.
+
+Built on Django's ``cached_db`` engine, so sessions are read from the cache
+(``SESSION_CACHE_ALIAS``) and only fall back to ``django_session`` on a
+miss. On top of that:
+
+- A session whose data is unchanged since it was loaded is never written
+  back. Django saves whenever a key is assigned, even to the value it
+  already had (e.g. the step search re-storing the same location).
+- With ``SESSION_DB_WRITE_INTERVAL`` set, changes to a session written to
+  the database less than that many seconds ago only update the cache; the
+  database copy catches up on the first change after the interval
+  (write-behind). Only enable this with a shared, persistent cache such as
+  Redis: the cache then holds the newest data and the database is a backup.
+
+Only use this engine with a shared cache (``REDIS_URL``): with the
+per-process LocMemCache each worker would keep serving its own copy of a
+session after another worker changed or flushed it. Without one the
+default is ``tourwise_website.db_sessions``, which keeps the unchanged-data
+guard but reads from the database.
+
+Enable with ``SESSION_ENGINE = 'tourwise_website.sessions'``.
+"""
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+
+
+class SkipUnchangedSaveMixin:
+    """Skip saving a loaded session whose data has not changed."""
+
+    _loaded_data = None
+
+    def _snapshot(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._loaded_data = self._snapshot(data)
+        return data
+
+    def save(self, must_create=False):
+        if must_create or self.session_key is None or self._loaded_data is None:
+            super().save(must_create=must_create)
+            self._loaded_data = self._snapshot(self._session)
+            return
+
+        data = self._snapshot(self._session)
+        if data == self._loaded_data:
+            return
+        self._save_changed(must_create)
+        self._loaded_data = data
+
+    def _save_changed(self, must_create):
+        super().save(must_create=must_create)
+
+
+class SessionStore(SkipUnchangedSaveMixin, cached_db.SessionStore):
+    def _save_changed(self, must_create):
+        interval = getattr(settings, 'SESSION_DB_WRITE_INTERVAL', 0)
+        if interval and not self._cache.add(f"{self.cache_key}:db", 1, interval):
+            # Written to the database recently; the cache carries this change
+            self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+        else:
+            super()._save_changed(must_create)
@@ -67,6 +67,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Serves cached pages to anonymous visitors; keep after session/CSRF/messages
+    'tourwise_website.pagecache.AnonymousPageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'tourwise_website.urls'
@@ -86,6 +88,9 @@ TEMPLATES = [
     },
 ]
 
+# Precompile all templates when a WSGI/ASGI worker starts (on in settings_production)
+TEMPLATE_WARMUP = os.getenv('TEMPLATE_WARMUP', 'False').lower() == 'true'
+
 WSGI_APPLICATION = 'tourwise_website.wsgi.application'
 
 # Database
@@ -108,6 +113,59 @@ DATABASES = {
     }
 }
 
+# Cache
+# Local memory by default; set REDIS_URL to share cached data between workers
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tourwise-default',
+        }
+    }
+
+# Sessions are only written when their data changes. With a shared cache
+# they are also read from it (see tourwise_website/sessions.py); without one
+# each worker's LocMemCache would serve stale sessions, so they stay in the
+# database. A write interval > 0 defers repeated database writes to the
+# cache; only use it with REDIS_URL set.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'tourwise_website.sessions' if os.getenv('REDIS_URL') else 'tourwise_website.db_sessions'
+)
+SESSION_DB_WRITE_INTERVAL = int(os.getenv('SESSION_DB_WRITE_INTERVAL', '0'))
+
+# Proxies whose X-Forwarded-For header is trusted for the client IP (rate
+# limits, login lockouts). Defaults to the local ngrok agent; comma-separated
+# addresses or networks, e.g. "10.0.0.0/8".
+TRUSTED_PROXIES = [proxy.strip() for proxy in os.getenv('TRUSTED_PROXIES', '127.0.0.1,::1').split(',') if proxy.strip()]
+
+# Token-bucket rate limits per endpoint scope (see tourwise_website/ratelimit.py).
+# "local" keeps buckets per process; "cache" shares them through CACHES.
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True') == 'True'
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'cache' if os.getenv('REDIS_URL') else 'local')
+RATE_LIMITS = {
+    'chatbot': {'rate': '20/m', 'burst': 5},
+    'location_suggestions': {'rate': '120/m', 'burst': 20},
+    'payment_status': {'rate': '30/m', 'burst': 10},
+}
+
+# Failed login lockouts (see accounts/throttling.py). After `free_failures`
+# failures an identifier (or `ip_free_failures` from one IP) is locked out
+# for `base_lockout` seconds, doubling per further failure up to `max_lockout`.
+LOGIN_THROTTLE = {
+    'free_failures': 5,
+    'ip_free_failures': 30,
+    'base_lockout': 30,
+    'max_lockout': 60 * 60,
+    'window': 60 * 60 * 24,
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -180,6 +238,17 @@ GDAL_LIBRARY_PATH = os.path.join(CONDA_PREFIX, 'Library', 'bin', 'gdal.dll')
 # API Keys
 # GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')  # Removed - using free Nominatim for location search
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+# Override to point the chatbot at a Groq-compatible server (e.g. chatbot/stub_llm.py); None uses api.groq.com
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL') or None
+# Request structured JSON output for filter extraction (disable for providers without response_format)
+GROQ_JSON_MODE = os.getenv('GROQ_JSON_MODE', 'True').lower() == 'true'
+
+# Chatbot semantic search (local CPU embeddings; build with `python manage.py build_listing_index`)
+CHATBOT_EMBEDDING_MODEL = os.getenv('CHATBOT_EMBEDDING_MODEL', 'BAAI/bge-small-en-v1.5')
+CHATBOT_VECTOR_INDEX_DIR = os.getenv('CHATBOT_VECTOR_INDEX_DIR', str(BASE_DIR / 'var' / 'listing_index'))
+
+# Share identical in-flight Groq extractions across worker processes via a cache lock
+CHATBOT_SINGLEFLIGHT_SHARED = os.getenv('CHATBOT_SINGLEFLIGHT_SHARED', 'True' if os.getenv('REDIS_URL') else 'False').lower() == 'true'
 
 # Paynow Settings
 PAYNOW_INTEGRATION_ID = os.getenv('PAYNOW_INTEGRATION_ID', '21331')
@@ -187,6 +256,8 @@ PAYNOW_INTEGRATION_KEY = os.getenv('PAYNOW_INTEGRATION_KEY')
 PAYNOW_RETURN_URL = os.getenv('PAYNOW_RETURN_URL', 'http://127.0.0.1/payments/complete/')
 PAYNOW_RESULT_URL = os.getenv('PAYNOW_RESULT_URL', 'http://127.0.0.1/payments/update/')
 PAYNOW_MODE = os.getenv('PAYNOW_MODE', 'test')
+# Override the Paynow API host, e.g. to use the local stub (python -m payments.stub_paynow)
+PAYNOW_BASE_URL = os.getenv('PAYNOW_BASE_URL') or None
 
 # Development-specific settings
 if DEBUG:
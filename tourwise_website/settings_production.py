@@ -0,0 +1,48 @@
+"""
+Production settings for tourwise_website.
+
+Run with: DJANGO_SETTINGS_MODULE=tourwise_website.settings_production
+
+Builds on settings.py (environment variables are read the same way) and
+pins what production relies on instead of leaving it to DEBUG:
+- the cached template loader, so templates are parsed once per process,
+  plus a warm-up at worker start (see tourwise_website/template_warmup.py)
+- hashed, compressed static files from ``collectstatic``, served by
+  WhiteNoise from the app process (no separate web server needed), so
+  page CSS and JS can be cached by browsers indefinitely and change URL
+  when edited
+"""
+import copy
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, MIDDLEWARE, TEMPLATES
+
+DEBUG = False
+
+# Serves STATIC_ROOT; goes right after SecurityMiddleware as WhiteNoise requires
+MIDDLEWARE = [
+    MIDDLEWARE[0],
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    *MIDDLEWARE[1:],
+]
+
+# Copied so importing this module never changes the base settings
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATE_WARMUP = True
+
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
@@ -0,0 +1,65 @@
+"""
+Template warm-up for worker startup.
+
+With the cached template loader each template is read and compiled once
+per process, on first use, so the first request a worker serves for each
+page pays for parsing (``home.html`` and ``base.html`` are large). The WSGI
+and ASGI entry points call ``warm_templates()`` when ``TEMPLATE_WARMUP`` is
+on, compiling every template the cached loaders can find before the worker
+accepts traffic. Under ``gunicorn --preload`` this happens once in the
+master and the forked workers share the compiled templates.
+"""
+import logging
+import time
+from pathlib import Path
+
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+def _template_names(loader):
+    names = []
+    for inner in loader.loaders:
+        for directory in inner.get_dirs():
+            root = Path(directory)
+            if not root.is_dir():
+                continue
+            for path in sorted(root.rglob('*')):
+                if path.suffix in TEMPLATE_SUFFIXES and path.is_file():
+                    names.append(path.relative_to(root).as_posix())
+    return list(dict.fromkeys(names))
+
+
+def warm_templates():
+    """
+    Compile every template into the cached loaders.
+
+    Engines without a cached loader are skipped, since compiling their
+    templates would not be kept. Templates that fail to compile (e.g. those
+    of an app whose tag library is not installed) are logged and skipped.
+
+    Returns:
+        int: Number of templates compiled
+    """
+    started = time.perf_counter()
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for loader in backend.engine.template_loaders:
+            if not isinstance(loader, CachedLoader):
+                continue
+            for name in _template_names(loader):
+                try:
+                    backend.engine.get_template(name)
+                except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+                    logger.warning(f"Could not precompile template {name}: {e}")
+                else:
+                    compiled += 1
+    logger.info(f"Precompiled {compiled} templates in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return compiled
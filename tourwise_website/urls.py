@@ -18,8 +18,10 @@ from django.contrib import admin
 from django.urls import path, include  # ← import include
 from django.conf.urls.static import static
 from django.conf import settings
+from .metrics import metrics_view
 
 urlpatterns = [
+    path('admin/metrics/', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('', include('accounts.urls')),
     path('listings/', include('listings.urls')),